@@ -0,0 +1,93 @@
+"""
+Микробенчмарк DBClient: чистый Python против C-расширения, текстовые запросы против prepared statements.
+
+Запускается против локальной MySQL-заглушки из .env, например:
+    docker run -d -p 3306:3306 -e MYSQL_ROOT_PASSWORD=root -e MYSQL_DATABASE=wordpress mysql:8
+    python -m benchmarks.db_prepared_statements --iterations 2000
+
+Если в базе нет таблицы wp_posts, она создается по схеме WordPress.
+"""
+
+import argparse
+import time
+
+import mysql.connector
+
+from src.db_client import DBClient
+
+WP_POSTS_DDL = """
+    CREATE TABLE IF NOT EXISTS wp_posts (
+        ID bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+        post_author bigint(20) unsigned NOT NULL DEFAULT 0,
+        post_date datetime NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_date_gmt datetime NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_content longtext NOT NULL,
+        post_title text NOT NULL,
+        post_excerpt text NOT NULL,
+        post_status varchar(20) NOT NULL DEFAULT 'publish',
+        comment_status varchar(20) NOT NULL DEFAULT 'open',
+        ping_status varchar(20) NOT NULL DEFAULT 'open',
+        post_password varchar(255) NOT NULL DEFAULT '',
+        post_name varchar(200) NOT NULL DEFAULT '',
+        to_ping text NOT NULL,
+        pinged text NOT NULL,
+        post_modified datetime NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_modified_gmt datetime NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_content_filtered longtext NOT NULL,
+        post_parent bigint(20) unsigned NOT NULL DEFAULT 0,
+        guid varchar(255) NOT NULL DEFAULT '',
+        menu_order int(11) NOT NULL DEFAULT 0,
+        post_type varchar(20) NOT NULL DEFAULT 'post',
+        post_mime_type varchar(100) NOT NULL DEFAULT '',
+        comment_count bigint(20) NOT NULL DEFAULT 0,
+        PRIMARY KEY (ID),
+        KEY post_name (post_name(191)),
+        KEY type_status_date (post_type, post_status, post_date, ID),
+        KEY post_parent (post_parent),
+        KEY post_author (post_author)
+    ) DEFAULT CHARSET=utf8mb4
+"""
+
+
+def measure(client: DBClient, post_id: int, iterations: int) -> float:
+    """Возвращает среднее время одного запроса хелперов DBClient в микросекундах."""
+    client.get_post_by_id(post_id)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        client.get_post_by_id(post_id)
+        client.post_exists(post_id)
+    return (time.perf_counter() - started) / (iterations * 2) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup = DBClient()
+    setup.execute_query(WP_POSTS_DDL)
+    post_id = setup.create_post_via_sql("Benchmark post", "Benchmark content")
+
+    drivers = [("pure", True)] + ([("c", False)] if mysql.connector.HAVE_CEXT else [])
+    baseline: float | None = None
+    try:
+        print(f"{'driver':<8}{'statements':<12}{'us/query':>10}{'speedup':>10}")
+        for driver, use_pure in drivers:
+            for prepared in (False, True):
+                client = DBClient()
+                client.use_pure = use_pure
+                client.prepared_statements = prepared
+                try:
+                    per_query = measure(client, post_id, args.iterations)
+                finally:
+                    client.close()
+                baseline = baseline or per_query
+                mode = "prepared" if prepared else "text"
+                print(f"{driver:<8}{mode:<12}{per_query:>10.1f}{baseline / per_query:>9.2f}x")
+    finally:
+        setup.delete_post(post_id)
+        setup.close()
+
+
+if __name__ == "__main__":
+    main()
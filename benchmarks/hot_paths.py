@@ -0,0 +1,223 @@
+"""
+Бенчмарки горячих путей клиентов и фикстур: APIClient._request, разбор JSON ответа,
+фабрики make_post / make_post_via_sql, teardown cleanup_posts и хелперы DBClient.
+
+Гоняется против локальной заглушки WordPress (src.wp_standin) поверх SQLite (src.sqlite_driver),
+поэтому не требует ни WordPress, ни MySQL и не трогает базу из .env:
+    python -m benchmarks.hot_paths              # сравнить с базовой линией, код возврата 1 при регрессии
+    python -m benchmarks.hot_paths --update     # записать текущие результаты как базовую линию
+
+Для каждого пути печатаются ops/sec (лучший из --rounds замеров), пиковая память одной операции
+и число блоков памяти, оставшихся после операции (утечки и растущие кэши).
+В том же прогоне замеряется эталонная нагрузка без сети и БД, и ops/sec путей сравниваются в долях от нее,
+поэтому базовая линия, записанная на одной машине, годится и для другой (например, для раннера CI).
+Регрессия — доля от эталона ниже базовой линии или пиковая память выше нее больше чем на --threshold.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from config import Config
+from src.api_client import APIClient
+from src.db_client import DBClient
+from src.models import decode
+from src.wp_standin import start_standin
+
+BASELINE_PATH = Path(__file__).with_name("baselines") / "hot_paths.json"
+# Разница в пиковой памяти меньше этой считается шумом аллокатора
+PEAK_SLACK_KIB = 1.0
+LIST_SIZE = 100
+CLEANUP_BATCH = 10
+REFERENCE = "reference"
+
+
+@dataclass
+class Case:
+    name: str
+    op: Callable[[Any], Any]
+    # Подготовка к одной операции, в замер не входит; ее результат передается в op
+    setup: Callable[[], Any] = lambda: None
+
+
+def measure(case: Case, min_time: float, rounds: int, memory_ops: int) -> dict[str, float]:
+    """Замеряет ops/sec (лучший раунд), пиковую память операции в KiB и оставшиеся после нее блоки."""
+    for _ in range(3):
+        case.op(case.setup())
+
+    best = 0.0
+    for _ in range(rounds):
+        ops, elapsed = 0, 0.0
+        while elapsed < min_time:
+            arg = case.setup()
+            started = time.perf_counter()
+            case.op(arg)
+            elapsed += time.perf_counter() - started
+            ops += 1
+        best = max(best, ops / elapsed)
+
+    tracemalloc.start()
+    try:
+        peak = 0
+        before = tracemalloc.take_snapshot()
+        for _ in range(memory_ops):
+            arg = case.setup()
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            case.op(arg)
+            peak += tracemalloc.get_traced_memory()[1] - current
+            del arg
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return {
+        "ops_per_sec": round(best, 1),
+        "peak_kib": round(peak / memory_ops / 1024, 2),
+        "blocks_per_op": round(blocks / memory_ops, 2),
+    }
+
+
+def reference_case() -> Case:
+    """Эталонная нагрузка на интерпретатор: разбор и сортировка JSON со списком постов, без сети и БД."""
+    posts = [{"id": index, "title": {"raw": f"Post {LIST_SIZE - index}"}} for index in range(LIST_SIZE)]
+    payload = json.dumps(posts)
+    return Case(REFERENCE, lambda _: sorted(json.loads(payload), key=lambda post: post["title"]["raw"]))
+
+
+def relative(results: dict[str, dict[str, float]], reference: float) -> dict[str, dict[str, float]]:
+    """Добавляет к результатам ops/sec в долях от ops/sec эталонной нагрузки того же прогона."""
+    return {
+        name: {**result, "relative": round(result["ops_per_sec"] / reference, 5)} for name, result in results.items()
+    }
+
+
+def build_cases(api: APIClient, db: DBClient, created: list[int]) -> list[Case]:
+    """Сценарии повторяют то, что делают клиенты и фикстуры из tests/conftest.py."""
+    post_id = db.create_post_via_sql("Benchmark post", "Benchmark content")
+    created.append(post_id)
+    rows = [{"post_title": f"Benchmark list {index}", "post_content": "Body"} for index in range(LIST_SIZE)]
+    list_ids = db.create_posts_via_sql(rows)
+    created.extend(list_ids)
+    list_response = api.list_posts({"include": ",".join(map(str, list_ids)), "per_page": LIST_SIZE, "context": "edit"})
+
+    def make_post(_: Any) -> None:
+        # Фабрика make_post без запаса постов: POST через API, разбор ответа, регистрация на очистку
+        payload = {"title": f"Auto Test Title {uuid.uuid4()}", "content": "Default Content", "status": "publish"}
+        response = api.create_post(payload)
+        assert response.status_code == 201, response.text
+        created.append(response.json()["id"])
+
+    def make_post_via_sql(_: Any) -> None:
+        unique_id = str(uuid.uuid4())
+        created.append(db.create_post_via_sql(f"DB Auto Title [{unique_id}]", "DB Auto Content Body"))
+
+    def cleanup_setup() -> list[int]:
+        return db.create_posts_via_sql(rows[:CLEANUP_BATCH])
+
+    return [
+        Case("api_request", lambda _: api._request("get", f"wp/v2/posts/{post_id}")),
+        Case("response_json", lambda _: list_response.json()),
+        Case("models_decode", lambda _: decode(list_response)),
+        Case("make_post", make_post),
+        Case("make_post_via_sql", make_post_via_sql),
+        # Teardown cleanup_posts: удаление постов теста одной транзакцией
+        Case("cleanup_posts", db.delete_posts, setup=cleanup_setup),
+        Case("db_get_post_by_id", lambda _: db.get_post_by_id(post_id)),
+        Case("db_post_exists", lambda _: db.post_exists(post_id)),
+        Case("db_get_posts", lambda _: db.get_posts(list_ids)),
+    ]
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> list[str]:
+    """Регрессии относительно базовой линии; пути без базовой линии не проверяются."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["relative"] < base["relative"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {result['relative']:.4f} от эталона ({result['ops_per_sec']:.0f} ops/sec), "
+                f"базовая линия {base['relative']:.4f}"
+            )
+        if result["peak_kib"] > base["peak_kib"] * (1 + threshold) + PEAK_SLACK_KIB:
+            regressions.append(f"{name}: пик {result['peak_kib']:.1f} KiB/op, базовая линия {base['peak_kib']:.1f}")
+    return regressions
+
+
+def format_results(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]]) -> str:
+    lines = [f"{'path':<20}{'ops/sec':>12}{'vs ref':>9}{'vs base':>9}{'peak KiB':>10}{'blocks':>8}"]
+    for name, result in results.items():
+        base = baseline.get(name)
+        ratio = f"{result['relative'] / base['relative']:.2f}x" if base else "-"
+        ops, peak, blocks = result["ops_per_sec"], result["peak_kib"], result["blocks_per_op"]
+        lines.append(f"{name:<20}{ops:>12.0f}{result['relative']:>9.4f}{ratio:>9}{peak:>10.1f}{blocks:>8.1f}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="перезаписать базовую линию текущими результатами")
+    parser.add_argument("--threshold", type=float, default=0.35, help="допустимое ухудшение, доля (0.35 = 35%%)")
+    parser.add_argument("--min-time", type=float, default=0.3, help="длительность одного раунда, секунды")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--memory-ops", type=int, default=20, help="сколько операций замерять по памяти")
+    parser.add_argument("--only", action="append", help="запустить только указанные пути")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    Config.DB_DRIVER = "sqlite"
+    Config.DB_NAME = str(Path(tempfile.mkdtemp()) / "wp.sqlite")
+    Config.API_USER, Config.API_PASSWORD = "bench", "bench"
+    server = start_standin(Config.DB_NAME, user=Config.API_USER, password=Config.API_PASSWORD)
+    Config.BASE_URL = server.base_url
+
+    api, db = APIClient(), DBClient()
+    created: list[int] = []
+    try:
+        cases = [case for case in build_cases(api, db, created) if not args.only or case.name in args.only]
+        results = {case.name: measure(case, args.min_time, args.rounds, args.memory_ops) for case in cases}
+        reference = measure(reference_case(), args.min_time, args.rounds, args.memory_ops)["ops_per_sec"]
+    finally:
+        db.delete_posts(created)
+        db.close()
+        api.session.close()
+        server.shutdown()
+
+    stored = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    # Старая базовая линия без долей от эталона несравнима с текущими замерами
+    baseline = {name: base for name, base in stored.get("paths", {}).items() if "relative" in base}
+    results = relative(results, reference)
+    print(f"Эталон: {reference:.0f} ops/sec")
+    print(format_results(results, baseline))
+
+    if args.update:
+        stored = {
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}",
+            "reference_ops_per_sec": reference,
+            "paths": {**baseline, **results},
+        }
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(stored, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Базовая линия записана в {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("\nРегрессии:\n" + "\n".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
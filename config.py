@@ -1,40 +1,135 @@
 import os
+from collections.abc import Callable
+from typing import Any
 
-from dotenv import load_dotenv
+_dotenv_loaded = False
 
-load_dotenv()
+
+def _load_dotenv() -> None:
+    """Подгружает .env один раз, при первом обращении к настройке."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _dotenv_loaded = True
+
+
+def parse_flag(value: str) -> bool:
+    """Булево значение переменной окружения (1/true/yes — включено)."""
+    return value.strip().lower() in ("1", "true", "yes")
+
+
+def parse_list(value: str) -> list[str]:
+    """Список через запятую, пустые элементы отбрасываются."""
+    return [item for item in value.split(",") if item]
+
+
+class _EnvSetting:
+    def __init__(self, name: str, default: Any, parse: Callable[[str], Any]) -> None:
+        """
+        Настройка Config, которая читается из окружения при первом обращении, а не при импорте config.
+        Прочитанное значение заменяет дескриптор в классе, так что следующие обращения ничего не стоят,
+        а присваивание Config.X = ... (как в фикстуре wp_standin) работает как раньше.
+        """
+        self.name = name
+        self.default = default
+        self.parse = parse
+        self.attribute = name
+
+    def __set_name__(self, owner: type, attribute: str) -> None:
+        self.attribute = attribute
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        _load_dotenv()
+        raw = os.getenv(self.name)
+        value = self.default if raw is None else self.parse(raw)
+        setattr(owner, self.attribute, value)
+        return value
+
+
+def env(name: str, default: Any = None, parse: Callable[[str], Any] = str) -> Any:
+    """Ленивая настройка из переменной окружения name."""
+    return _EnvSetting(name, default, parse)
+
+
+def env_flag(name: str, default: bool) -> Any:
+    """Ленивая булева настройка (1/true/yes — включено)."""
+    return _EnvSetting(name, default, parse_flag)
 
 
 class Config:
-    BASE_URL: str | None = os.getenv("WP_BASE_URL")
-    API_USER: str | None = os.getenv("WP_API_USER")
-    API_PASSWORD: str | None = os.getenv("WP_API_PASSWORD")
+    BASE_URL: str | None = env("WP_BASE_URL")
+    API_USER: str | None = env("WP_API_USER")
+    API_PASSWORD: str | None = env("WP_API_PASSWORD")
 
-    DB_HOST: str | None = os.getenv("DB_HOST")
-    DB_PORT: int = int(os.getenv("DB_PORT", "3306"))
-    DB_USER: str | None = os.getenv("DB_USER")
-    DB_PASSWORD: str | None = os.getenv("DB_PASSWORD")
-    DB_NAME: str | None = os.getenv("DB_NAME")
+    DB_HOST: str | None = env("DB_HOST")
+    DB_PORT: int = env("DB_PORT", 3306, int)
+    DB_USER: str | None = env("DB_USER")
+    DB_PASSWORD: str | None = env("DB_PASSWORD")
+    DB_NAME: str | None = env("DB_NAME")
+    DB_POOL_SIZE: int = env("DB_POOL_SIZE", 4, int)
+    DB_POOL_IDLE_PING: float = env("DB_POOL_IDLE_PING", 60.0, float)
+    DB_DRIVER: str = env("DB_DRIVER", "auto")
+    DB_PREPARED_STATEMENTS: bool = env_flag("DB_PREPARED_STATEMENTS", False)
+    DB_DEFERRED_CLEANUP: bool = env_flag("DB_DEFERRED_CLEANUP", False)
+    DB_CLEANUP_INTERVAL: float = env("DB_CLEANUP_INTERVAL", 1.0, float)
+    DB_SHARDING: bool = env_flag("DB_SHARDING", False)
+    DB_PROFILE: bool = env_flag("DB_PROFILE", False)
+    DB_PROFILE_REPORT: str = env("DB_PROFILE_REPORT", "db_profile.json")
+    DB_PROFILE_REPEAT_THRESHOLD: int = env("DB_PROFILE_REPEAT_THRESHOLD", 5, int)
 
     TIMEOUT = 10
+    API_CONCURRENCY: int = env("WP_API_CONCURRENCY", 10, int)
+    API_POOL_SIZE: int = env("WP_API_POOL_SIZE", 10, int)
+    API_RETRIES: int = env("WP_API_RETRIES", 0, int)
+    API_COMPRESSION: bool = env_flag("WP_API_COMPRESSION", True)
+    API_POST_POOL_SIZE: int = env("WP_API_POST_POOL_SIZE", 0, int)
+    API_POST_POOL_LOW_WATER: int = env("WP_API_POST_POOL_LOW_WATER", 2, int)
+    API_BATCH_SIZE: int = env("WP_API_BATCH_SIZE", 25, int)
+    API_CASSETTE_MODE: str = env("WP_API_CASSETTE_MODE", "off")
+    API_CASSETTE_DIR: str = env("WP_API_CASSETTE_DIR", "cassettes")
+    API_TIMING: bool = env_flag("WP_API_TIMING", False)
+    API_TIMING_TOP: int = env("WP_API_TIMING_TOP", 10, int)
+    API_TIMING_ALLURE: bool = env_flag("WP_API_TIMING_ALLURE", False)
+    API_LATENCY_POLICY: bool = env_flag("WP_API_LATENCY_POLICY", False)
+    API_HEDGE_QUANTILE: float = env("WP_API_HEDGE_QUANTILE", 95.0, float)
+    API_POLICY_RETRIES: int = env("WP_API_POLICY_RETRIES", 2, int)
+    API_BREAKER_THRESHOLD: int = env("WP_API_BREAKER_THRESHOLD", 5, int)
+    API_BREAKER_RESET: float = env("WP_API_BREAKER_RESET", 30.0, float)
+
+    ALLURE_STEPS: str = env("ALLURE_STEPS", "full")
+    ALLURE_STEP_SAMPLE: int = env("ALLURE_STEP_SAMPLE", 3, int)
+    ALLURE_BUFFERED: bool = env_flag("ALLURE_BUFFERED", False)
+    ALLURE_FAILURE_ATTACHMENTS: bool = env_flag("ALLURE_FAILURE_ATTACHMENTS", False)
+    ALLURE_EXCHANGES: int = env("ALLURE_EXCHANGES", 50, int)
+
+    RESULT_CACHE: bool = env_flag("RESULT_CACHE", False)
+    RESULT_CACHE_FORCE: bool = env_flag("RESULT_CACHE_FORCE", False)
+
+    XDIST_DURATION_SCHEDULING: bool = env_flag("XDIST_DURATION_SCHEDULING", False)
+    XDIST_GROUP_FIXTURES: list[str] = env("XDIST_GROUP_FIXTURES", [], parse_list)
 
     @classmethod
-    def validate(cls) -> None:
-        """Проверяет, что все обязательные переменные окружения заданы."""
-        required_vars: dict[str, str | None] = {
-            "WP_BASE_URL": cls.BASE_URL,
-            "WP_API_USER": cls.API_USER,
-            "WP_API_PASSWORD": cls.API_PASSWORD,
-            "DB_HOST": cls.DB_HOST,
-            "DB_USER": cls.DB_USER,
-            "DB_PASSWORD": cls.DB_PASSWORD,
-            "DB_NAME": cls.DB_NAME,
-        }
+    def validate(cls, subsystem: str | None = None) -> None:
+        """
+        Проверяет, что заданы обязательные переменные окружения подсистемы: api, db или обеих (None).
+        Клиенты вызывают проверку своей подсистемы при создании, поэтому прогону только с API
+        не нужны настройки БД, а импорт config и сбор тестов не требуют ничего.
+        """
+        required_vars: dict[str, str | None] = {}
+        if subsystem in (None, "api"):
+            required_vars.update(
+                {"WP_BASE_URL": cls.BASE_URL, "WP_API_USER": cls.API_USER, "WP_API_PASSWORD": cls.API_PASSWORD}
+            )
+        # WP_BASE_URL=standin сам создает SQLite-базу, а для DB_DRIVER=sqlite нужен только путь к файлу.
+        # При воспроизведении кассет запросы к БД отдаются из кассет, и настройки БД не нужны
+        if subsystem in (None, "db") and cls.BASE_URL != "standin" and cls.API_CASSETTE_MODE != "replay":
+            required_vars["DB_NAME"] = cls.DB_NAME
+            if cls.DB_DRIVER != "sqlite":
+                required_vars.update({"DB_HOST": cls.DB_HOST, "DB_USER": cls.DB_USER, "DB_PASSWORD": cls.DB_PASSWORD})
 
         missing_vars: list[str] = [var_name for var_name, var_value in required_vars.items() if not var_value]
 
         if missing_vars:
             raise ValueError(f"Отсутствуют обязательные переменные окружения: {', '.join(missing_vars)}")
-
-
-Config.validate()
@@ -0,0 +1,134 @@
+import queue
+import threading
+import warnings
+from collections.abc import Callable, Generator
+from typing import Any
+
+import allure
+import allure_commons
+import pytest
+from allure_commons import hookimpl
+from allure_commons.logger import AllureFileLogger
+
+from src import reporting
+from src.reporting import STEP_STATS, ExchangeLog
+
+
+class BufferedFileLogger:
+    def __init__(self, logger: AllureFileLogger) -> None:
+        """
+        Обертка над файловым логгером allure-pytest: результаты и вложения складываются в очередь в памяти,
+        а на диск их пишет фоновый поток. Тест не ждет сериализации JSON и записи файлов.
+        """
+        self.logger = logger
+        self.errors = 0
+        self.last_error: Exception | None = None
+        self._queue: queue.Queue[tuple[Callable[..., None], tuple[Any, ...]] | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="allure-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while (task := self._queue.get()) is not None:
+            write, args = task
+            try:
+                write(*args)
+            except Exception as error:
+                # Поток не должен умирать на одной записи: остальные результаты все равно дописываются
+                self.errors += 1
+                self.last_error = error
+
+    @hookimpl
+    def report_result(self, result: Any) -> None:
+        self._queue.put((self.logger.report_result, (result,)))
+
+    @hookimpl
+    def report_container(self, container: Any) -> None:
+        self._queue.put((self.logger.report_container, (container,)))
+
+    @hookimpl
+    def report_attached_file(self, source: Any, file_name: str) -> None:
+        self._queue.put((self.logger.report_attached_file, (source, file_name)))
+
+    @hookimpl
+    def report_attached_data(self, body: Any, file_name: str) -> None:
+        self._queue.put((self.logger.report_attached_data, (body, file_name)))
+
+    def close(self) -> None:
+        """Дописывает все, что осталось в очереди, и останавливает поток."""
+        self._queue.put(None)
+        self._thread.join()
+
+
+def format_summary(title: str, count: int, p95_ms: float) -> str:
+    return f"{title} ×{count}, p95 {p95_ms:.0f} мс"
+
+
+class AllureReportingPlugin:
+    def __init__(self, buffered: bool, summary_sample: int | None, exchanges: int | None) -> None:
+        """
+        Облегченная отчетность Allure для больших прогонов.
+        buffered — писать allure-results фоновым потоком (см. BufferedFileLogger).
+        summary_sample — в режиме ALLURE_STEPS=summary в конце теста добавить по одному шагу-сводке
+        на каждый шаг, вызванный больше summary_sample раз.
+        exchanges — сколько последних HTTP-обменов APIClient хранить и прикладывать к упавшему тесту.
+        """
+        self.buffered = buffered
+        self.summary_sample = summary_sample
+        self.exchanges = ExchangeLog(exchanges) if exchanges else None
+        self._writers: list[BufferedFileLogger] = []
+        self._failed = False
+
+    def pytest_sessionstart(self, session: pytest.Session) -> None:
+        # allure-pytest регистрирует файловый логгер в своем pytest_configure, поэтому подменяем его здесь
+        if self.buffered:
+            for plugin in allure_commons.plugin_manager.get_plugins():
+                if isinstance(plugin, AllureFileLogger):
+                    writer = BufferedFileLogger(plugin)
+                    allure_commons.plugin_manager.unregister(plugin)
+                    allure_commons.plugin_manager.register(writer)
+                    self._writers.append(writer)
+        reporting.EXCHANGES = self.exchanges
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item: pytest.Item) -> None:
+        self._failed = False
+        STEP_STATS.take()
+        if self.exchanges is not None:
+            self.exchanges.clear()
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(self, item: pytest.Item, call: pytest.CallInfo[None]) -> Generator[None, Any, Any]:
+        report = yield
+        self._failed = self._failed or report.failed
+        return report
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_teardown(self, item: pytest.Item) -> Generator[None, Any, Any]:
+        try:
+            return (yield)
+        finally:
+            self._attach()
+
+    def _attach(self) -> None:
+        if self.summary_sample is not None:
+            for title, histogram in STEP_STATS.take().items():
+                if histogram.count > self.summary_sample:
+                    with allure.step(format_summary(title, histogram.count, histogram.percentile(95) / 1000)):
+                        pass
+        if self._failed and self.exchanges is not None:
+            allure.attach(self.exchanges.format(), name="HTTP exchanges", attachment_type=allure.attachment_type.TEXT)
+
+    def pytest_unconfigure(self, config: pytest.Config) -> None:
+        reporting.EXCHANGES = None
+        for writer in self._writers:
+            writer.close()
+            if writer.errors:
+                warnings.warn(
+                    pytest.PytestWarning(
+                        f"ALLURE_BUFFERED: {writer.errors} результатов и вложений Allure не записано, "
+                        f"последняя ошибка: {writer.last_error!r}"
+                    )
+                )
+            allure_commons.plugin_manager.unregister(writer)
+            # allure-pytest снимает свой логгер в cleanup и ожидает, что он зарегистрирован
+            allure_commons.plugin_manager.register(writer.logger)
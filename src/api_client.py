@@ -1,61 +1,329 @@
-from typing import Any
+import json
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlencode
 
-import allure
 import requests
 from requests import Response
 from requests.auth import HTTPBasicAuth
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
 
 from config import Config
+from src.models import decode
+from src import reporting
+from src.reporting import step
+from src.sharding import SHARD_HEADER, current_shard
+from src.timing import REQUEST_HOOKS, TimingAdapter, carry_context, measure_request
+
+if TYPE_CHECKING:
+    from src.cassette import Cassette
+    from src.latency_policy import LatencyPolicy
+
+# Сессии потоков пула политики задержек, см. thread_session
+_thread_sessions = threading.local()
+
+
+class BatchItem:
+    def __init__(
+        self, method: str, path: str, body: dict[str, Any] | None = None, params: dict[str, Any] | None = None
+    ) -> None:
+        """
+        Подзапрос, поставленный в очередь батча.
+        После отправки батча в response лежит ответ на этот подзапрос.
+        """
+        self.method = method
+        self.path = path
+        self.body = body
+        self.params = params
+        self.response: Response | None = None
+
+    def as_batch_request(self) -> dict[str, Any]:
+        """Описание подзапроса в формате /batch/v1."""
+        path = f"/{self.path}"
+        if self.params:
+            path = f"{path}?{urlencode(self.params)}"
+        request: dict[str, Any] = {"method": self.method.upper(), "path": path}
+        if self.body is not None:
+            request["body"] = self.body
+        return request
+
+
+class PostBatch:
+    def __init__(self, client: "APIClient", size: int) -> None:
+        """
+        Очередь операций над постами для отправки через /batch/v1.
+        Запросы уходят пачками не больше size штук (лимит сервера — 25).
+        """
+        self.client = client
+        self.size = size
+        self.items: list[BatchItem] = []
+
+    def _enqueue(self, item: BatchItem) -> BatchItem:
+        self.items.append(item)
+        return item
+
+    def create_post(self, post_data: dict[str, Any]) -> BatchItem:
+        """Ставит в очередь создание поста."""
+        return self._enqueue(BatchItem("post", "wp/v2/posts", body=post_data))
+
+    def update_post(self, post_id: int, update_data: dict[str, Any]) -> BatchItem:
+        """Ставит в очередь обновление поста."""
+        return self._enqueue(BatchItem("post", f"wp/v2/posts/{post_id}", body=update_data))
+
+    def delete_post(self, post_id: int, force: bool = True) -> BatchItem:
+        """Ставит в очередь удаление поста."""
+        return self._enqueue(BatchItem("delete", f"wp/v2/posts/{post_id}", params={"force": str(force).lower()}))
+
+    def flush(self) -> list[Response]:
+        """
+        Отправляет накопленные запросы и возвращает ответы в порядке постановки в очередь.
+        """
+        items, self.items = self.items, []
+        for start in range(0, len(items), self.size):
+            self.client._send_batch(items[start : start + self.size])
+        return [item.response for item in items]
+
+
+def build_response(sub_response: dict[str, Any], url: str) -> Response:
+    """Собирает requests.Response из ответа на подзапрос батча."""
+    status = sub_response.get("status", 200)
+    response = Response()
+    response.status_code = status
+    try:
+        response.reason = HTTPStatus(status).phrase
+    except ValueError:
+        response.reason = ""
+    response.headers = CaseInsensitiveDict({k: str(v) for k, v in (sub_response.get("headers") or {}).items()})
+    response._content = json.dumps(sub_response.get("body")).encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = url
+    return response
+
+
+def create_session() -> requests.Session:
+    """
+    Создает requests.Session с авторизацией и пулом соединений из Config.
+    Пул держит до API_POOL_SIZE keep-alive соединений на хост; идемпотентные запросы
+    повторяются до API_RETRIES раз при сетевых ошибках и ответах 502/503/504.
+    С API_COMPRESSION=false сервер просят отвечать без сжатия.
+    """
+    session = requests.Session()
+    session.auth = HTTPBasicAuth(Config.API_USER, Config.API_PASSWORD)
+    session.headers.setdefault("Accept", "application/json")
+    if not Config.API_COMPRESSION:
+        session.headers["Accept-Encoding"] = "identity"
+    retries = Retry(
+        total=Config.API_RETRIES, backoff_factor=0.2, status_forcelist=(502, 503, 504), raise_on_status=False
+    )
+    for prefix in ("http://", "https://"):
+        session.mount(prefix, TimingAdapter(pool_maxsize=Config.API_POOL_SIZE, max_retries=retries))
+    shard = current_shard()
+    if shard is not None:
+        session.headers[SHARD_HEADER] = shard
+    return session
+
+
+def thread_session(template: requests.Session) -> Callable[[], requests.Session]:
+    """
+    Снимает настройки template в вызывающем потоке и возвращает функцию, которая отдает сессию текущего потока
+    с этими настройками. requests.Session не потокобезопасна, поэтому запросы из потоков политики задержек
+    и их дубли идут через сессии своих потоков, каждая со своими keep-alive соединениями.
+    Cookies, выставленные ответами, в template не возвращаются.
+    """
+    headers, params, cookies = template.headers.copy(), dict(template.params), template.cookies.copy()
+    auth, verify, cert, proxies = template.auth, template.verify, template.cert, dict(template.proxies)
+
+    def session() -> requests.Session:
+        current = getattr(_thread_sessions, "session", None)
+        if current is None:
+            current = _thread_sessions.session = create_session()
+        current.headers, current.params, current.cookies = headers, params, cookies
+        current.auth, current.verify, current.cert, current.proxies = auth, verify, cert, proxies
+        return current
+
+    return session
 
 
 class APIClient:
-    def __init__(self) -> None:
+    def __init__(self, session: requests.Session | None = None) -> None:
         """
         Инициализация клиента.
-        Создает сессию, чтобы сохранять авторизацию между запросами.
+        Использует переданную сессию (например, общую на воркер, чтобы переиспользовать соединения)
+        или создает свою, чтобы сохранять авторизацию между запросами.
         """
+        Config.validate("api")
         self.base_url: str = Config.BASE_URL
         self.timeout: int = Config.TIMEOUT
-        self.session = requests.Session()
-        self.session.auth = HTTPBasicAuth(Config.API_USER, Config.API_PASSWORD)
-        self.session.headers.setdefault("Accept", "application/json")
+        self.session = session or create_session()
+        self._batch_supported: bool | None = None
+        self.cassette: "Cassette | None" = None
+        self.latency_policy: "LatencyPolicy | None" = None
 
-    def _request(self, method: str, path: str, **kwargs: Any) -> Response:
+    def _request(self, method: str, path: str, idempotent: bool = False, **kwargs: Any) -> Response:
         """
         Унифицирует вызовы requests.Session и навешивает таймаут по умолчанию.
+        Если подключена кассета, записывает взаимодействие или отдает его из кассеты без сети.
+        Запросы в сеть замеряются, если на них подписаны хуки src.timing.
+        Если подключена политика задержек, запрос идет через нее; idempotent разрешает дублировать и повторять его.
+        Обмен запоминается для вложения в Allure, если включен ALLURE_FAILURE_ATTACHMENTS.
         """
         kwargs.setdefault("timeout", self.timeout)
         url = f"{self.base_url}{path}"
-        return self.session.request(method=method, url=url, **kwargs)
+        request = None
+        if self.cassette is not None:
+            request = {"method": method, "path": path, "params": kwargs.get("params"), "body": kwargs.get("json")}
+
+        def send(session: requests.Session) -> Response:
+            if REQUEST_HOOKS:
+                return measure_request(method, path, lambda: session.request(method=method, url=url, **kwargs))
+            return session.request(method=method, url=url, **kwargs)
+
+        if request is not None and self.cassette.mode == "replay":
+            response = self.cassette.play(request)
+        # При записи кассеты дубли и повторы исказили бы записанное взаимодействие
+        elif self.latency_policy is not None and request is None:
+            if self.latency_policy.hedges(method, idempotent):
+                session = thread_session(self.session)
+                response = self.latency_policy.execute(method, path, lambda: send(session()), idempotent=True)
+            else:
+                response = self.latency_policy.execute(method, path, lambda: send(self.session))
+        else:
+            response = send(self.session)
+            if request is not None:
+                self.cassette.record(request, response)
+        if reporting.EXCHANGES is not None:
+            reporting.EXCHANGES.record(method, url, kwargs, response)
+        return response
 
-    @allure.step("Отправить POST /wp/v2/posts для создания поста")
+    @step("Отправить POST /wp/v2/posts для создания поста")
     def create_post(self, post_data: dict[str, Any]) -> Response:
         """
         Создает новый пост.
         """
         return self._request("post", "wp/v2/posts", json=post_data)
 
-    @allure.step("Отправить GET /wp/v2/posts/{post_id} для получения поста")
+    @step("Отправить GET /wp/v2/posts/{post_id} для получения поста")
     def get_post(self, post_id: int, params: dict[str, Any] | None = None) -> Response:
         """Получает пост по ID."""
-        return self._request("get", f"wp/v2/posts/{post_id}", params=params)
+        return self._request("get", f"wp/v2/posts/{post_id}", idempotent=True, params=params)
 
-    @allure.step("Отправить GET /wp/v2/posts&include=<ids> для получения списка постов")
+    @step("Отправить GET /wp/v2/posts&include=<ids> для получения списка постов")
     def list_posts(self, params: dict[str, Any] | None = None) -> Response:
         """
         Получает список постов с фильтрацией.
         """
-        return self._request("get", "wp/v2/posts", params=params)
+        return self._request("get", "wp/v2/posts", idempotent=True, params=params)
+
+    def iter_posts(
+        self,
+        params: dict[str, Any] | None = None,
+        page_size: int = 100,
+        prefetch: int = 4,
+        fields: list[str] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Обходит все страницы GET /wp/v2/posts и отдает посты по одному.
+        Число страниц берется из X-WP-TotalPages первой страницы; следующие prefetch страниц
+        запрашиваются в фоне, пока потребитель разбирает текущую, поэтому в памяти не больше prefetch + 1 страниц.
+        fields передается в _fields, чтобы WordPress сериализовал только нужные поля.
+        По умолчанию посты упорядочены по ID, чтобы постраничный обход был стабильным.
+        """
+        if not 1 <= page_size <= 100:
+            raise ValueError("page_size должен быть от 1 до 100 (ограничение WordPress на per_page)")
+        base_params = {"orderby": "id", "order": "asc", **(params or {}), "per_page": page_size}
+        if fields:
+            base_params["_fields"] = ",".join(fields)
+
+        def _fetch(page: int) -> list[dict[str, Any]]:
+            response = self._request("get", "wp/v2/posts", params={**base_params, "page": page})
+            response.raise_for_status()
+            return decode(response)
+
+        first_page = self._request("get", "wp/v2/posts", params={**base_params, "page": 1})
+        first_page.raise_for_status()
+        total_pages = int(first_page.headers.get("X-WP-TotalPages", 1))
+        if total_pages < 2:
+            yield from decode(first_page)
+            return
 
-    @allure.step("Отправить POST /wp/v2/posts/{post_id} для обновления поста")
+        executor = ThreadPoolExecutor(max_workers=max(1, prefetch), thread_name_prefix="iter-posts")
+        fetch = carry_context(_fetch)
+        try:
+            pending: dict[int, Future[list[dict[str, Any]]]] = {}
+            next_page = 2
+
+            def _submit_until(last_page: int) -> None:
+                nonlocal next_page
+                while next_page <= min(last_page, total_pages):
+                    pending[next_page] = executor.submit(fetch, next_page)
+                    next_page += 1
+
+            # Следующие страницы запрашиваются до того, как потребитель начнет разбирать первую
+            _submit_until(1 + prefetch)
+            yield from decode(first_page)
+            for page in range(2, total_pages + 1):
+                _submit_until(page + prefetch)
+                yield from pending.pop(page).result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @step("Отправить POST /wp/v2/posts/{post_id} для обновления поста")
     def update_post(self, post_id: int, update_data: dict[str, Any]) -> Response:
         """Обновляет пост."""
         return self._request("post", f"wp/v2/posts/{post_id}", json=update_data)
 
-    @allure.step("Отправить DELETE /wp/v2/posts/{post_id} для удаления поста")
+    @step("Отправить DELETE /wp/v2/posts/{post_id} для удаления поста")
     def delete_post(self, post_id: int, force: bool = True) -> Response:
         """
         Удаляет пост.
         """
         params = {"force": str(force).lower()}
         return self._request("delete", f"wp/v2/posts/{post_id}", params=params)
+
+    @contextmanager
+    def batch(self, size: int | None = None) -> Iterator[PostBatch]:
+        """
+        Копит create_post/update_post/delete_post и отправляет их через /batch/v1 при выходе из блока.
+        Если на сервере нет маршрута /batch/v1, запросы уходят по одному.
+        """
+        post_batch = PostBatch(self, size or Config.API_BATCH_SIZE)
+        yield post_batch
+        post_batch.flush()
+
+    def _send_batch(self, items: list[BatchItem]) -> None:
+        """
+        Отправляет одну пачку подзапросов и раскладывает ответы по BatchItem.
+        По одному запросы уходят только при 404 (маршрута /batch/v1 нет); при других ошибках
+        каждый BatchItem получает ответ самого батча.
+        """
+        if self._batch_supported is not False:
+            payload = {"validation": "normal", "requests": [item.as_batch_request() for item in items]}
+            with step(f"Отправить POST /batch/v1 с {len(items)} подзапросами"):
+                response = self._request("post", "batch/v1", json=payload)
+
+            if response.status_code != 404:
+                self._batch_supported = True
+                sub_responses = None
+                if response.ok:
+                    try:
+                        sub_responses = response.json().get("responses")
+                    except ValueError:
+                        pass
+                if sub_responses is not None and len(sub_responses) == len(items):
+                    for item, sub_response in zip(items, sub_responses):
+                        item.response = build_response(sub_response, response.url)
+                else:
+                    # Сервер мог уже выполнить часть пачки: повтор по одному продублировал бы посты,
+                    # поэтому каждый подзапрос получает ответ самого батча с ошибкой
+                    for item in items:
+                        item.response = response
+                return
+            self._batch_supported = False
+
+        for item in items:
+            item.response = self._request(item.method, item.path, json=item.body, params=item.params)
@@ -0,0 +1,154 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from typing import TYPE_CHECKING, Any
+
+from config import Config
+from src.reporting import step
+from src.sharding import SHARD_HEADER, current_shard
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class ConcurrentRequestsError(Exception):
+    def __init__(self, results: "list[httpx.Response | BaseException]") -> None:
+        """
+        Часть конкурентных запросов упала с исключением.
+        results — ответы и исключения в порядке входных данных: по ответам вызывающий код
+        может, например, зарегистрировать на очистку уже созданные посты.
+        """
+        self.results = results
+        self.errors = [result for result in results if isinstance(result, BaseException)]
+        super().__init__(f"{len(self.errors)} из {len(results)} запросов упали, первая ошибка: {self.errors[0]!r}")
+
+    @property
+    def responses(self) -> "list[httpx.Response]":
+        return [result for result in self.results if not isinstance(result, BaseException)]
+
+
+class AsyncAPIClient:
+    def __init__(self, concurrency: int | None = None) -> None:
+        """
+        Асинхронный двойник APIClient.
+        Держит один httpx.AsyncClient, чтобы переиспользовать соединения между запросами.
+        """
+        import httpx
+
+        Config.validate("api")
+        self.base_url: str = Config.BASE_URL
+        self.timeout: int = Config.TIMEOUT
+        self.concurrency: int = concurrency or Config.API_CONCURRENCY
+        headers = {"Accept": "application/json"}
+        shard = current_shard()
+        if shard is not None:
+            headers[SHARD_HEADER] = shard
+        self.client = httpx.AsyncClient(
+            auth=httpx.BasicAuth(Config.API_USER, Config.API_PASSWORD),
+            headers=headers,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+
+    async def __aenter__(self) -> "AsyncAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Закрывает пул соединений."""
+        await self.client.aclose()
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> "httpx.Response":
+        """
+        Унифицирует вызовы httpx.AsyncClient и навешивает таймаут по умолчанию.
+        Параметры дописываются к query из base_url (rest_route), а не заменяют его, как это делает requests.
+        """
+        import httpx
+
+        kwargs.setdefault("timeout", self.timeout)
+        params = kwargs.pop("params", None)
+        url = httpx.URL(f"{self.base_url}{path}")
+        if params:
+            url = url.copy_merge_params(params)
+        return await self.client.request(method=method, url=url, **kwargs)
+
+    async def _gather(
+        self, calls: "Iterable[Callable[[], Awaitable[httpx.Response]]]", concurrency: int | None
+    ) -> "list[httpx.Response]":
+        """
+        Выполняет вызовы конкурентно, ограничивая число запросов в полете семафором.
+        Результаты возвращаются в порядке входных данных. Если часть вызовов упала, остальные все равно
+        доводятся до конца, а затем бросается ConcurrentRequestsError со всеми ответами и ошибками.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def _run(call: "Callable[[], Awaitable[httpx.Response]]") -> "httpx.Response":
+            async with semaphore:
+                return await call()
+
+        results = await asyncio.gather(*(_run(call) for call in calls), return_exceptions=True)
+        if any(isinstance(result, BaseException) for result in results):
+            error = ConcurrentRequestsError(results)
+            raise error from error.errors[0]
+        return results
+
+    # Одиночные методы не открывают шагов Allure: стек шагов общий для потока, и шаги конкурентных корутин
+    # вложились бы друг в друга. Пакетные методы ниже открывают один шаг на весь gather.
+
+    async def create_post(self, post_data: dict[str, Any]) -> "httpx.Response":
+        """Создает новый пост."""
+        return await self._request("post", "wp/v2/posts", json=post_data)
+
+    async def get_post(self, post_id: int, params: dict[str, Any] | None = None) -> "httpx.Response":
+        """Получает пост по ID."""
+        return await self._request("get", f"wp/v2/posts/{post_id}", params=params)
+
+    async def list_posts(self, params: dict[str, Any] | None = None) -> "httpx.Response":
+        """Получает список постов с фильтрацией."""
+        return await self._request("get", "wp/v2/posts", params=params)
+
+    async def update_post(self, post_id: int, update_data: dict[str, Any]) -> "httpx.Response":
+        """Обновляет пост."""
+        return await self._request("post", f"wp/v2/posts/{post_id}", json=update_data)
+
+    async def delete_post(self, post_id: int, force: bool = True) -> "httpx.Response":
+        """Удаляет пост."""
+        params = {"force": str(force).lower()}
+        return await self._request("delete", f"wp/v2/posts/{post_id}", params=params)
+
+    async def create_posts(
+        self, payloads: list[dict[str, Any]], concurrency: int | None = None
+    ) -> "list[httpx.Response]":
+        """
+        Создает посты пачкой, не более concurrency запросов одновременно.
+        """
+        with step(f"Отправить {len(payloads)} x POST /wp/v2/posts для создания постов"):
+            calls = [lambda payload=payload: self._request("post", "wp/v2/posts", json=payload) for payload in payloads]
+            return await self._gather(calls, concurrency)
+
+    async def get_posts(
+        self, post_ids: list[int], params: dict[str, Any] | None = None, concurrency: int | None = None
+    ) -> "list[httpx.Response]":
+        """
+        Получает посты по списку ID, не более concurrency запросов одновременно.
+        """
+        with step(f"Отправить {len(post_ids)} x GET /wp/v2/posts/{{post_id}} для получения постов"):
+            calls = [
+                lambda post_id=post_id: self._request("get", f"wp/v2/posts/{post_id}", params=params)
+                for post_id in post_ids
+            ]
+            return await self._gather(calls, concurrency)
+
+    async def delete_posts(
+        self, post_ids: list[int], force: bool = True, concurrency: int | None = None
+    ) -> "list[httpx.Response]":
+        """
+        Удаляет посты по списку ID, не более concurrency запросов одновременно.
+        """
+        with step(f"Отправить {len(post_ids)} x DELETE /wp/v2/posts/{{post_id}} для удаления постов"):
+            params = {"force": str(force).lower()}
+            calls = [
+                lambda post_id=post_id: self._request("delete", f"wp/v2/posts/{post_id}", params=params)
+                for post_id in post_ids
+            ]
+            return await self._gather(calls, concurrency)
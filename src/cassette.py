@@ -0,0 +1,183 @@
+import json
+import re
+from collections import defaultdict, deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+from requests import Response
+
+from config import Config
+from src.api_client import build_response
+
+
+@dataclass(frozen=True)
+class Normalizer:
+    """
+    Описывает изменчивое значение в запросе (UUID, ID поста), которое не должно мешать сопоставлению с записью.
+    pattern ищет значение в запросе (первая группа), response_pattern — в ответе;
+    значения из записанного ответа подменяются на значения текущего запроса.
+    """
+
+    name: str
+    pattern: str
+    response_pattern: str | None = None
+
+    def tokens(self, text: str) -> list[str]:
+        return [match.group(1) for match in re.finditer(self.pattern, text)]
+
+    def normalize(self, text: str) -> str:
+        return re.sub(self.pattern, lambda match: match.group(0).replace(match.group(1), f"<{self.name}>"), text)
+
+    def remap(self, text: str, mapping: dict[str, str]) -> str:
+        def _replace(match: re.Match[str]) -> str:
+            value = match.group(1)
+            return match.group(0).replace(value, mapping[value]) if value in mapping else match.group(0)
+
+        return re.sub(self.response_pattern or self.pattern, _replace, text)
+
+
+UUID_PATTERN = r"([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})"
+
+DEFAULT_NORMALIZERS: tuple[Normalizer, ...] = (
+    Normalizer("uuid", UUID_PATTERN),
+    Normalizer("post_id", r"wp/v2/posts/(\d+)", response_pattern=r"\"id\":\s*(\d+)"),
+)
+
+
+# Заголовки транспорта: тело в кассете уже раскодировано, а длина пересчитывается при воспроизведении
+SKIPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"})
+
+
+def cassette_path(nodeid: str) -> Path:
+    """Путь к кассете теста: <API_CASSETTE_DIR>/<модуль>/<класс.тест>.json."""
+    module, *names = nodeid.split("::")
+    file_name = re.sub(r"[^\w.-]", "_", ".".join(names))
+    return Path(Config.API_CASSETTE_DIR) / Path(module).stem / f"{file_name}.json"
+
+
+class CassetteMissError(LookupError):
+    """В кассете нет записи для запроса в режиме replay."""
+
+
+class Cassette:
+    def __init__(self, path: Path, mode: str, normalizers: tuple[Normalizer, ...] = DEFAULT_NORMALIZERS) -> None:
+        """
+        Кассета с парами запрос/ответ одного теста и результатами его запросов к БД.
+        В режиме record APIClient и DBClient ходят в сеть и в базу и дописывают взаимодействия,
+        в режиме replay ответы отдаются из памяти без сети и без базы.
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Неизвестный режим кассеты: '{mode}'. Допустимые значения: record, replay")
+        self.path = path
+        self.mode = mode
+        self.normalizers = normalizers
+        self.interactions: list[dict[str, Any]] = []
+        self._queues: dict[str, deque[dict[str, Any]]] = defaultdict(deque)
+        # Записанные значения, уже сопоставленные с текущими, по имени нормализатора
+        self._aliases: dict[str, dict[str, str]] = defaultdict(dict)
+
+        if mode == "replay":
+            if not path.exists():
+                raise CassetteMissError(f"Кассета {path} не найдена. Запишите ее с WP_API_CASSETTE_MODE=record")
+            self.interactions = json.loads(path.read_text(encoding="utf-8"))["interactions"]
+            for interaction in self.interactions:
+                if "call" in interaction:
+                    key = self._match_key(self._call_key(interaction["call"]))
+                else:
+                    key = self._match_key(self._request_key(interaction["request"]))
+                self._queues[key].append(interaction)
+
+    @staticmethod
+    def _request_key(request: dict[str, Any]) -> str:
+        params = urlencode(sorted((request.get("params") or {}).items()))
+        body = json.dumps(request.get("body"), sort_keys=True, ensure_ascii=False)
+        return f"{request['method'].upper()} {request['path']}?{params} {body}"
+
+    @staticmethod
+    def _call_key(call: dict[str, Any]) -> str:
+        return f"CALL {call['name']} {json.dumps(call['args'], sort_keys=True, ensure_ascii=False)}"
+
+    def _match_key(self, key: str) -> str:
+        for normalizer in self.normalizers:
+            key = normalizer.normalize(key)
+        return key
+
+    def _remap(self, recorded_key: str, current_key: str, text: str) -> str:
+        """
+        Подменяет в записанном ответе изменчивые значения на текущие.
+        Сопоставление запоминается на всю кассету: UUID из тела POST подменяется и в последующих ответах,
+        в запросах которых его нет (GET по ID, чтение строки из БД).
+        """
+        for normalizer in self.normalizers:
+            aliases = self._aliases[normalizer.name]
+            for recorded, current in zip(normalizer.tokens(recorded_key), normalizer.tokens(current_key)):
+                if recorded != current:
+                    aliases[recorded] = current
+            if aliases:
+                text = normalizer.remap(text, aliases)
+        return text
+
+    def play(self, request: dict[str, Any]) -> Response:
+        """Отдает записанный ответ на запрос, подменяя в нем изменчивые значения на текущие."""
+        current_key = self._request_key(request)
+        queue = self._queues.get(self._match_key(current_key))
+        if not queue:
+            method = request["method"].upper()
+            raise CassetteMissError(f"В кассете {self.path} нет записи для {method} {request['path']}")
+        interaction = queue.popleft()
+
+        recorded_key = self._request_key(interaction["request"])
+        text = self._remap(recorded_key, current_key, interaction["response"]["text"])
+        response = build_response(interaction["response"], request["path"])
+        response._content = text.encode("utf-8")
+        return response
+
+    def call(self, name: str, args: list[Any], function: Callable[[], Any]) -> Any:
+        """
+        Вызов вне HTTP (запрос DBClient) с JSON-совместимыми аргументами и результатом.
+        В режиме record выполняет function и запоминает результат, в режиме replay отдает записанный.
+        Списки строк в результате возвращаются списками кортежей, как их отдает курсор.
+        """
+        call = {"name": name, "args": json.loads(json.dumps(args, default=str))}
+        current_key = self._call_key(call)
+        if self.mode == "record":
+            result = function()
+            self.interactions.append({"call": call, "result": json.loads(json.dumps(result, default=str))})
+            return result
+
+        queue = self._queues.get(self._match_key(current_key))
+        if not queue:
+            raise CassetteMissError(f"В кассете {self.path} нет записи для вызова {name}")
+        interaction = queue.popleft()
+        text = json.dumps(interaction["result"], ensure_ascii=False)
+        result = json.loads(self._remap(self._call_key(interaction["call"]), current_key, text))
+        if isinstance(result, list):
+            result = [tuple(row) if isinstance(row, list) else row for row in result]
+        return result
+
+    def record(self, request: dict[str, Any], response: Response) -> None:
+        """Запоминает взаимодействие вместе со временем ответа."""
+        self.interactions.append(
+            {
+                "request": request,
+                "response": {
+                    "status": response.status_code,
+                    "headers": {
+                        name: value for name, value in response.headers.items() if name.lower() not in SKIPPED_HEADERS
+                    },
+                    "text": response.text,
+                },
+                "elapsed_ms": round(response.elapsed.total_seconds() * 1000, 2),
+            }
+        )
+
+    def save(self) -> None:
+        """Сохраняет записанные взаимодействия на диск."""
+        if self.mode != "record":
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"interactions": self.interactions}
+        self.path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
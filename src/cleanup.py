@@ -0,0 +1,51 @@
+import threading
+
+from src.db_client import DBClient
+
+
+class DeferredCleanup:
+    def __init__(self, db_client: DBClient, interval: float) -> None:
+        """
+        Очередь отложенного удаления постов на всю сессию.
+        Фоновый поток раз в interval секунд удаляет накопленные ID одним вызовом delete_posts,
+        чтобы teardown тестов не ждал запросов к БД.
+        """
+        self.db_client = db_client
+        self.interval = interval
+        self._pending: list[int] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="deferred-cleanup", daemon=True)
+        self._thread.start()
+
+    def submit(self, post_ids: list[int]) -> None:
+        """Ставит посты в очередь на удаление."""
+        with self._lock:
+            self._pending.extend(post_ids)
+
+    def flush(self) -> None:
+        """Удаляет все накопленные посты. При ошибке возвращает их в очередь."""
+        with self._lock:
+            post_ids, self._pending = self._pending, []
+        if not post_ids:
+            return
+        try:
+            self.db_client.delete_posts(post_ids)
+        except BaseException:
+            with self._lock:
+                self._pending.extend(post_ids)
+            raise
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                # ID остались в очереди, повторим на следующей итерации или в close()
+                continue
+
+    def close(self) -> None:
+        """Останавливает фоновый поток и дочищает остаток очереди."""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
@@ -0,0 +1,246 @@
+"""
+Сверка постов между REST API и таблицей wp_posts без построчного сравнения.
+
+Пространство ID делится на диапазоны. Для диапазона считается дайджест (число постов и сумма CRC32 их колонок):
+в БД — одним агрегатным запросом, в API — по потоку GET /wp/v2/posts с _fields и context=edit.
+Совпавшие диапазоны дальше не проверяются, несовпавшие делятся на fanout частей (как в дереве Меркла),
+пока не дойдет до листьев из leaf_size ID. Только их посты запрашиваются целиком, чтобы найти расхождение.
+
+Пример:
+    python -m src.consistency --status publish,draft --leaf-size 100 --fanout 16 --workers 8
+"""
+
+import argparse
+import bisect
+import sys
+import tempfile
+import time
+import zlib
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import accumulate
+from pathlib import Path
+
+from config import Config
+from src.api_client import APIClient
+from src.db_client import DBClient
+from src.models import Post, decode
+from src.timing import carry_context
+from src.wp_standin import STANDIN_URL, start_standin
+
+# Разделитель колонок в строке, от которой считается CRC32; в заголовках и тексте постов не встречается
+SEPARATOR = "\x1f"
+DEFAULT_STATUSES = ("publish", "future", "draft", "pending", "private")
+API_FIELDS = ["id", "title", "content", "status"]
+
+
+def post_checksum(post: Post) -> int:
+    """CRC32 поста, совпадающий с CRC32(CONCAT_WS(SEPARATOR, <POST_COLUMNS>)) в БД."""
+    values = (post.id, post.title, post.content, post.status)
+    return zlib.crc32(SEPARATOR.join(str(value) for value in values if value is not None).encode("utf-8"))
+
+
+@dataclass
+class Mismatch:
+    post_id: int
+    api: Post | None
+    db: Post | None
+
+    def describe(self) -> str:
+        if self.api is None:
+            return f"пост {self.post_id}: есть в БД, нет в API"
+        if self.db is None:
+            return f"пост {self.post_id}: есть в API, нет в БД"
+        diffs = [
+            f"{name}: API {getattr(self.api, name)!r}, БД {getattr(self.db, name)!r}"
+            for name in ("title", "content", "status")
+            if getattr(self.api, name) != getattr(self.db, name)
+        ]
+        return f"пост {self.post_id}: " + "; ".join(diffs)
+
+
+@dataclass
+class ConsistencyReport:
+    api_posts: int = 0
+    ranges_compared: int = 0
+    leaves_fetched: int = 0
+    duration: float = 0.0
+    mismatches: list[Mismatch] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+    def format(self, limit: int = 50) -> str:
+        lines = [
+            f"Постов в API: {self.api_posts}, сравнено диапазонов: {self.ranges_compared}, "
+            f"листьев запрошено целиком: {self.leaves_fetched}, время: {self.duration:.1f} с",
+            f"Расхождений: {len(self.mismatches)}",
+        ]
+        lines.extend(mismatch.describe() for mismatch in self.mismatches[:limit])
+        if len(self.mismatches) > limit:
+            lines.append(f"... и еще {len(self.mismatches) - limit}")
+        return "\n".join(lines)
+
+
+class LeafDigests:
+    def __init__(self, leaf_size: int, posts: Iterable[Post]) -> None:
+        """
+        Дайджесты API по листьям: лист k — ID от k * leaf_size до (k + 1) * leaf_size - 1.
+        Дайджест любого диапазона листьев берется из префиксных сумм за O(log n).
+        """
+        digests: dict[int, tuple[int, int]] = {}
+        for post in posts:
+            count, checksum = digests.get(post.id // leaf_size, (0, 0))
+            digests[post.id // leaf_size] = (count + 1, checksum + post_checksum(post))
+        self.leaves = sorted(digests)
+        self._counts = [0, *accumulate(digests[leaf][0] for leaf in self.leaves)]
+        self._checksums = [0, *accumulate(digests[leaf][1] for leaf in self.leaves)]
+
+    @property
+    def total(self) -> int:
+        return self._counts[-1]
+
+    def digest(self, first_leaf: int, end_leaf: int) -> tuple[int, int]:
+        """Дайджест листьев first_leaf..end_leaf - 1."""
+        start = bisect.bisect_left(self.leaves, first_leaf)
+        end = bisect.bisect_left(self.leaves, end_leaf)
+        return self._counts[end] - self._counts[start], self._checksums[end] - self._checksums[start]
+
+
+class ConsistencyChecker:
+    def __init__(
+        self,
+        api_client: APIClient,
+        db_client: DBClient,
+        statuses: Sequence[str] = DEFAULT_STATUSES,
+        leaf_size: int = 100,
+        fanout: int = 16,
+        workers: int = 8,
+    ) -> None:
+        """
+        Сверяет посты с указанными статусами в API и в БД.
+        leaf_size — ширина листа в ID; лист с расхождением запрашивается из API одной страницей через include,
+        поэтому он не больше 100 (ограничение WordPress на per_page).
+        Агрегатные запросы к БД и запросы листьев выполняются параллельно в workers потоках.
+        """
+        if not 1 <= leaf_size <= 100:
+            raise ValueError("leaf_size должен быть от 1 до 100 (ограничение WordPress на per_page)")
+        if fanout < 2:
+            raise ValueError("fanout должен быть не меньше 2")
+        self.api_client = api_client
+        self.db_client = db_client
+        self.statuses = tuple(statuses)
+        self.leaf_size = leaf_size
+        self.fanout = fanout
+        self.workers = workers
+
+    def _db_digest(self, node: tuple[int, int]) -> tuple[int, int]:
+        first_leaf, end_leaf = node
+        low, high = first_leaf * self.leaf_size, end_leaf * self.leaf_size - 1
+        return self.db_client.posts_digest(low, high, self.statuses, SEPARATOR)
+
+    def _split(self, node: tuple[int, int]) -> list[tuple[int, int]]:
+        first_leaf, end_leaf = node
+        step = -(-(end_leaf - first_leaf) // self.fanout)
+        return [(start, min(start + step, end_leaf)) for start in range(first_leaf, end_leaf, step)]
+
+    def _diff_leaf(self, leaf: int) -> list[Mismatch]:
+        low = leaf * self.leaf_size
+        params = {
+            "include": ",".join(str(post_id) for post_id in range(low, low + self.leaf_size)),
+            "per_page": self.leaf_size,
+            "status": ",".join(self.statuses),
+            "context": "edit",
+            "_fields": ",".join(API_FIELDS),
+        }
+        response = self.api_client.list_posts(params)
+        response.raise_for_status()
+        api_posts = {post.id: post for post in map(Post.from_api, decode(response))}
+        db_rows = self.db_client.get_posts_in_range(low, low + self.leaf_size - 1, self.statuses)
+        db_posts = {post.id: post for post in db_rows}
+        return [
+            Mismatch(post_id, api_posts.get(post_id), db_posts.get(post_id))
+            for post_id in sorted(api_posts.keys() | db_posts.keys())
+            if api_posts.get(post_id) != db_posts.get(post_id)
+        ]
+
+    def run(self) -> ConsistencyReport:
+        """Сверяет все посты и возвращает отчет со всеми найденными расхождениями."""
+        started = time.perf_counter()
+        report = ConsistencyReport()
+        stream = self.api_client.iter_posts(
+            {"status": ",".join(self.statuses), "context": "edit"}, prefetch=self.workers, fields=API_FIELDS
+        )
+        api = LeafDigests(self.leaf_size, map(Post.from_api, stream))
+        report.api_posts = api.total
+
+        bounds = api.leaves[:1] + api.leaves[-1:]
+        db_bounds = self.db_client.post_id_bounds(self.statuses)
+        if db_bounds is not None:
+            bounds.extend(post_id // self.leaf_size for post_id in db_bounds)
+        if not bounds:
+            report.duration = time.perf_counter() - started
+            return report
+
+        frontier = [(min(bounds), max(bounds) + 1)]
+        mismatched_leaves: list[int] = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="consistency") as executor:
+            while frontier:
+                next_frontier = []
+                for node, db_digest in zip(frontier, executor.map(self._db_digest, frontier)):
+                    report.ranges_compared += 1
+                    if db_digest == api.digest(*node):
+                        continue
+                    if node[1] - node[0] == 1:
+                        mismatched_leaves.append(node[0])
+                    else:
+                        next_frontier.extend(self._split(node))
+                frontier = next_frontier
+
+            report.leaves_fetched = len(mismatched_leaves)
+            # Листья запрашиваются через API из потоков пула: замеры запросов остаются за вызвавшим тестом
+            for mismatches in executor.map(carry_context(self._diff_leaf), sorted(mismatched_leaves)):
+                report.mismatches.extend(mismatches)
+        report.duration = time.perf_counter() - started
+        return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", default=",".join(DEFAULT_STATUSES), help="статусы постов через запятую")
+    parser.add_argument("--leaf-size", type=int, default=100, help="ширина листа в ID, не больше 100")
+    parser.add_argument("--fanout", type=int, default=16, help="на сколько частей делится несовпавший диапазон")
+    parser.add_argument("--workers", type=int, default=8, help="параллельных запросов к БД и API")
+    args = parser.parse_args()
+
+    server = None
+    if Config.BASE_URL == STANDIN_URL:
+        Config.DB_DRIVER = "sqlite"
+        Config.DB_NAME = Config.DB_NAME or str(Path(tempfile.mkdtemp()) / "wp.sqlite")
+        server = start_standin(Config.DB_NAME, user=Config.API_USER, password=Config.API_PASSWORD)
+        Config.BASE_URL = server.base_url
+
+    api_client, db_client = APIClient(), DBClient()
+    checker = ConsistencyChecker(
+        api_client,
+        db_client,
+        statuses=[status for status in args.status.split(",") if status],
+        leaf_size=args.leaf_size,
+        fanout=args.fanout,
+        workers=args.workers,
+    )
+    try:
+        report = checker.run()
+    finally:
+        db_client.close()
+        api_client.session.close()
+        if server is not None:
+            server.shutdown()
+    print(report.format())
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
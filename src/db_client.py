@@ -1,66 +1,305 @@
 import re
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from datetime import datetime
-from typing import Any
-
-import mysql.connector
+from functools import wraps
+from typing import TYPE_CHECKING, Any
 
 from config import Config
+from src import sqlite_driver
+from src.db_expectations import PostExpectation
+from src.db_pool import ConnectionPool
+from src.db_profiler import QueryProfiler
+from src.models import POST_COLUMNS, Post
+from src.reporting import step
+from src.sharding import current_shard
+
+if TYPE_CHECKING:
+    from src.cassette import Cassette
+
+
+def resolve_use_pure(driver: str) -> bool:
+    """
+    Переводит режим драйвера из Config.DB_DRIVER в значение use_pure для mysql.connector.
+    auto — C-расширение, если оно установлено, иначе чистый Python.
+    Режим sqlite (локальная заглушка вместо MySQL) обрабатывается в DBClient отдельно.
+    """
+    import mysql.connector
+
+    if driver == "pure":
+        return True
+    if driver == "c":
+        if not mysql.connector.HAVE_CEXT:
+            raise ValueError("DB_DRIVER=c, но C-расширение mysql-connector недоступно")
+        return False
+    if driver == "auto":
+        return not mysql.connector.HAVE_CEXT
+    raise ValueError(f"Неизвестный DB_DRIVER: '{driver}'. Допустимые значения: auto, c, pure, sqlite")
+
+
+INSERT_POSTS_QUERY = """
+    INSERT INTO wp_posts 
+    (post_author, post_date, post_date_gmt, post_content, post_title, 
+     post_excerpt, post_status, comment_status, ping_status, post_password, 
+     post_name, to_ping, pinged, post_modified, post_modified_gmt, 
+     post_content_filtered, post_parent, guid, menu_order, post_type, 
+     post_mime_type, comment_count)
+    VALUES 
+"""
+POST_VALUES_PLACEHOLDER = (
+    "(%s, %s, %s, %s, %s, '', %s, 'open', 'open', '', %s, '', '', %s, %s, '', 0, '', 0, 'post', '', 0)"
+)
+
+
+def placeholders(values: Sequence[Any]) -> str:
+    """Строит список плейсхолдеров %s для условия IN (...)."""
+    return ", ".join(["%s"] * len(values))
+
+
+def make_post_name(post_title: str) -> str:
+    """Строит slug (post_name) из заголовка поста."""
+    if not post_title:
+        return ""
+    post_name = re.sub(r"[^\w\s-]", "", post_title.lower())
+    return re.sub(r"[-\s]+", "-", post_name).strip("-")
+
+
+def post_row_params(
+    post_title: str, post_content: str, post_status: str = "publish", post_author: int = 1, *, now: datetime
+) -> tuple[Any, ...]:
+    """Значения для одной строки POST_VALUES_PLACEHOLDER."""
+    post_name = make_post_name(post_title)
+    return (post_author, now, now, post_content, post_title, post_status, post_name, now, now)
+
+
+def recorded(method: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Пропускает вызов метода DBClient через кассету теста, если она подключена:
+    при записи результат сохраняется, при воспроизведении отдается из кассеты без обращения к БД.
+    Вложенные вызовы (execute_prepared -> execute_query) в кассету не попадают.
+    """
+
+    @wraps(method)
+    def wrapper(self: "DBClient", *args: Any, **kwargs: Any) -> Any:
+        if self.cassette is None or getattr(self._local, "in_cassette", False):
+            return method(self, *args, **kwargs)
+        self._local.in_cassette = True
+        try:
+            return self.cassette.call(method.__name__, [args, kwargs], lambda: method(self, *args, **kwargs))
+        finally:
+            self._local.in_cassette = False
+
+    return wrapper
 
 
 class DBClient:
-    def __init__(self) -> None:
-        """Инициализация подключения с использованием настроек из Config."""
+    def __init__(self, database: str | None = None) -> None:
+        """
+        Инициализация клиента с использованием настроек из Config.
+        Соединения берутся из пула, который открывается при первом запросе.
+        По умолчанию клиент работает со схемой текущего воркера xdist, если включено шардирование.
+        """
+        Config.validate("db")
         self.host: str = Config.DB_HOST
         self.port: int = Config.DB_PORT
         self.user: str = Config.DB_USER
         self.password: str = Config.DB_PASSWORD
-        self.database: str = Config.DB_NAME
-        self.connection: mysql.connector.MySQLConnection | None = None
-
-    def connect(self) -> None:
-        """Создает соединение с базой данных."""
-        if self.connection is None or not self.connection.is_connected():
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                use_pure=True,
-            )
+        self.database: str = database or current_shard() or Config.DB_NAME
+        self.driver: str = Config.DB_DRIVER
+        # None — определить по DB_DRIVER при подключении, чтобы не импортировать драйвер раньше времени
+        self.use_pure: bool | None = None
+        self.prepared_statements: bool = Config.DB_PREPARED_STATEMENTS
+        self.pool: ConnectionPool | None = None
+        self.profiler: QueryProfiler | None = None
+        # Кассета текущего теста: запросы пишутся в нее или отдаются из нее (WP_API_CASSETTE_MODE)
+        self.cassette: "Cassette | None" = None
+        self._local = threading.local()
+
+    def connect(self) -> ConnectionPool:
+        """Создает пул соединений с базой данных, если он еще не создан."""
+        if self.pool is None:
+            if self.driver == "sqlite":
+                self.pool = ConnectionPool(
+                    size=Config.DB_POOL_SIZE,
+                    idle_timeout=Config.DB_POOL_IDLE_PING,
+                    connect=sqlite_driver.connect,
+                    database=self.database,
+                )
+            else:
+                self.pool = ConnectionPool(
+                    size=Config.DB_POOL_SIZE,
+                    idle_timeout=Config.DB_POOL_IDLE_PING,
+                    host=self.host,
+                    port=self.port,
+                    user=self.user,
+                    password=self.password,
+                    database=self.database,
+                    use_pure=resolve_use_pure(self.driver) if self.use_pure is None else self.use_pure,
+                )
+        return self.pool
+
+    def _connection(self) -> AbstractContextManager[Any]:
+        """
+        Берет соединение из пула на время блока with.
+        Внутри rollback_scope отдает закрепленное за потоком соединение с открытой транзакцией.
+        """
+        pinned = getattr(self._local, "connection", None)
+        if pinned is not None:
+            return nullcontext(pinned)
+        return self.connect().connection(Config.TIMEOUT)
+
+    @property
+    def in_rollback_scope(self) -> bool:
+        """Находится ли текущий поток внутри rollback_scope."""
+        return getattr(self._local, "connection", None) is not None
+
+    @contextmanager
+    def rollback_scope(self) -> Iterator[None]:
+        """
+        Выполняет все запросы клиента из текущего потока в одной транзакции,
+        которая откатывается на выходе из блока. Данные внутри блока видит только этот клиент.
+        """
+        if self.in_rollback_scope:
+            raise RuntimeError("rollback_scope уже открыт в этом потоке")
+
+        with self.connect().connection(Config.TIMEOUT) as connection:
+            connection.start_transaction()
+            self._local.connection = connection
+            try:
+                yield
+            finally:
+                self._local.connection = None
+                connection.rollback()
+
+    @contextmanager
+    def _atomic(self, connection: Any, cursor: Any) -> Iterator[None]:
+        """
+        Выполняет блок атомарно: в отдельной транзакции
+        или, если транзакция уже открыта (rollback_scope), в savepoint.
+        """
+        if connection.in_transaction:
+            cursor.execute("SAVEPOINT db_client_atomic")
+            try:
+                yield
+            except BaseException:
+                cursor.execute("ROLLBACK TO SAVEPOINT db_client_atomic")
+                raise
+            cursor.execute("RELEASE SAVEPOINT db_client_atomic")
+            return
+
+        connection.start_transaction()
+        try:
+            yield
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+
+    def _execute(self, connection: Any, cursor: Any, query: str, params: tuple[Any, ...] | None = None) -> None:
+        """Выполняет запрос на курсоре; при подключенном профилировщике — через него."""
+        if self.profiler is None:
+            cursor.execute(query, params)
+        else:
+            self.profiler.execute(connection, cursor, query, params)
 
     def close(self) -> None:
-        """Закрывает соединение."""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        """Закрывает все соединения пула."""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
 
-    def execute_query(self, query: str, params: tuple[Any, ...] | None = None) -> list[dict[str, Any]]:
+    @recorded
+    def execute_query(
+        self, query: str, params: tuple[Any, ...] | None = None, dictionary: bool = True
+    ) -> list[dict[str, Any]] | list[tuple[Any, ...]]:
         """
         Выполняет SQL-запрос и возвращает результат (для SELECT).
+        С dictionary=False строки возвращаются кортежами, без словаря на каждую строку.
+        Для запросов без результирующего набора возвращает пустой список.
         """
-        self.connect()
-        with self.connection.cursor(dictionary=True) as cursor:
-            cursor.execute(query, params)
-            return cursor.fetchall()
+        with self._connection() as connection:
+            cursor = self.pool.cursor(connection, dictionary)
+            self._execute(connection, cursor, query, params)
+            return cursor.fetchall() if cursor.with_rows else []
+
+    @recorded
+    def execute_prepared(self, query: str, params: tuple[Any, ...] | None = None) -> list[dict[str, Any]]:
+        """
+        Выполняет запрос через серверный prepared statement.
+        Statement готовится один раз на соединение и дальше исполняется по хэндлу,
+        а курсор переиспользуется без лишнего пинга при создании.
+        Если prepared statements отключены в Config, работает как execute_query.
+        """
+        if not self.prepared_statements:
+            return self.execute_query(query, params)
+
+        with self._connection() as connection:
+            prepared_query, cursor = self.pool.prepared_cursor(connection, query)
+            self._execute(connection, cursor, prepared_query, params)
+            return cursor.fetchall() if cursor.with_rows else []
 
     def get_post_by_id(self, post_id: int) -> dict[str, Any] | None:
         """
         Специализированный метод для получения поста по ID.
         """
         query = "SELECT ID, post_title, post_content, post_status FROM wp_posts WHERE ID = %s"
-        result = self.execute_query(query, (post_id,))
+        result = self.execute_prepared(query, (post_id,))
         return result[0] if result else None
 
+    def get_post(self, post_id: int) -> Post | None:
+        """Получает пост по ID в виде Post (кортежный курсор)."""
+        query = f"SELECT {', '.join(POST_COLUMNS)} FROM wp_posts WHERE ID = %s"
+        rows = self.execute_query(query, (post_id,), dictionary=False)
+        return Post.from_row(rows[0]) if rows else None
+
+    def get_posts(self, post_ids: list[int]) -> list[Post]:
+        """Получает посты по списку ID одним запросом в виде Post, упорядоченные по ID."""
+        if not post_ids:
+            return []
+        query = f"SELECT {', '.join(POST_COLUMNS)} FROM wp_posts WHERE ID IN ({placeholders(post_ids)}) ORDER BY ID"
+        return [Post.from_row(row) for row in self.execute_query(query, tuple(post_ids), dictionary=False)]
+
+    def post_id_bounds(self, statuses: Sequence[str]) -> tuple[int, int] | None:
+        """Минимальный и максимальный ID постов с указанными статусами или None, если таких постов нет."""
+        query = (
+            "SELECT MIN(ID), MAX(ID) FROM wp_posts "
+            f"WHERE post_type = 'post' AND post_status IN ({placeholders(statuses)})"
+        )
+        ((low, high),) = self.execute_query(query, tuple(statuses), dictionary=False)
+        return None if low is None else (low, high)
+
+    def posts_digest(self, low: int, high: int, statuses: Sequence[str], separator: str) -> tuple[int, int]:
+        """
+        Дайджест постов с ID от low до high включительно одним агрегатным запросом:
+        число строк и сумма CRC32 от колонок POST_COLUMNS, склеенных через separator.
+        Тот же дайджест считается на стороне API в src.consistency.
+        """
+        query = (
+            f"SELECT COUNT(*), SUM(CRC32(CONCAT_WS(%s, {', '.join(POST_COLUMNS)}))) FROM wp_posts "
+            f"WHERE ID BETWEEN %s AND %s AND post_type = 'post' AND post_status IN ({placeholders(statuses)})"
+        )
+        ((count, checksum),) = self.execute_query(query, (separator, low, high, *statuses), dictionary=False)
+        return count, int(checksum or 0)
+
+    def get_posts_in_range(self, low: int, high: int, statuses: Sequence[str]) -> list[Post]:
+        """Посты с ID от low до high включительно и указанными статусами, упорядоченные по ID."""
+        query = (
+            f"SELECT {', '.join(POST_COLUMNS)} FROM wp_posts WHERE ID BETWEEN %s AND %s "
+            f"AND post_type = 'post' AND post_status IN ({placeholders(statuses)}) ORDER BY ID"
+        )
+        return [Post.from_row(row) for row in self.execute_query(query, (low, high, *statuses), dictionary=False)]
+
     def post_exists(self, post_id: int) -> bool:
         """Проверяет, существует ли пост (возвращает True/False)."""
         query = "SELECT count(*) as count FROM wp_posts WHERE ID = %s"
-        result = self.execute_query(query, (post_id,))
+        result = self.execute_prepared(query, (post_id,))
         return result[0]["count"] > 0
 
     def post_exists_with_title(self, title: str) -> bool:
         """Проверяет, существует ли пост с указанным заголовком."""
         query = "SELECT count(*) as count FROM wp_posts WHERE post_title = %s"
-        result = self.execute_query(query, (title,))
+        result = self.execute_prepared(query, (title,))
         return result[0]["count"] > 0
 
     def count_posts_by_ids(self, id_list: list[int]) -> int:
@@ -70,21 +309,96 @@ class DBClient:
         if not id_list:
             return 0
 
-        placeholders = ", ".join(["%s"] * len(id_list))
-        query = f"SELECT count(*) as count FROM wp_posts WHERE ID IN ({placeholders})"
+        query = f"SELECT count(*) as count FROM wp_posts WHERE ID IN ({placeholders(id_list)})"
 
         result = self.execute_query(query, tuple(id_list))
         return result[0]["count"]
 
+    def _expectations(self) -> list[PostExpectation]:
+        if not hasattr(self._local, "expectations"):
+            self._local.expectations = []
+        return self._local.expectations
+
+    def expect(self, post_id: int) -> PostExpectation:
+        """
+        Ставит в очередь проверку поста и возвращает ее для цепочки ожиданий:
+        db_client.expect(post_id).title("...").status("publish").
+        Проверки выполняются в flush_expectations.
+        """
+        expectation = PostExpectation(post_id)
+        self._expectations().append(expectation)
+        return expectation
+
+    def expect_absent(self, post_id: int) -> None:
+        """Ставит в очередь проверку того, что поста нет в БД."""
+        self._expectations().append(PostExpectation(post_id, absent=True))
+
+    def flush_expectations(self) -> None:
+        """
+        Сверяет все проверки из очереди текущего потока одним SELECT ... WHERE ID IN (...) и очищает очередь.
+        Если хоть одна проверка не прошла, падает с AssertionError, где перечислены расхождения по каждому посту.
+        """
+        expectations, self._local.expectations = self._expectations(), []
+        if not expectations:
+            return
+
+        columns = sorted({"ID", *(name for expectation in expectations for name in expectation.columns)})
+        post_ids = sorted({expectation.post_id for expectation in expectations})
+        with step(f"Проверить {len(post_ids)} пост(ов) в БД одним запросом"):
+            query = f"SELECT {', '.join(columns)} FROM wp_posts WHERE ID IN ({placeholders(post_ids)})"
+            rows = {row["ID"]: row for row in self.execute_query(query, tuple(post_ids))}
+
+            failures = [
+                f"  пост {expectation.post_id}: {problem}"
+                for expectation in expectations
+                for problem in expectation.diff(rows.get(expectation.post_id))
+            ]
+            if failures:
+                raise AssertionError("Проверки постов в БД не прошли:\n" + "\n".join(failures))
+
+    def clear_expectations(self) -> None:
+        """Отбрасывает несверенные проверки текущего потока (например, если тест уже упал)."""
+        self._local.expectations = []
+
+    @contextmanager
+    def verify(self, title: str) -> Iterator[None]:
+        """Шаг allure, в конце которого сверяются проверки, поставленные в очередь внутри блока."""
+        with step(title):
+            yield
+            self.flush_expectations()
+
     def delete_post(self, post_id: int) -> None:
         """
         Удаляет пост из базы данных по ID.
         """
-        self.connect()
-        with self.connection.cursor() as cursor:
-            cursor.execute("DELETE FROM wp_posts WHERE ID = %s", (post_id,))
-            self.connection.commit()
+        self.execute_prepared("DELETE FROM wp_posts WHERE ID = %s", (post_id,))
+
+    def delete_posts(self, post_ids: list[int]) -> None:
+        """
+        Удаляет посты вместе с их ревизиями, метаданными и связями с терминами.
+        Все удаления выполняются множественными запросами WHERE ... IN (...) в одной транзакции.
+        """
+        if not post_ids:
+            return
+
+        with self._connection() as connection:
+            cursor = self.pool.cursor(connection)
+            with self._atomic(connection, cursor):
+                revisions_query = (
+                    "SELECT ID FROM wp_posts WHERE post_type = 'revision' "
+                    f"AND post_parent IN ({placeholders(post_ids)})"
+                )
+                self._execute(connection, cursor, revisions_query, tuple(post_ids))
+                ids = tuple(post_ids) + tuple(row[0] for row in cursor.fetchall())
+                id_placeholders = placeholders(ids)
 
+                self._execute(connection, cursor, f"DELETE FROM wp_postmeta WHERE post_id IN ({id_placeholders})", ids)
+                self._execute(
+                    connection, cursor, f"DELETE FROM wp_term_relationships WHERE object_id IN ({id_placeholders})", ids
+                )
+                self._execute(connection, cursor, f"DELETE FROM wp_posts WHERE ID IN ({id_placeholders})", ids)
+
+    @recorded
     def create_post_via_sql(
         self, post_title: str, post_content: str, post_status: str = "publish", post_author: int = 1
     ) -> int:
@@ -92,28 +406,42 @@ class DBClient:
         Создает пост через SQL INSERT и возвращает ID созданного поста.
         """
 
-        self.connect()
-        with self.connection.cursor() as cursor:
-            now = datetime.now()
-            if post_title:
-                post_name = re.sub(r"[^\w\s-]", "", post_title.lower())
-                post_name = re.sub(r"[-\s]+", "-", post_name).strip("-")
-            else:
-                post_name = ""
+        now = datetime.now()
+        query = INSERT_POSTS_QUERY + POST_VALUES_PLACEHOLDER
+        params = post_row_params(post_title, post_content, post_status, post_author, now=now)
+
+        with self._connection() as connection:
+            cursor = self.pool.cursor(connection)
+            self._execute(connection, cursor, query, params)
+            return cursor.lastrowid
 
-            query = """
-                INSERT INTO wp_posts 
-                (post_author, post_date, post_date_gmt, post_content, post_title, 
-                 post_excerpt, post_status, comment_status, ping_status, post_password, 
-                 post_name, to_ping, pinged, post_modified, post_modified_gmt, 
-                 post_content_filtered, post_parent, guid, menu_order, post_type, 
-                 post_mime_type, comment_count)
-                VALUES 
-                (%s, %s, %s, %s, %s, '', %s, 'open', 'open', '', %s, '', '', %s, %s, '', 0, '', 0, 'post', '', 0)
-            """
+    @recorded
+    def create_posts_via_sql(self, rows: list[dict[str, Any]], chunk_size: int = 500) -> list[int]:
+        """
+        Создает посты пачкой через многострочные INSERT и возвращает их ID в порядке rows.
+        Каждая строка — словарь с аргументами create_post_via_sql.
+        Одна пачка из chunk_size строк — один запрос и один коммит.
+        ID берутся из непрерывного диапазона auto-increment, выданного на INSERT.
+        """
+        if not rows:
+            return []
 
-            params = (post_author, now, now, post_content, post_title, post_status, post_name, now, now)
+        now = datetime.now()
+        post_ids: list[int] = []
+        with self._connection() as connection:
+            cursor = self.pool.cursor(connection)
+            self._execute(connection, cursor, "SELECT @@auto_increment_increment")
+            # Результат дочитывается целиком: курсор закэширован и переживет этот вызов
+            (increment,) = cursor.fetchall()[0]
 
-            cursor.execute(query, params)
-            self.connection.commit()
-            return cursor.lastrowid
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start : start + chunk_size]
+                query = INSERT_POSTS_QUERY + ", ".join([POST_VALUES_PLACEHOLDER] * len(chunk))
+                params = tuple(value for row in chunk for value in post_row_params(now=now, **row))
+                self._execute(connection, cursor, query, params)
+                if cursor.rowcount != len(chunk):
+                    raise RuntimeError(f"Ожидалась вставка {len(chunk)} строк, вставлено {cursor.rowcount}")
+                # Для многострочного INSERT lastrowid — это ID первой вставленной строки
+                first_id = cursor.lastrowid
+                post_ids.extend(range(first_id, first_id + len(chunk) * increment, increment))
+        return post_ids
@@ -0,0 +1,43 @@
+import re
+from typing import Any
+
+COLUMN_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class PostExpectation:
+    def __init__(self, post_id: int, absent: bool = False) -> None:
+        """
+        Отложенная проверка одного поста в wp_posts.
+        Ожидаемые значения колонок накапливаются цепочкой вызовов и сверяются в DBClient.flush_expectations.
+        """
+        self.post_id = post_id
+        self.absent = absent
+        self.columns: dict[str, Any] = {}
+
+    def column(self, name: str, value: Any) -> "PostExpectation":
+        """Ожидает значение value в колонке name."""
+        if not COLUMN_NAME.match(name):
+            raise ValueError(f"Недопустимое имя колонки: '{name}'")
+        self.columns[name] = value
+        return self
+
+    def title(self, value: str) -> "PostExpectation":
+        return self.column("post_title", value)
+
+    def content(self, value: str) -> "PostExpectation":
+        return self.column("post_content", value)
+
+    def status(self, value: str) -> "PostExpectation":
+        return self.column("post_status", value)
+
+    def diff(self, row: dict[str, Any] | None) -> list[str]:
+        """Расхождения с найденной строкой (None — поста нет в БД)."""
+        if self.absent:
+            return [] if row is None else ["найден в БД, хотя должен отсутствовать"]
+        if row is None:
+            return ["не найден в БД"]
+        return [
+            f"{name}: ожидалось {expected!r}, в БД {row[name]!r}"
+            for name, expected in self.columns.items()
+            if row[name] != expected
+        ]
@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import partial
+from typing import Any
+
+
+class PoolExhaustedError(TimeoutError):
+    """Все соединения пула заняты, и ни одно не освободилось за отведенное время."""
+
+
+class ConnectionPool:
+    def __init__(
+        self, size: int, idle_timeout: float, connect: Callable[..., Any] | None = None, **connect_kwargs: Any
+    ) -> None:
+        """
+        Пул соединений с MySQL.
+        В отличие от mysql.connector.pooling не пингует сервер при каждой выдаче соединения:
+        проверка делается только если соединение простаивало дольше idle_timeout секунд
+        или на нем в прошлый раз случилась ошибка.
+        connect позволяет подменить драйвер (по умолчанию mysql.connector.connect с автокоммитом,
+        сам mysql.connector импортируется только тогда).
+        """
+        self.size = size
+        self.idle_timeout = idle_timeout
+        # Ошибки драйвера, после которых соединение проверяется перед повторной выдачей
+        self.driver_errors: tuple[type[Exception], ...] = ()
+        if connect is None:
+            import mysql.connector
+
+            connect = partial(mysql.connector.connect, autocommit=True)
+            self.driver_errors = (mysql.connector.Error,)
+        self.connect = connect
+        self.connect_kwargs = connect_kwargs
+        self._idle: queue.LifoQueue[tuple[Any, float]] = queue.LifoQueue()
+        self._statements: dict[int, dict[str, tuple[str, Any]]] = {}
+        self._cursors: dict[int, dict[bool, Any]] = {}
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> Any:
+        return self.connect(**self.connect_kwargs)
+
+    def acquire(self, timeout: float | None = None) -> Any:
+        """
+        Выдает соединение из пула, при необходимости открывая новое.
+        Если пул исчерпан, ждет освобождения соединения не дольше timeout секунд, затем бросает PoolExhaustedError.
+        """
+        try:
+            connection, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._created < self.size
+                if can_open:
+                    self._created += 1
+            if can_open:
+                try:
+                    return self._open()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                connection, last_used = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise PoolExhaustedError(
+                    f"Все {self.size} соединений пула (DB_POOL_SIZE) заняты дольше {timeout} с"
+                ) from None
+
+        if time.monotonic() - last_used > self.idle_timeout:
+            try:
+                connection.ping()
+            except self.driver_errors:
+                self._forget(connection)
+                try:
+                    connection.reconnect()
+                except Exception:
+                    # Соединение не вернется в пул, поэтому его место освобождается для нового
+                    self._discard(connection)
+                    raise
+        return connection
+
+    def _forget(self, connection: Any) -> None:
+        """Сбрасывает курсоры соединения: после переподключения или закрытия они недействительны."""
+        self._statements.pop(id(connection), None)
+        self._cursors.pop(id(connection), None)
+
+    def _discard(self, connection: Any) -> None:
+        with self._lock:
+            self._created -= 1
+        self._forget(connection)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def cursor(self, connection: Any, dictionary: bool = False) -> Any:
+        """
+        Возвращает закэшированный для соединения обычный курсор.
+        mysql.connector проверяет соединение через is_connected (пинг сервера) при каждом connection.cursor(),
+        поэтому курсор создается один раз на соединение и не закрывается после запроса.
+        """
+        cursors = self._cursors.setdefault(id(connection), {})
+        cursor = cursors.get(dictionary)
+        if cursor is None:
+            cursor = cursors[dictionary] = connection.cursor(dictionary=dictionary)
+        return cursor
+
+    def prepared_cursor(self, connection: Any, query: str) -> tuple[str, Any]:
+        """
+        Возвращает закэшированный для соединения курсор с prepared statement под текст query.
+        Вместе с курсором отдается та же строка запроса, с которой он был подготовлен:
+        mysql.connector сравнивает запросы по идентичности и иначе подготовит statement заново.
+        """
+        statements = self._statements.setdefault(id(connection), {})
+        cached = statements.get(query)
+        if cached is None:
+            cached = (query, connection.cursor(prepared=True, dictionary=True))
+            statements[query] = cached
+        return cached
+
+    def release(self, connection: Any, healthy: bool = True) -> None:
+        """
+        Возвращает соединение в пул.
+        Соединение после ошибки будет проверено при следующей выдаче, а его курсоры создаются заново.
+        """
+        if not healthy:
+            self._forget(connection)
+        self._idle.put((connection, time.monotonic() if healthy else 0.0))
+
+    @contextmanager
+    def connection(self, timeout: float | None = None) -> Iterator[Any]:
+        """Выдает соединение на время блока with и возвращает его в пул."""
+        connection = self.acquire(timeout)
+        healthy = True
+        try:
+            yield connection
+        except self.driver_errors:
+            healthy = False
+            raise
+        finally:
+            self.release(connection, healthy)
+
+    def close(self) -> None:
+        """Закрывает все простаивающие соединения пула."""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+            self._forget(connection)
+            connection.close()
@@ -0,0 +1,168 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+from src.histogram import LatencyHistogram
+from src.sqlite_driver import SQLiteConnection
+
+EXPLAINABLE = re.compile(r"^\s*(SELECT|DELETE|UPDATE)\b(?!\s+@@)", re.IGNORECASE)
+
+
+def fingerprint(query: str) -> str:
+    """
+    Нормализует SQL в отпечаток: литералы и плейсхолдеры заменяются на ?,
+    списки IN (...) и строки многострочного VALUES схлопываются, пробелы сжимаются.
+    Запросы, которые отличаются только параметрами, получают один отпечаток.
+    """
+    text = re.sub(r"'(?:[^'\\]|\\.|'')*'", "?", query)
+    text = re.sub(r"%s|\b\d+(?:\.\d+)?\b", "?", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    text = re.sub(r"\bIN \((?:\?, )*\?\)", "IN (?+)", text, flags=re.IGNORECASE)
+    text = re.sub(r"(\([^()]*\))(?:, \([^()]*\))+", r"\1+", text)
+    return text
+
+
+class QueryStats:
+    def __init__(self, sample: str) -> None:
+        """Статистика одного отпечатка: число выполнений, гистограмма времени и план запроса."""
+        self.sample = sample
+        self.histogram = LatencyHistogram()
+        self.explain: list[dict[str, Any]] | str | None = None
+        self.full_scan: list[str] = []
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "sample": self.sample,
+            "histogram": self.histogram.to_dict(),
+            "explain": self.explain,
+            "full_scan": self.full_scan,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "QueryStats":
+        stats = cls(data["sample"])
+        stats.histogram = LatencyHistogram.from_dict(data["histogram"])
+        stats.explain = data["explain"]
+        stats.full_scan = data["full_scan"]
+        return stats
+
+
+class QueryProfiler:
+    def __init__(self, repeat_threshold: int = 5) -> None:
+        """
+        Профилировщик запросов DBClient: время каждого запроса по отпечаткам,
+        EXPLAIN для каждого нового отпечатка, число выполнений по тестам.
+        Отпечаток, выполненный в одном тесте repeat_threshold раз и больше, считается N+1.
+        """
+        self.repeat_threshold = repeat_threshold
+        self.queries: dict[str, QueryStats] = {}
+        self.tests: dict[str, Counter[str]] = {}
+        self._current_test: str | None = None
+        self._test_thread: int | None = None
+        self._lock = threading.Lock()
+
+    def start_test(self, nodeid: str) -> None:
+        """Запросы из текущего потока до finish_test засчитываются тесту nodeid."""
+        self._current_test = nodeid
+        self._test_thread = threading.get_ident()
+
+    def finish_test(self) -> None:
+        self._current_test = None
+        self._test_thread = None
+
+    def _explain(self, connection: Any, query: str, params: Any) -> tuple[list[dict[str, Any]] | str, list[str]]:
+        is_sqlite = isinstance(connection, SQLiteConnection)
+        prefix = "EXPLAIN QUERY PLAN " if is_sqlite else "EXPLAIN "
+        if is_sqlite:
+            driver_error = sqlite3.Error
+        else:
+            import mysql.connector
+
+            driver_error = mysql.connector.Error
+        try:
+            with connection.cursor(dictionary=True) as cursor:
+                cursor.execute(prefix + query, params)
+                plan = cursor.fetchall()
+        except driver_error as error:
+            return str(error), []
+
+        if is_sqlite:
+            # SCAN без USING — полный проход по таблице, SEARCH — поиск по индексу
+            scans = [row["detail"] for row in plan if re.match(r"^SCAN \w+$", row["detail"])]
+            return plan, [detail.split()[1] for detail in scans]
+        return plan, [str(row["table"]) for row in plan if row.get("type") == "ALL"]
+
+    def execute(self, connection: Any, cursor: Any, query: str, params: Any = None) -> None:
+        """
+        Выполняет запрос на cursor и записывает его время.
+        EXPLAIN для нового отпечатка выполняется до самого запроса, чтобы не мешать чтению его результата.
+        """
+        key = fingerprint(query)
+        with self._lock:
+            stats = self.queries.get(key)
+            is_new = stats is None
+            if is_new:
+                stats = self.queries[key] = QueryStats(re.sub(r"\s+", " ", query).strip())
+        if is_new and EXPLAINABLE.match(query):
+            stats.explain, stats.full_scan = self._explain(connection, query, params)
+
+        started = time.perf_counter()
+        cursor.execute(query, params)
+        stats.histogram.record((time.perf_counter() - started) * 1_000_000)
+
+        if self._current_test is not None and threading.get_ident() == self._test_thread:
+            with self._lock:
+                self.tests.setdefault(self._current_test, Counter())[key] += 1
+
+    def repeated(self) -> list[dict[str, Any]]:
+        """Отпечатки, повторенные в одном тесте repeat_threshold раз и больше (признак N+1)."""
+        found = [
+            {"test": test, "fingerprint": key, "count": count}
+            for test, counter in self.tests.items()
+            for key, count in counter.items()
+            if count >= self.repeat_threshold
+        ]
+        return sorted(found, key=lambda item: item["count"], reverse=True)
+
+    def merge(self, data: dict[str, Any]) -> None:
+        """Добавляет данные другого профилировщика (to_dict), например воркера xdist."""
+        with self._lock:
+            for key, raw in data["queries"].items():
+                other = QueryStats.from_dict(raw)
+                stats = self.queries.setdefault(key, other)
+                if stats is not other:
+                    stats.histogram.merge(other.histogram)
+            for test, counts in data["tests"].items():
+                self.tests.setdefault(test, Counter()).update(counts)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "queries": {key: stats.to_dict() for key, stats in self.queries.items()},
+            "tests": {test: dict(counter) for test, counter in self.tests.items()},
+        }
+
+    def report(self) -> dict[str, Any]:
+        """Отчет для JSON: отпечатки по убыванию суммарного времени, полные сканы и повторы."""
+        queries = []
+        for key, stats in sorted(self.queries.items(), key=lambda item: item[1].histogram.total, reverse=True):
+            histogram = stats.histogram
+            queries.append(
+                {
+                    "fingerprint": key,
+                    "sample": stats.sample,
+                    "total_ms": round(histogram.total / 1000, 3),
+                    **histogram.summary(),
+                    "full_scan": stats.full_scan,
+                    "explain": stats.explain,
+                }
+            )
+        return {
+            "repeat_threshold": self.repeat_threshold,
+            "queries": queries,
+            "full_scans": [query["fingerprint"] for query in queries if query["full_scan"]],
+            "repeated": self.repeated(),
+            "tests": {test: dict(counter) for test, counter in self.tests.items()},
+        }
@@ -0,0 +1,72 @@
+import json
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from src.db_profiler import QueryProfiler
+
+WORKER_OUTPUT_KEY = "db_profile"
+
+
+class DBProfilerPlugin:
+    def __init__(self, profiler: QueryProfiler, report_path: Path, top: int = 10) -> None:
+        """
+        Pytest-плагин профилировщика запросов: отмечает, какой тест сейчас выполняется,
+        в конце сессии печатает самые дорогие отпечатки, полные сканы и N+1 и сохраняет отчет в report_path.
+        Под xdist воркеры передают свои данные контроллеру, отчет строится по всем воркерам.
+        """
+        self.profiler = profiler
+        self.report_path = report_path
+        self.top = top
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_protocol(self, item: pytest.Item) -> Generator[None, Any, Any]:
+        self.profiler.start_test(item.nodeid)
+        try:
+            return (yield)
+        finally:
+            self.profiler.finish_test()
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node: Any, error: Any) -> None:
+        """Контроллер xdist: добавляет данные завершившегося воркера."""
+        data = getattr(node, "workeroutput", {}).get(WORKER_OUTPUT_KEY)
+        if data:
+            self.profiler.merge(data)
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput[WORKER_OUTPUT_KEY] = self.profiler.to_dict()
+        elif self.profiler.queries:
+            self.report_path.parent.mkdir(parents=True, exist_ok=True)
+            report = json.dumps(self.profiler.report(), ensure_ascii=False, indent=2, default=str)
+            self.report_path.write_text(report, encoding="utf-8")
+
+    def pytest_terminal_summary(self, terminalreporter: Any) -> None:
+        if not self.profiler.queries or hasattr(terminalreporter.config, "workeroutput"):
+            return
+        write = terminalreporter.write_line
+        report = self.profiler.report()
+
+        terminalreporter.write_sep("=", f"top {self.top} SQL fingerprints by total time (ms)")
+        write(f"{'count':>7}{'total':>10}{'p95':>9}{'max':>9}  scan  fingerprint")
+        for query in report["queries"][: self.top]:
+            scan = "FULL" if query["full_scan"] else ""
+            write(
+                f"{query['count']:>7}{query['total_ms']:>10.1f}{query['p95_ms']:>9.2f}{query['max_ms']:>9.2f}"
+                f"  {scan:<4}  {query['fingerprint'][:100]}"
+            )
+
+        if report["full_scans"]:
+            terminalreporter.write_sep("-", "full table scans")
+            for key in report["full_scans"]:
+                write(key[:200])
+        if report["repeated"]:
+            threshold = self.profiler.repeat_threshold
+            terminalreporter.write_sep("-", f"repeated queries within a test (>= {threshold}, N+1)")
+            for item in report["repeated"][: self.top]:
+                write(f"{item['count']:>5} x {item['fingerprint'][:120]}  {item['test']}")
+        write(f"DB profile: {self.report_path}")
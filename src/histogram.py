@@ -0,0 +1,108 @@
+import math
+import threading
+from typing import Any
+
+
+class LatencyHistogram:
+    def __init__(self, significant_bits: int = 5) -> None:
+        """
+        Гистограмма задержек в стиле HDR: логарифмические диапазоны (степени двойки),
+        каждый разбит на 2**significant_bits линейных корзин.
+        Относительная погрешность перцентилей не больше 1 / 2**significant_bits, память не зависит от числа замеров.
+        Значения записываются в микросекундах.
+        """
+        self.sub_buckets = 1 << significant_bits
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: int | None = None
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def _index(self, value: int) -> int:
+        if value < self.sub_buckets:
+            return value
+        exponent = value.bit_length() - 1 - int(math.log2(self.sub_buckets))
+        return (exponent + 1) * self.sub_buckets + ((value >> exponent) - self.sub_buckets)
+
+    def _lowest(self, index: int) -> int:
+        if index < self.sub_buckets:
+            return index
+        exponent = index // self.sub_buckets - 1
+        return (self.sub_buckets + index % self.sub_buckets) << exponent
+
+    def _highest(self, index: int) -> int:
+        if index < self.sub_buckets:
+            return index
+        exponent = index // self.sub_buckets - 1
+        return self._lowest(index) + (1 << exponent) - 1
+
+    def record(self, value_us: float) -> None:
+        """Записывает одно значение в микросекундах."""
+        value = max(0, int(value_us))
+        index = self._index(value)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+            self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Добавляет замеры другой гистограммы с той же точностью."""
+        with self._lock:
+            for index, count in other.counts.items():
+                self.counts[index] = self.counts.get(index, 0) + count
+            self.count += other.count
+            self.total += other.total
+            self.max = max(self.max, other.max)
+            if other.min is not None:
+                self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, percent: float) -> int:
+        """Значение перцентиля (верхняя граница корзины, но не больше максимума) в микросекундах."""
+        if not self.count:
+            return 0
+        threshold = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= threshold:
+                return min(self._highest(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> dict[str, Any]:
+        """Сводка в миллисекундах: count, mean, p50, p95, p99, max."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean / 1000, 3),
+            "p50_ms": round(self.percentile(50) / 1000, 3),
+            "p95_ms": round(self.percentile(95) / 1000, 3),
+            "p99_ms": round(self.percentile(99) / 1000, 3),
+            "max_ms": round(self.max / 1000, 3),
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        """Сериализует гистограмму (например, чтобы передать между воркерами xdist)."""
+        return {
+            "sub_buckets": self.sub_buckets,
+            "counts": {str(index): count for index, count in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls(int(math.log2(data["sub_buckets"])))
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
@@ -0,0 +1,213 @@
+import random
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import requests
+from requests import Response
+
+from config import Config
+from src.histogram import LatencyHistogram
+from src.timing import carry_context, endpoint_name
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Автомат разомкнут после серии отказов бэкенда: запрос не отправлялся."""
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, reset_timeout: float) -> None:
+        """
+        Размыкается после threshold отказов подряд (сетевая ошибка или 5xx) и reset_timeout секунд
+        сразу отклоняет запросы. Затем пропускает один пробный запрос: успех замыкает автомат, отказ снова размыкает.
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            # Полуоткрытое состояние: пробный запрос проходит, остальные ждут его результата
+            self.opened_at = time.monotonic()
+            return True
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    def __init__(self, ratio: float, capacity: float = 10.0) -> None:
+        """
+        Бюджет повторов: каждый запрос добавляет ratio жетона (не больше capacity), повтор тратит один.
+        Когда бэкенд лежит, повторы быстро кончаются и не умножают нагрузку на него.
+        """
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+def _is_failure(response: Response | None) -> bool:
+    return response is None or response.status_code >= 500
+
+
+def _discard(future: Future[Response]) -> None:
+    """Закрывает ответ проигравшего дубля, чтобы соединение вернулось в пул."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class LatencyPolicy:
+    def __init__(
+        self,
+        hedge_quantile: float = 95.0,
+        initial_hedge_delay: float = 0.5,
+        min_samples: int = 20,
+        max_retries: int = 2,
+        backoff: float = 0.1,
+        retry_ratio: float = 0.1,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+        workers: int = 8,
+    ) -> None:
+        """
+        Политика задержек для запросов APIClient.
+        Идемпотентные запросы дублируются, если ответ не пришел за hedge_quantile-перцентиль задержек
+        эндпоинта (до min_samples замеров — за initial_hedge_delay секунд); берется первый ответ.
+        При сетевых ошибках и 5xx они повторяются до max_retries раз с экспоненциальной задержкой со случайным
+        разбросом, пока не кончится бюджет повторов. Неидемпотентные запросы не дублируются и не повторяются.
+        Все запросы проходят через общий автомат отключения.
+        """
+        self.hedge_quantile = hedge_quantile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_samples = min_samples
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.budget = RetryBudget(retry_ratio)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "LatencyPolicy":
+        return cls(
+            hedge_quantile=Config.API_HEDGE_QUANTILE,
+            max_retries=Config.API_POLICY_RETRIES,
+            breaker_threshold=Config.API_BREAKER_THRESHOLD,
+            breaker_reset=Config.API_BREAKER_RESET,
+        )
+
+    def hedge_delay(self, endpoint: str) -> float:
+        """Через сколько секунд без ответа отправлять дубль запроса к endpoint."""
+        histogram = self.histograms.get(endpoint)
+        if histogram is None or histogram.count < self.min_samples:
+            return self.initial_hedge_delay
+        return histogram.percentile(self.hedge_quantile) / 1_000_000
+
+    def hedges(self, method: str, idempotent: bool) -> bool:
+        """
+        Будет ли execute дублировать и повторять запрос. Такой send вызывается из потоков пула,
+        иногда два сразу, и не должен делить между вызовами requests.Session: она не потокобезопасна.
+        """
+        return idempotent and method.upper() in IDEMPOTENT_METHODS
+
+    def _hedged(self, endpoint: str, send: Callable[[], Response]) -> Response:
+        send = carry_context(send)
+        first = self._executor.submit(send)
+        try:
+            return first.result(timeout=self.hedge_delay(endpoint))
+        except FutureTimeoutError:
+            pass
+
+        self.hedged += 1
+        second = self._executor.submit(send)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and not _is_failure(future.result()):
+                    for other in pending:
+                        other.add_done_callback(_discard)
+                    self.hedge_wins += future is second
+                    return future.result()
+        return first.result()
+
+    def execute(self, method: str, path: str, send: Callable[[], Response], idempotent: bool = False) -> Response:
+        """
+        Выполняет send по правилам политики.
+        Дублируются и повторяются только вызовы, явно помеченные idempotent, и только с безопасным методом (см. hedges).
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Автомат разомкнут: WordPress не отвечает, {method.upper()} {path} не отправлен")
+
+        if not self.hedges(method, idempotent):
+            try:
+                response = send()
+            except RETRYABLE_ERRORS:
+                self.breaker.record(False)
+                raise
+            self.breaker.record(not _is_failure(response))
+            return response
+
+        endpoint = endpoint_name(method, path)
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            response, error = None, None
+            try:
+                response = self._hedged(endpoint, send)
+            except RETRYABLE_ERRORS as exc:
+                error = exc
+            self.breaker.record(not _is_failure(response))
+            if not _is_failure(response):
+                histogram = self.histograms.get(endpoint)
+                if histogram is None:
+                    with self._lock:
+                        histogram = self.histograms.setdefault(endpoint, LatencyHistogram())
+                histogram.record((time.perf_counter() - started) * 1_000_000)
+                return response
+
+            if attempt >= self.max_retries or not self.budget.withdraw() or not self.breaker.allow():
+                if error is not None:
+                    raise error
+                return response
+            attempt += 1
+            self.retries += 1
+            time.sleep(random.uniform(0, self.backoff * 2**attempt))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,298 @@
+"""
+Генератор нагрузки на API постов по открытой модели: запросы отправляются с заданной частотой
+независимо от того, успевает ли WordPress отвечать. Задержка считается от запланированного момента отправки,
+поэтому очередь перед пулом воркеров попадает в перцентили, а не прячется (coordinated omission).
+
+Пример:
+    python -m src.load_runner --rate 50 --duration 60 --mix get=6,list=2,create=1,update=1 --json load.json
+
+Перед прогоном в БД создаются посты-заготовки (DBClient.create_posts_via_sql),
+после прогона все посты, созданные генератором, удаляются через DBClient.delete_posts.
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from requests import Response
+
+from config import Config
+from src.api_client import APIClient
+from src.db_client import DBClient
+from src.histogram import LatencyHistogram
+from src.wp_standin import STANDIN_URL, start_standin
+
+SCENARIOS = ("create", "get", "list", "update", "delete")
+DEFAULT_MIX = {"get": 6.0, "list": 2.0, "create": 1.0, "update": 1.0}
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """Разбирает микс сценариев вида 'get=6,list=2,create=1' в словарь весов."""
+    mix: dict[str, float] = {}
+    for part in filter(None, (item.strip() for item in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Неизвестный сценарий: '{name}'. Допустимые значения: {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("В миксе сценариев должен быть хотя бы один сценарий с положительным весом")
+    return mix
+
+
+class LoadRunner:
+    def __init__(
+        self,
+        rate: float,
+        duration: float,
+        mix: dict[str, float] | None = None,
+        workers: int = 16,
+        arrival: str = "constant",
+        seed_posts: int = 20,
+        db_client: DBClient | None = None,
+        client_factory: Callable[[], APIClient] = APIClient,
+    ) -> None:
+        """
+        Нагрузочный прогон: rate запросов в секунду в течение duration секунд.
+        Сценарий каждого запроса выбирается из mix пропорционально весу,
+        запросы выполняет пул из workers потоков, у каждого потока свой APIClient.
+        arrival=constant дает равные интервалы между запросами, poisson — экспоненциальные.
+        """
+        if rate <= 0 or duration <= 0:
+            raise ValueError("rate и duration должны быть положительными")
+        if arrival not in ("constant", "poisson"):
+            raise ValueError(f"Неизвестный режим прихода запросов: '{arrival}'. Допустимые значения: constant, poisson")
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix or DEFAULT_MIX
+        self.workers = workers
+        self.arrival = arrival
+        self.seed_posts = seed_posts
+        self.db_client = db_client or DBClient()
+        self.client_factory = client_factory
+
+        self.histograms = {name: LatencyHistogram() for name in self.mix}
+        self.errors = dict.fromkeys(self.mix, 0)
+        self.elapsed = 0.0
+        self.max_lag = 0.0
+        self._post_ids: list[int] = []
+        self._created_ids: set[int] = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._clients: list[APIClient] = []
+
+    def _client(self) -> APIClient:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+            with self._lock:
+                self._clients.append(client)
+        return client
+
+    def _remember(self, post_id: int) -> None:
+        with self._lock:
+            self._post_ids.append(post_id)
+            self._created_ids.add(post_id)
+
+    def _pick(self, remove: bool = False) -> int | None:
+        with self._lock:
+            if not self._post_ids:
+                return None
+            index = random.randrange(len(self._post_ids))
+            if remove:
+                self._post_ids[index], self._post_ids[-1] = self._post_ids[-1], self._post_ids[index]
+                return self._post_ids.pop()
+            return self._post_ids[index]
+
+    def _create(self, client: APIClient) -> Response:
+        unique_id = uuid.uuid4()
+        response = client.create_post(
+            {"title": f"Load Title [{unique_id}]", "content": f"Load Content [{unique_id}]", "status": "publish"}
+        )
+        if response.status_code == 201:
+            self._remember(response.json()["id"])
+        return response
+
+    def _get(self, client: APIClient, post_id: int) -> Response:
+        return client.get_post(post_id)
+
+    def _list(self, client: APIClient) -> Response:
+        return client.list_posts(params={"per_page": 10})
+
+    def _update(self, client: APIClient, post_id: int) -> Response:
+        return client.update_post(post_id, {"title": f"Load Updated [{uuid.uuid4()}]"})
+
+    def _delete(self, client: APIClient, post_id: int) -> Response:
+        response = client.delete_post(post_id)
+        if response.status_code == 200:
+            with self._lock:
+                self._created_ids.discard(post_id)
+        return response
+
+    def _execute(self, scenario: str, scheduled: float) -> None:
+        client = self._client()
+        post_id = None
+        if scenario in ("get", "update", "delete"):
+            post_id = self._pick(remove=scenario == "delete")
+        try:
+            if scenario == "create":
+                response = self._create(client)
+            elif scenario == "list":
+                response = self._list(client)
+            elif post_id is None:
+                # Посты закончились (их все удалили) — вместо запроса к посту создаем новый
+                scenario = "create"
+                response = self._create(client)
+            else:
+                response = getattr(self, f"_{scenario}")(client, post_id)
+            failed = response.status_code >= 400
+        except Exception:
+            # Любая ошибка (сеть, CircuitOpenError, битый JSON) — это ошибка запроса, а не потерянный замер:
+            # исключение из воркера пула иначе пропало бы в Future вместе с задержкой
+            failed = True
+        latency = time.perf_counter() - scheduled
+
+        histogram = self.histograms.setdefault(scenario, LatencyHistogram())
+        histogram.record(latency * 1_000_000)
+        if failed:
+            with self._lock:
+                self.errors[scenario] = self.errors.get(scenario, 0) + 1
+
+    def seed(self) -> None:
+        """Создает в БД посты, с которыми работают сценарии get/update/delete."""
+        if not self.seed_posts:
+            return
+        rows = [
+            {"post_title": f"Load Seed [{uuid.uuid4()}]", "post_content": "Load Seed Content"}
+            for _ in range(self.seed_posts)
+        ]
+        for post_id in self.db_client.create_posts_via_sql(rows):
+            self._remember(post_id)
+
+    def run(self) -> dict[str, Any]:
+        """Выполняет прогон и возвращает отчет (см. report)."""
+        self.seed()
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        total = int(self.rate * self.duration)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="load") as executor:
+            started = time.perf_counter()
+            scheduled = started
+            for _ in range(total):
+                interval = random.expovariate(self.rate) if self.arrival == "poisson" else 1 / self.rate
+                scheduled += interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    self.max_lag = max(self.max_lag, -delay)
+                executor.submit(self._execute, random.choices(names, weights)[0], scheduled)
+        self.elapsed = time.perf_counter() - started
+        return self.report()
+
+    def report(self) -> dict[str, Any]:
+        """
+        Отчет прогона: перцентили задержек, пропускная способность и доля ошибок по каждому сценарию и в целом.
+        Гистограммы сохраняются целиком, чтобы отчеты разных прогонов можно было сравнивать и объединять.
+        """
+        elapsed = self.elapsed or 1.0
+        total_histogram = LatencyHistogram()
+        endpoints: dict[str, Any] = {}
+        for name, histogram in self.histograms.items():
+            total_histogram.merge(histogram)
+            errors = self.errors.get(name, 0)
+            endpoints[name] = {
+                **histogram.summary(),
+                "errors": errors,
+                "error_rate": round(errors / histogram.count, 4) if histogram.count else 0.0,
+                "throughput_rps": round(histogram.count / elapsed, 2),
+            }
+        errors = sum(self.errors.values())
+        return {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "base_url": Config.BASE_URL,
+            "config": {
+                "rate": self.rate,
+                "duration": self.duration,
+                "mix": self.mix,
+                "workers": self.workers,
+                "arrival": self.arrival,
+            },
+            "elapsed_s": round(self.elapsed, 3),
+            "max_schedule_lag_ms": round(self.max_lag * 1000, 3),
+            "total": {
+                **total_histogram.summary(),
+                "errors": errors,
+                "error_rate": round(errors / total_histogram.count, 4) if total_histogram.count else 0.0,
+                "throughput_rps": round(total_histogram.count / elapsed, 2),
+            },
+            "endpoints": endpoints,
+            "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+        }
+
+    def cleanup(self) -> None:
+        """Удаляет все посты, созданные генератором и еще существующие, одной транзакцией через DBClient."""
+        with self._lock:
+            post_ids, self._created_ids = sorted(self._created_ids), set()
+            self._post_ids = []
+        self.db_client.delete_posts(post_ids)
+        for client in self._clients:
+            client.session.close()
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """Таблица отчета для вывода в консоль."""
+    columns = ("count", "rps", "errors", "p50 ms", "p95 ms", "p99 ms", "max ms")
+    lines = [f"{'endpoint':<10}" + "".join(f"{column:>10}" for column in columns)]
+    for name, stats in [*report["endpoints"].items(), ("total", report["total"])]:
+        lines.append(
+            f"{name:<10}{stats['count']:>10}{stats['throughput_rps']:>10.1f}{stats['error_rate']:>10.1%}"
+            f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, required=True, help="запросов в секунду")
+    parser.add_argument("--duration", type=float, required=True, help="длительность прогона, секунды")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="веса сценариев: get=6,list=2,create=1")
+    parser.add_argument("--workers", type=int, default=16, help="размер пула потоков")
+    parser.add_argument("--arrival", choices=("constant", "poisson"), default="constant")
+    parser.add_argument("--seed-posts", type=int, default=20, help="сколько постов создать в БД перед прогоном")
+    parser.add_argument("--json", type=Path, help="куда сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    server = None
+    if Config.BASE_URL == STANDIN_URL:
+        # Прогон против заглушки годится для проверки самого генератора, но не для оценки емкости WordPress
+        Config.DB_DRIVER = "sqlite"
+        Config.DB_NAME = Config.DB_NAME or str(Path(tempfile.mkdtemp()) / "wp.sqlite")
+        server = start_standin(Config.DB_NAME, user=Config.API_USER, password=Config.API_PASSWORD)
+        Config.BASE_URL = server.base_url
+
+    runner = LoadRunner(
+        args.rate, args.duration, args.mix, workers=args.workers, arrival=args.arrival, seed_posts=args.seed_posts
+    )
+    try:
+        report = runner.run()
+    finally:
+        runner.cleanup()
+        runner.db_client.close()
+        if server is not None:
+            server.shutdown()
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
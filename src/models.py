@@ -0,0 +1,75 @@
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from requests import Response
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него работает стандартный json
+    orjson = None
+
+# Колонки wp_posts в порядке полей Post — для SELECT с кортежным курсором
+POST_COLUMNS = ("ID", "post_title", "post_content", "post_status")
+
+
+def loads(data: bytes | str) -> Any:
+    """Разбирает JSON через orjson, если он установлен, иначе через стандартный json."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode(response: "Response") -> Any:
+    """Быстрая замена response.json(): разбирает тело ответа без промежуточной строки."""
+    return loads(response.content)
+
+
+def _text(data: dict[str, Any], field: str, context: str) -> Any:
+    # В контексте edit WordPress отдает {"raw": ..., "rendered": ...}, в контексте view — только rendered
+    value = data.get(field)
+    if not isinstance(value, dict):
+        return value
+    key = "raw" if context == "edit" else "rendered"
+    if key not in value:
+        raise ValueError(f"В поле {field} поста {data.get('id')} нет {key}: ответ получен не в контексте {context}")
+    return value[key]
+
+
+@dataclass(slots=True)
+class Post:
+    """
+    Компактное представление поста, общее для ответа API и строки wp_posts.
+    Сравнение двух Post — прямое сравнение полей, без разбора вложенных словарей.
+    """
+
+    id: int
+    title: str | None
+    content: str | None
+    status: str | None
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any], context: str = "edit") -> "Post":
+        """
+        Пост из JSON ответа wp/v2/posts, запрошенного с тем же context.
+        Для title и content берется raw при context=edit и rendered при остальных; если нужного варианта в ответе нет,
+        бросается ValueError, а не подставляется другой. Поля, отрезанные через _fields, остаются None.
+        """
+        return cls(data["id"], _text(data, "title", context), _text(data, "content", context), data.get("status"))
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "Post":
+        """Пост из кортежа (ID, post_title, post_content, post_status) — см. POST_COLUMNS."""
+        return cls(*row)
+
+
+def post_from_response(response: "Response", context: str = "edit") -> Post:
+    """Post из ответа на запрос одного поста с указанным context."""
+    return Post.from_api(decode(response), context)
+
+
+def posts_from_response(response: "Response", context: str = "edit") -> list[Post]:
+    """Список Post из ответа на запрос списка постов с указанным context."""
+    return [Post.from_api(data, context) for data in decode(response)]
@@ -0,0 +1,84 @@
+import queue
+import threading
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+import requests
+
+from src.api_client import APIClient
+
+DEFAULT_CONTENT = "Default Content"
+DEFAULT_STATUS = "publish"
+
+
+def default_post_payload() -> dict[str, Any]:
+    """Пост по умолчанию, как его создает make_post без аргументов."""
+    return {"title": f"Auto Test Title {uuid.uuid4()}", "content": DEFAULT_CONTENT, "status": DEFAULT_STATUS}
+
+
+class PostPool:
+    def __init__(self, size: int, low_water: int, client_factory: Callable[[], APIClient] = APIClient) -> None:
+        """
+        Запас заранее созданных постов по умолчанию.
+        Фоновый поток создает посты через /batch/v1 (или по одному, если маршрута нет),
+        пока в запасе не наберется size штук, и снова доливает его, когда остается меньше low_water.
+        """
+        self.size = size
+        self.low_water = min(low_water, size)
+        self.client_factory = client_factory
+        self.errors = 0
+        self._ready: queue.Queue[dict[str, Any]] = queue.Queue()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._wakeup.set()
+        self._thread = threading.Thread(target=self._run, name="post-pool", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        client = self.client_factory()
+        try:
+            while not self._stop.is_set():
+                self._wakeup.wait()
+                self._wakeup.clear()
+                missing = self.size - self._ready.qsize()
+                if missing > 0 and not self._stop.is_set():
+                    try:
+                        self._refill(client, missing)
+                    except requests.RequestException:
+                        # Запас не обязателен: make_post создаст пост сам, а поток попробует снова при следующем take
+                        self.errors += 1
+        finally:
+            client.session.close()
+
+    def _refill(self, client: APIClient, count: int) -> None:
+        with client.batch() as batch:
+            items = [batch.create_post(default_post_payload()) for _ in range(count)]
+        for item in items:
+            if item.response is not None and item.response.status_code == 201:
+                self._ready.put(item.response.json())
+            else:
+                self.errors += 1
+
+    def take(self) -> dict[str, Any] | None:
+        """
+        Отдает готовый пост из запаса или None, если запас пуст (тогда пост создается как обычно).
+        Если постов осталось меньше low_water, будит фоновый поток.
+        """
+        try:
+            post = self._ready.get_nowait()
+        except queue.Empty:
+            post = None
+        if self._ready.qsize() < self.low_water:
+            self._wakeup.set()
+        return post
+
+    def close(self) -> list[int]:
+        """Останавливает фоновый поток и возвращает ID невыданных постов, чтобы их удалить."""
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join()
+        post_ids = []
+        while not self._ready.empty():
+            post_ids.append(self._ready.get_nowait()["id"])
+        return post_ids
@@ -0,0 +1,141 @@
+import functools
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from config import Config
+from src.histogram import LatencyHistogram
+
+if TYPE_CHECKING:
+    from requests import Response
+
+
+class StepStats:
+    def __init__(self) -> None:
+        """Счетчики и гистограммы длительностей шагов текущего теста для режима ALLURE_STEPS=summary."""
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def sample(self, title: str, limit: int) -> bool:
+        """Нужно ли записать очередной вызов шага полностью: да для первых limit вызовов в тесте."""
+        with self._lock:
+            histogram = self.histograms.setdefault(title, LatencyHistogram())
+            return histogram.count < limit
+
+    def record(self, title: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(title)
+            # Вызов мог начаться до take() в конце теста — тогда он уже не относится ни к одному тесту
+            if histogram is not None:
+                histogram.record(seconds * 1_000_000)
+
+    def take(self) -> dict[str, LatencyHistogram]:
+        """Забирает накопленную статистику и начинает новую."""
+        with self._lock:
+            histograms, self.histograms = self.histograms, {}
+        return histograms
+
+
+STEP_STATS = StepStats()
+
+
+class LazyStep:
+    def __init__(self, title: str) -> None:
+        """
+        Ленивый allure.step: работает и как декоратор, и как контекстный менеджер,
+        но импортирует allure только при первом выполненном шаге, а не при импорте клиента.
+        Режим ALLURE_STEPS читается при выполнении шага:
+        full — каждый вызов отдельным шагом;
+        summary — первые ALLURE_STEP_SAMPLE вызовов в тесте пишутся как шаги, остальные только замеряются
+        и попадают в итоговый шаг вида «<шаг> ×500, p95 42 мс» (см. src.allure_plugin);
+        off — шагов нет, функция вызывается напрямую.
+        """
+        self.title = title
+        self._context: Any = None
+        self._started = 0.0
+
+    def __call__(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        wrapped: Callable[..., Any] | None = None
+
+        @functools.wraps(func)
+        def impl(*args: Any, **kwargs: Any) -> Any:
+            nonlocal wrapped
+            mode = Config.ALLURE_STEPS
+            if mode == "off":
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                if mode == "summary" and not STEP_STATS.sample(self.title, Config.ALLURE_STEP_SAMPLE):
+                    return func(*args, **kwargs)
+                if wrapped is None:
+                    import allure
+
+                    wrapped = allure.step(self.title)(func)
+                return wrapped(*args, **kwargs)
+            finally:
+                if mode == "summary":
+                    STEP_STATS.record(self.title, time.perf_counter() - started)
+
+        return impl
+
+    def __enter__(self) -> Any:
+        mode = Config.ALLURE_STEPS
+        self._context = None
+        if mode == "off":
+            return None
+        if mode == "summary":
+            self._started = time.perf_counter()
+            if not STEP_STATS.sample(self.title, Config.ALLURE_STEP_SAMPLE):
+                return None
+        import allure
+
+        self._context = allure.step(self.title)
+        return self._context.__enter__()
+
+    def __exit__(self, *exc_info: Any) -> Any:
+        if self._started:
+            STEP_STATS.record(self.title, time.perf_counter() - self._started)
+            self._started = 0.0
+        if self._context is not None:
+            return self._context.__exit__(*exc_info)
+        return None
+
+
+def step(title: str) -> LazyStep:
+    """Замена allure.step для модулей src: allure не грузится, пока шаг не понадобился."""
+    return LazyStep(title)
+
+
+class ExchangeLog:
+    def __init__(self, size: int) -> None:
+        """
+        Последние size HTTP-обменов APIClient в текущем тесте.
+        Хранятся ссылки на запрос и ответ, в текст они превращаются только для упавшего теста.
+        """
+        self._exchanges: deque[tuple[str, str, dict[str, Any], "Response"]] = deque(maxlen=size)
+
+    def record(self, method: str, url: str, kwargs: dict[str, Any], response: "Response") -> None:
+        self._exchanges.append((method, url, kwargs, response))
+
+    def clear(self) -> None:
+        self._exchanges.clear()
+
+    def format(self) -> str:
+        blocks = []
+        for method, url, kwargs, response in list(self._exchanges):
+            lines = [f"> {method.upper()} {url}"]
+            if kwargs.get("params"):
+                lines.append(f"> params: {kwargs['params']}")
+            if kwargs.get("json") is not None:
+                lines.append(f"> json: {kwargs['json']}")
+            lines.append(f"< {response.status_code} {response.reason or ''}".rstrip())
+            lines.extend(f"< {name}: {value}" for name, value in response.headers.items())
+            lines.append(response.text)
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
+
+
+# Включается плагином src.allure_plugin при ALLURE_FAILURE_ATTACHMENTS; None — обмены не запоминаются
+EXCHANGES: ExchangeLog | None = None
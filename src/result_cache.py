@@ -0,0 +1,318 @@
+import ast
+import hashlib
+import inspect
+import json
+import warnings
+from collections.abc import Callable, Generator, Iterable
+from pathlib import Path
+from types import CodeType, ModuleType
+from typing import Any
+
+import pytest
+import requests
+
+from config import Config
+from src.cassette import cassette_path
+from src.wp_standin import STANDIN_URL
+
+CACHE_KEY = "sdet_wordpress/results"
+# Значения глобальных переменных, которые попадают в отпечаток функции, которая на них ссылается
+CONSTANT_TYPES = (str, int, float, bool, bytes, tuple, frozenset, type(None))
+# Настройки Config, которые не входят в отпечаток окружения: секреты и настройки самого кэша
+SECRET_MARKERS = ("PASSWORD", "SECRET", "TOKEN")
+SKIPPED_SETTINGS = ("RESULT_CACHE",)
+
+
+def digest(parts: Iterable[str]) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        hasher.update(part.encode("utf-8", "surrogatepass"))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def settings_fingerprint() -> str:
+    """Значения всех настроек Config, кроме секретов и настроек кэша результатов, в виде JSON."""
+    settings = {
+        name: getattr(Config, name)
+        for name in vars(Config)
+        if name.isupper()
+        and not any(marker in name for marker in SECRET_MARKERS)
+        and not name.startswith(SKIPPED_SETTINGS)
+    }
+    return json.dumps(settings, sort_keys=True, default=str)
+
+
+def environment_fingerprint() -> str:
+    """
+    Отпечаток целевого окружения: настройки Config без секретов (хост и драйвер БД, политика задержек,
+    шардирование, prepared statements и т. д.), адрес, режим кассет и индекс REST API (GET на WP_BASE_URL).
+    В индексе перечислены пространства имен и маршруты с их аргументами, поэтому он меняется
+    при обновлении WordPress и плагинов. Заглушка поднимается только в сессии, ее отпечаток — код src.wp_standin,
+    который и так входит в отпечаток модулей. В режиме replay сеть не нужна, окружение теста — его кассета
+    (см. Fingerprinter.fingerprint).
+    """
+    parts = [settings_fingerprint(), str(Config.BASE_URL), Config.API_CASSETTE_MODE]
+    if Config.BASE_URL != STANDIN_URL and Config.API_CASSETTE_MODE != "replay":
+        response = requests.get(Config.BASE_URL, timeout=Config.TIMEOUT)
+        response.raise_for_status()
+        parts.append(json.dumps(response.json(), sort_keys=True))
+    return digest(parts)
+
+
+class Fingerprinter:
+    def __init__(self, root: Path) -> None:
+        """
+        Считает отпечатки тестов: исходник теста и его фикстур (транзитивно, с функциями и константами модуля,
+        на которые они ссылаются), хуки conftest и содержимое модулей проекта, импортируемых тестом и conftest
+        (транзитивно, включая импорты внутри функций), а в режиме replay — файл кассеты теста.
+        Все промежуточные хэши кэшируются на сессию.
+        """
+        self.root = root.resolve()
+        self._files: dict[Path, str] = {}
+        self._imports: dict[Path, set[Path]] = {}
+        self._sources: dict[Any, str] = {}
+
+    def _project_file(self, path: str | Path | None) -> Path | None:
+        if path is None:
+            return None
+        path = Path(path).resolve()
+        return path if path.is_relative_to(self.root) and path.suffix == ".py" else None
+
+    def _resolve_module(self, name: str) -> Path | None:
+        base = self.root.joinpath(*name.split("."))
+        for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+            if candidate.is_file():
+                return candidate
+        return None
+
+    def _direct_imports(self, path: Path) -> set[Path]:
+        if path not in self._imports:
+            names: list[str] = []
+            for node in ast.walk(ast.parse(path.read_bytes(), filename=str(path))):
+                if isinstance(node, ast.Import):
+                    names.extend(alias.name for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    # from src import reporting — это может быть как имя из src/__init__.py, так и модуль src.reporting
+                    names.append(node.module)
+                    names.extend(f"{node.module}.{alias.name}" for alias in node.names)
+            self._imports[path] = {module for name in names if (module := self._resolve_module(name))}
+        return self._imports[path]
+
+    def module_closure(self, paths: Iterable[Path]) -> set[Path]:
+        """Модули проекта, транзитивно импортируемые файлами paths (сами paths не входят, если не импортируются)."""
+        seen: set[Path] = set()
+        stack = [module for path in paths for module in self._direct_imports(path)]
+        while stack:
+            path = stack.pop()
+            if path not in seen:
+                seen.add(path)
+                stack.extend(self._direct_imports(path))
+        return seen
+
+    def file_hash(self, path: Path) -> str:
+        if path not in self._files:
+            self._files[path] = hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+        return self._files[path]
+
+    def function_hash(self, func: Callable[..., Any]) -> str:
+        """Исходник функции проекта вместе с функциями, классами и константами модуля, на которые она ссылается."""
+        func = inspect.unwrap(func)
+        if func in self._sources:
+            return self._sources[func]
+        self._sources[func] = ""  # защита от взаимной рекурсии
+        try:
+            parts = [inspect.getsource(func)]
+        except (OSError, TypeError):
+            parts = [f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"]
+        module_globals = getattr(func, "__globals__", {})
+        for name in sorted(self._global_names(getattr(func, "__code__", None))):
+            if name not in module_globals:
+                continue
+            value = module_globals[name]
+            if isinstance(value, CONSTANT_TYPES):
+                parts.append(f"{name}={value!r}")
+            elif inspect.isfunction(value) and self._defined_in_project(value):
+                parts.append(f"{name}:{self.function_hash(value)}")
+            elif inspect.isclass(value) and self._defined_in_project(value):
+                parts.append(self._class_source(value))
+        self._sources[func] = digest(parts)
+        return self._sources[func]
+
+    def _class_source(self, cls: type) -> str:
+        try:
+            return inspect.getsource(cls)
+        except (OSError, TypeError):
+            return cls.__qualname__
+
+    def _defined_in_project(self, value: Any) -> bool:
+        try:
+            return self._project_file(inspect.getsourcefile(value)) is not None
+        except TypeError:
+            return False
+
+    @staticmethod
+    def _global_names(code: CodeType | None) -> set[str]:
+        names: set[str] = set()
+        stack = [code] if code is not None else []
+        while stack:
+            current = stack.pop()
+            names.update(current.co_names)
+            stack.extend(const for const in current.co_consts if isinstance(const, CodeType))
+        return names
+
+    @staticmethod
+    def _string_constants(code: CodeType | None) -> set[str]:
+        constants: set[str] = set()
+        stack = [code] if code is not None else []
+        while stack:
+            current = stack.pop()
+            for const in current.co_consts:
+                if isinstance(const, CodeType):
+                    stack.append(const)
+                elif isinstance(const, str) and const.isidentifier():
+                    constants.add(const)
+        return constants
+
+    def _fixture_functions(self, item: pytest.Function) -> list[Callable[..., Any]]:
+        """
+        Функции фикстур теста: замыкание fixturenames и фикстуры, запрошенные по имени через getfixturevalue
+        (имя в строковой константе кода фикстуры).
+        """
+        fixture_manager = item.session._fixturemanager
+        functions: list[Callable[..., Any]] = []
+        seen: set[str] = set()
+        pending = list(item.fixturenames)
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            for fixturedef in fixture_manager.getfixturedefs(name, item) or ():
+                functions.append(fixturedef.func)
+                pending.extend(fixturedef.argnames)
+                pending.extend(self._string_constants(getattr(inspect.unwrap(fixturedef.func), "__code__", None)))
+        return functions
+
+    def _conftest_modules(self, item: pytest.Function) -> list[ModuleType]:
+        return [
+            plugin
+            for plugin in item.config.pluginmanager.get_plugins()
+            if isinstance(plugin, ModuleType)
+            and (path := self._project_file(getattr(plugin, "__file__", None))) is not None
+            and path.name == "conftest.py"
+            and item.path.resolve().is_relative_to(path.parent)
+        ]
+
+    def fingerprint(self, item: pytest.Function, environment: str) -> str:
+        parts = [environment, item.nodeid, self.function_hash(item.function)]
+        files = {path for path in (self._project_file(item.path),) if path is not None}
+        # Порядок обхода фикстур зависит от порядка множеств (PYTHONHASHSEED), а отпечаток должен совпадать
+        # между прогонами и между воркерами xdist, поэтому хэши сортируются
+        fixture_hashes = []
+        for func in self._fixture_functions(item):
+            fixture_hashes.append(self.function_hash(func))
+            try:
+                source_file = self._project_file(inspect.getsourcefile(inspect.unwrap(func)))
+            except TypeError:
+                source_file = None
+            if source_file is not None:
+                files.add(source_file)
+        parts.extend(sorted(fixture_hashes))
+        if Config.API_CASSETTE_MODE == "replay":
+            # В режиме replay окружение теста — его кассета: перезаписанная кассета должна перезапускать тест
+            cassette = cassette_path(item.nodeid)
+            parts.append(self.file_hash(cassette) if cassette.is_file() else "no cassette")
+        for module in sorted(self._conftest_modules(item), key=lambda module: module.__file__):
+            files.add(Path(module.__file__).resolve())
+            hooks = sorted(name for name in vars(module) if name.startswith("pytest_"))
+            parts.extend(f"{name}:{self.function_hash(getattr(module, name))}" for name in hooks)
+        for path in sorted(self.module_closure(files)):
+            parts.append(f"{path.relative_to(self.root)}:{self.file_hash(path)}")
+        return digest(parts)
+
+
+class ResultCachePlugin:
+    def __init__(self, config: pytest.Config, force: bool) -> None:
+        """
+        Пропускает тесты, которые уже прошли с тем же отпечатком (см. Fingerprinter и environment_fingerprint).
+        Отпечатки прошедших тестов хранятся в кэше pytest; force — прогнать все тесты и обновить кэш.
+        Под xdist отбор делает каждый воркер (кэш у них общий и одинаковый), а записывает результаты контроллер.
+        """
+        self.config = config
+        # С -p no:cacheprovider у конфига нет cache: тогда результаты не запоминаются
+        self.cache: pytest.Cache | None = getattr(config, "cache", None)
+        self.force = force
+        self.passed: dict[str, str] = self.cache.get(CACHE_KEY, {}) if self.cache else {}
+        self.fingerprints: dict[str, str] = {}
+        self.outcomes: dict[str, bool] = {}
+        self.skipped = 0
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config: pytest.Config, items: list[pytest.Item]) -> None:
+        try:
+            environment = environment_fingerprint()
+        except (requests.RequestException, ValueError) as error:
+            warnings.warn(pytest.PytestWarning(f"Кэш результатов отключен: индекс REST API недоступен ({error})"))
+            return
+        fingerprinter = Fingerprinter(config.rootpath)
+        for item in items:
+            if isinstance(item, pytest.Function):
+                self.fingerprints[item.nodeid] = fingerprinter.fingerprint(item, environment)
+        if self.force:
+            return
+        selected, cached = [], []
+        for item in items:
+            fingerprint = self.fingerprints.get(item.nodeid)
+            unchanged = fingerprint is not None and self.passed.get(item.nodeid) == fingerprint
+            (cached if unchanged else selected).append(item)
+        if cached:
+            self.skipped = len(cached)
+            config.hook.pytest_deselected(items=cached)
+            items[:] = selected
+
+    def pytest_report_collectionfinish(self, config: pytest.Config) -> str | None:
+        if self.skipped:
+            return f"кэш результатов: пропущено {self.skipped} тестов без изменений с последнего успешного прогона"
+        return None
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(self, item: pytest.Item, call: pytest.CallInfo[None]) -> Generator[None, Any, Any]:
+        report = yield
+        if call.when == "setup" and item.nodeid in self.fingerprints:
+            # Под xdist отпечаток считает воркер, а кэш пишет контроллер — передаем его в отчете
+            report.result_fingerprint = self.fingerprints[item.nodeid]
+        return report
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if hasattr(self.config, "workeroutput"):
+            return
+        if report.when == "setup" and hasattr(report, "result_fingerprint"):
+            self.fingerprints[report.nodeid] = report.result_fingerprint
+        passed = report.passed and not (report.when == "call" and hasattr(report, "wasxfail"))
+        if report.when == "call":
+            self.outcomes[report.nodeid] = passed and self.outcomes.get(report.nodeid, True)
+        elif not passed:
+            self.outcomes[report.nodeid] = False
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node: Any, error: Any) -> None:
+        # Под xdist отбор делают воркеры, контроллер узнает о пропущенных тестах из их workeroutput
+        self.skipped = max(self.skipped, getattr(node, "workeroutput", {}).get(CACHE_KEY, 0))
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        # Как и --lf: если все тесты взяты из кэша, прогон успешен, а не «тесты не найдены» (код 5)
+        if self.skipped and session.exitstatus == pytest.ExitCode.NO_TESTS_COLLECTED:
+            session.exitstatus = pytest.ExitCode.OK
+        if hasattr(self.config, "workeroutput"):
+            self.config.workeroutput[CACHE_KEY] = self.skipped
+            return
+        if not self.cache or not self.outcomes:
+            return
+        for nodeid, passed in self.outcomes.items():
+            fingerprint = self.fingerprints.get(nodeid)
+            if passed and fingerprint is not None:
+                self.passed[nodeid] = fingerprint
+            else:
+                self.passed.pop(nodeid, None)
+        self.cache.set(CACHE_KEY, self.passed)
@@ -0,0 +1,43 @@
+import os
+from typing import TYPE_CHECKING
+
+from config import Config
+
+if TYPE_CHECKING:
+    from src.db_client import DBClient
+
+SHARD_HEADER = "X-Test-Shard"
+
+
+def worker_id() -> str | None:
+    """ID воркера pytest-xdist (gw0, gw1, ...) или None, если тесты идут без xdist."""
+    return os.getenv("PYTEST_XDIST_WORKER")
+
+
+def current_shard() -> str | None:
+    """
+    Имя схемы БД, выделенной текущему воркеру xdist.
+    None, если шардирование выключено или тесты идут без xdist.
+    """
+    worker = worker_id()
+    if not Config.DB_SHARDING or worker is None:
+        return None
+    return f"{Config.DB_NAME}_{worker}"
+
+
+def clone_schema(db_client: "DBClient", template: str, target: str) -> None:
+    """
+    Пересоздает схему target как копию схемы template: структура и данные всех таблиц.
+    db_client должен иметь права на CREATE DATABASE и чтение template.
+    """
+    tables = db_client.execute_query(
+        "SELECT table_name AS name FROM information_schema.tables "
+        "WHERE table_schema = %s AND table_type = 'BASE TABLE'",
+        (template,),
+    )
+    db_client.execute_query(f"CREATE DATABASE IF NOT EXISTS `{target}`")
+    for table in tables:
+        name = table["name"]
+        db_client.execute_query(f"DROP TABLE IF EXISTS `{target}`.`{name}`")
+        db_client.execute_query(f"CREATE TABLE `{target}`.`{name}` LIKE `{template}`.`{name}`")
+        db_client.execute_query(f"INSERT INTO `{target}`.`{name}` SELECT * FROM `{template}`.`{name}`")
@@ -0,0 +1,173 @@
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Any
+
+WP_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS wp_posts (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        post_author INTEGER NOT NULL DEFAULT 0,
+        post_date TEXT NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_date_gmt TEXT NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_content TEXT NOT NULL DEFAULT '',
+        post_title TEXT NOT NULL DEFAULT '',
+        post_excerpt TEXT NOT NULL DEFAULT '',
+        post_status TEXT NOT NULL DEFAULT 'publish',
+        comment_status TEXT NOT NULL DEFAULT 'open',
+        ping_status TEXT NOT NULL DEFAULT 'open',
+        post_password TEXT NOT NULL DEFAULT '',
+        post_name TEXT NOT NULL DEFAULT '',
+        to_ping TEXT NOT NULL DEFAULT '',
+        pinged TEXT NOT NULL DEFAULT '',
+        post_modified TEXT NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_modified_gmt TEXT NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_content_filtered TEXT NOT NULL DEFAULT '',
+        post_parent INTEGER NOT NULL DEFAULT 0,
+        guid TEXT NOT NULL DEFAULT '',
+        menu_order INTEGER NOT NULL DEFAULT 0,
+        post_type TEXT NOT NULL DEFAULT 'post',
+        post_mime_type TEXT NOT NULL DEFAULT '',
+        comment_count INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS post_name ON wp_posts (post_name);
+    CREATE INDEX IF NOT EXISTS type_status_date ON wp_posts (post_type, post_status, post_date, ID);
+    CREATE INDEX IF NOT EXISTS post_parent ON wp_posts (post_parent);
+    CREATE INDEX IF NOT EXISTS post_author ON wp_posts (post_author);
+    CREATE TABLE IF NOT EXISTS wp_postmeta (
+        meta_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        post_id INTEGER NOT NULL DEFAULT 0,
+        meta_key TEXT,
+        meta_value TEXT
+    );
+    CREATE INDEX IF NOT EXISTS postmeta_post_id ON wp_postmeta (post_id);
+    CREATE TABLE IF NOT EXISTS wp_term_relationships (
+        object_id INTEGER NOT NULL DEFAULT 0,
+        term_taxonomy_id INTEGER NOT NULL DEFAULT 0,
+        term_order INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (object_id, term_taxonomy_id)
+    );
+"""
+
+# Системные переменные MySQL, которые спрашивает DBClient, и их значения для SQLite
+SERVER_VARIABLES = {"@@auto_increment_increment": "1"}
+
+
+def _translate(query: str) -> str:
+    """Переводит SQL в диалекте mysql.connector (%s, @@переменные) в SQLite."""
+    for variable, value in SERVER_VARIABLES.items():
+        query = query.replace(variable, value)
+    return query.replace("%s", "?")
+
+
+def _crc32(value: Any) -> int | None:
+    """CRC32 из MySQL: контрольная сумма UTF-8 представления значения."""
+    return None if value is None else zlib.crc32(str(value).encode("utf-8"))
+
+
+def _concat_ws(separator: str, *values: Any) -> str:
+    """CONCAT_WS из MySQL: склеивает значения через separator, пропуская NULL."""
+    return separator.join(str(value) for value in values if value is not None)
+
+
+def _adapt(params: Any) -> tuple[Any, ...]:
+    if params is None:
+        return ()
+    return tuple(value.isoformat(" ", "seconds") if isinstance(value, datetime) else value for value in params)
+
+
+class SQLiteCursor:
+    def __init__(self, connection: "SQLiteConnection", dictionary: bool = False) -> None:
+        """Курсор SQLite с интерфейсом курсора mysql.connector, которым пользуется DBClient."""
+        self._cursor = connection.raw.cursor()
+        self.dictionary = dictionary
+        self.lastrowid: int | None = None
+        self.rowcount = -1
+
+    def __enter__(self) -> "SQLiteCursor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def description(self) -> Any:
+        return self._cursor.description
+
+    @property
+    def with_rows(self) -> bool:
+        return self._cursor.description is not None
+
+    def execute(self, query: str, params: Any = None) -> None:
+        self._cursor.execute(_translate(query), _adapt(params))
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+        if self.lastrowid and self.rowcount > 1 and query.lstrip().upper().startswith("INSERT"):
+            # Как в MySQL: для многострочного INSERT lastrowid — ID первой строки
+            self.lastrowid -= self.rowcount - 1
+
+    def _row(self, row: tuple[Any, ...]) -> Any:
+        if not self.dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self) -> Any:
+        row = self._cursor.fetchone()
+        return None if row is None else self._row(row)
+
+    def fetchall(self) -> list[Any]:
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, database: str, timeout: float = 10) -> None:
+        """
+        Соединение с SQLite-файлом со схемой wp_posts, совместимое с тем, как DBClient использует mysql.connector:
+        автокоммит, явные транзакции через start_transaction, плейсхолдеры %s.
+        """
+        self.raw = sqlite3.connect(database, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.raw.execute("PRAGMA journal_mode=WAL")
+        # Функции MySQL, которых нет в SQLite, для дайджестов src.consistency
+        self.raw.create_function("CRC32", 1, _crc32, deterministic=True)
+        self.raw.create_function("CONCAT_WS", -1, _concat_ws, deterministic=True)
+        self.raw.executescript(WP_SCHEMA)
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.raw.in_transaction
+
+    def cursor(self, dictionary: bool = False, prepared: bool = False, **kwargs: Any) -> SQLiteCursor:
+        # SQLite сам кэширует подготовленные выражения, поэтому prepared здесь ничего не меняет
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def start_transaction(self) -> None:
+        # IMMEDIATE сразу берет блокировку на запись и ждет ее timeout секунд. При обычном BEGIN
+        # транзакция, прочитавшая данные до чужого коммита, получает "database is locked" без ожидания
+        self.raw.execute("BEGIN IMMEDIATE")
+
+    def commit(self) -> None:
+        if self.raw.in_transaction:
+            self.raw.execute("COMMIT")
+
+    def rollback(self) -> None:
+        if self.raw.in_transaction:
+            self.raw.execute("ROLLBACK")
+
+    def ping(self, *args: Any, **kwargs: Any) -> None:
+        """Файловой базе пинг не нужен."""
+
+    def reconnect(self, *args: Any, **kwargs: Any) -> None:
+        """Файловой базе переподключение не нужно."""
+
+    def is_connected(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self.raw.close()
+
+
+def connect(database: str, **kwargs: Any) -> SQLiteConnection:
+    """Открывает SQLite-базу со схемой WordPress (создает таблицы при необходимости)."""
+    return SQLiteConnection(database, **kwargs)
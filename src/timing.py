@@ -0,0 +1,127 @@
+import re
+import threading
+import time
+from collections.abc import Callable
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass
+from typing import Any
+
+from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+@dataclass(frozen=True)
+class RequestTiming:
+    """
+    Замер одного HTTP-запроса APIClient.
+    ttfb_ms — от отправки до получения заголовков ответа, включая установку соединения;
+    connect_ms равно нулю, если соединение взято из keep-alive пула.
+    owner — значение REQUEST_OWNER в момент запроса (например, тест), None для фоновых потоков.
+    """
+
+    method: str
+    endpoint: str
+    status: int
+    connect_ms: float
+    ttfb_ms: float
+    total_ms: float
+    request_bytes: int
+    response_bytes: int
+    owner: str | None = None
+
+
+RequestHook = Callable[[RequestTiming], None]
+
+# Хуки, которые APIClient вызывает после каждого запроса в сеть. Пока список пуст, замеры не делаются
+REQUEST_HOOKS: list[RequestHook] = []
+
+# От чьего имени идут запросы: замеры помечаются этим значением. В пулы потоков его переносит carry_context
+REQUEST_OWNER: ContextVar[str | None] = ContextVar("request_owner", default=None)
+
+_connect_time = threading.local()
+
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def add_request_hook(hook: RequestHook) -> None:
+    """Подписывает hook на замеры запросов всех экземпляров APIClient."""
+    REQUEST_HOOKS.append(hook)
+
+
+def remove_request_hook(hook: RequestHook) -> None:
+    """Отписывает hook от замеров."""
+    if hook in REQUEST_HOOKS:
+        REQUEST_HOOKS.remove(hook)
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """Имя эндпоинта для агрегации: ID в пути заменяются на {id}, например 'GET wp/v2/posts/{id}'."""
+    return f"{method.upper()} {ID_SEGMENT.sub('/{id}', path.split('?', 1)[0])}"
+
+
+def carry_context(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Оборачивает func для запуска в пуле потоков: каждый вызов выполняется в копии контекста,
+    в котором была сделана обертка, поэтому запросы из пула помечаются тем же REQUEST_OWNER.
+    """
+    context = copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
+
+
+class _TimedConnectionMixin:
+    def connect(self) -> None:
+        started = time.perf_counter()
+        try:
+            super().connect()  # type: ignore[misc]
+        finally:
+            _connect_time.value = getattr(_connect_time, "value", 0.0) + time.perf_counter() - started
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimingAdapter(HTTPAdapter):
+    """HTTPAdapter, соединения которого запоминают время установки (TCP и TLS) для measure_request."""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+def measure_request(method: str, path: str, send: Callable[[], Response]) -> Response:
+    """Выполняет send и передает замер во все REQUEST_HOOKS."""
+    _connect_time.value = 0.0
+    started = time.perf_counter()
+    response = send()
+    total = time.perf_counter() - started
+
+    body = response.request.body
+    timing = RequestTiming(
+        method=method.upper(),
+        endpoint=endpoint_name(method, path),
+        status=response.status_code,
+        connect_ms=_connect_time.value * 1000,
+        ttfb_ms=response.elapsed.total_seconds() * 1000,
+        total_ms=total * 1000,
+        request_bytes=len(body) if body else 0,
+        response_bytes=len(response.content),
+        owner=REQUEST_OWNER.get(),
+    )
+    for hook in list(REQUEST_HOOKS):
+        hook(timing)
+    return response
@@ -0,0 +1,201 @@
+import threading
+from collections.abc import Generator
+from typing import Any
+
+import pytest
+
+from src.histogram import LatencyHistogram
+from src.timing import REQUEST_OWNER, RequestTiming, add_request_hook, remove_request_hook
+
+WORKER_OUTPUT_KEY = "http_timing"
+PHASES = ("setup", "call", "teardown")
+
+
+class EndpointStats:
+    def __init__(self) -> None:
+        """Сводка по одному эндпоинту: гистограмма полного времени и суммы остальных замеров."""
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.connect_ms = 0.0
+        self.ttfb_ms = 0.0
+        self.response_bytes = 0
+
+    def add(self, timing: RequestTiming) -> None:
+        self.histogram.record(timing.total_ms * 1000)
+        self.errors += timing.status >= 400
+        self.connect_ms += timing.connect_ms
+        self.ttfb_ms += timing.ttfb_ms
+        self.response_bytes += timing.response_bytes
+
+    def merge(self, other: "EndpointStats") -> None:
+        self.histogram.merge(other.histogram)
+        self.errors += other.errors
+        self.connect_ms += other.connect_ms
+        self.ttfb_ms += other.ttfb_ms
+        self.response_bytes += other.response_bytes
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "histogram": self.histogram.to_dict(),
+            "errors": self.errors,
+            "connect_ms": self.connect_ms,
+            "ttfb_ms": self.ttfb_ms,
+            "response_bytes": self.response_bytes,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "EndpointStats":
+        stats = cls()
+        stats.histogram = LatencyHistogram.from_dict(data["histogram"])
+        stats.errors = data["errors"]
+        stats.connect_ms = data["connect_ms"]
+        stats.ttfb_ms = data["ttfb_ms"]
+        stats.response_bytes = data["response_bytes"]
+        return stats
+
+
+def new_test_stats() -> dict[str, float]:
+    """
+    Сводка по тесту. Время HTTP раскладывается на connect (установка соединений),
+    server (ожидание заголовков ответа без connect) и transfer (чтение тела);
+    other — все остальное время теста: фикстуры, SQL, код самого теста.
+    """
+    keys = ("setup_ms", "call_ms", "teardown_ms", "requests", "connect_ms", "server_ms", "transfer_ms")
+    return dict.fromkeys(keys, 0)
+
+
+class HTTPTimingPlugin:
+    def __init__(self, top: int, attach_allure: bool) -> None:
+        """
+        Pytest-плагин, который собирает замеры запросов APIClient по эндпоинтам и по тестам
+        и в конце сессии печатает самые медленные из них.
+        Под xdist воркеры передают свои сводки контроллеру, и отчет строится по всем воркерам.
+        Запрос засчитывается тесту, от имени которого он отправлен (RequestTiming.owner), а не тесту,
+        который идет в момент ответа: запросы фоновых потоков (запас постов) попадают только в сводку эндпоинтов.
+        """
+        self.top = top
+        self.attach_allure = attach_allure
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.tests: dict[str, dict[str, float]] = {}
+        self._current: str | None = None
+        self._requests: list[tuple[str, RequestTiming]] = []
+        self._phase = "setup"
+        # Замеры приходят и из потоков пулов (дубли политики задержек, предзагрузка страниц)
+        self._lock = threading.Lock()
+
+    def _on_request(self, timing: RequestTiming) -> None:
+        with self._lock:
+            self.endpoints.setdefault(timing.endpoint, EndpointStats()).add(timing)
+            if timing.owner is None:
+                return
+            stats = self.tests.setdefault(timing.owner, new_test_stats())
+            stats["requests"] += 1
+            stats["connect_ms"] += timing.connect_ms
+            stats["server_ms"] += timing.ttfb_ms - timing.connect_ms
+            stats["transfer_ms"] += timing.total_ms - timing.ttfb_ms
+            if self.attach_allure and timing.owner == self._current:
+                self._requests.append((self._phase, timing))
+
+    def pytest_sessionstart(self, session: pytest.Session) -> None:
+        add_request_hook(self._on_request)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_protocol(self, item: pytest.Item) -> Generator[None, Any, Any]:
+        with self._lock:
+            self.tests.setdefault(item.nodeid, new_test_stats())
+            self._current = item.nodeid
+            self._requests = []
+        token = REQUEST_OWNER.set(item.nodeid)
+        try:
+            return (yield)
+        finally:
+            REQUEST_OWNER.reset(token)
+            with self._lock:
+                self._current = None
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_setup(self, item: pytest.Item) -> Generator[None, Any, Any]:
+        self._phase = "setup"
+        return (yield)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_call(self, item: pytest.Item) -> Generator[None, Any, Any]:
+        self._phase = "call"
+        return (yield)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_teardown(self, item: pytest.Item) -> Generator[None, Any, Any]:
+        self._phase = "teardown"
+        try:
+            return (yield)
+        finally:
+            if self.attach_allure and self._requests:
+                import allure
+
+                allure.attach(self._format_requests(), name="HTTP timings", attachment_type=allure.attachment_type.TEXT)
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        # Длительности фаз контроллер xdist получает из отчетов воркеров, а замеры HTTP — в pytest_testnodedown
+        if report.when in PHASES:
+            self.tests.setdefault(report.nodeid, new_test_stats())[f"{report.when}_ms"] += report.duration * 1000
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node: Any, error: Any) -> None:
+        """Контроллер xdist: добавляет сводки завершившегося воркера."""
+        data = getattr(node, "workeroutput", {}).get(WORKER_OUTPUT_KEY)
+        if not data:
+            return
+        for endpoint, stats in data["endpoints"].items():
+            self.endpoints.setdefault(endpoint, EndpointStats()).merge(EndpointStats.from_dict(stats))
+        for nodeid, stats in data["tests"].items():
+            target = self.tests.setdefault(nodeid, new_test_stats())
+            for key in ("requests", "connect_ms", "server_ms", "transfer_ms"):
+                target[key] += stats[key]
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        remove_request_hook(self._on_request)
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput[WORKER_OUTPUT_KEY] = {
+                "endpoints": {endpoint: stats.to_dict() for endpoint, stats in self.endpoints.items()},
+                "tests": self.tests,
+            }
+
+    def _format_requests(self) -> str:
+        lines = [f"{'phase':<10}{'request':<36}{'status':>7}{'connect':>10}{'ttfb':>10}{'total':>10}{'bytes':>10}"]
+        for phase, timing in self._requests:
+            lines.append(
+                f"{phase:<10}{timing.endpoint:<36}{timing.status:>7}{timing.connect_ms:>10.1f}"
+                f"{timing.ttfb_ms:>10.1f}{timing.total_ms:>10.1f}{timing.response_bytes:>10}"
+            )
+        return "\n".join(lines)
+
+    def pytest_terminal_summary(self, terminalreporter: Any) -> None:
+        if not self.endpoints or hasattr(terminalreporter.config, "workeroutput"):
+            return
+        write = terminalreporter.write_line
+
+        terminalreporter.write_sep("=", f"slowest {self.top} HTTP endpoints (ms)")
+        write(f"{'endpoint':<36}{'count':>7}{'errors':>7}{'p50':>9}{'p95':>9}{'max':>9}{'connect':>9}{'ttfb':>9}")
+        ranked = sorted(self.endpoints.items(), key=lambda item: item[1].histogram.percentile(95), reverse=True)
+        for endpoint, stats in ranked[: self.top]:
+            histogram = stats.histogram
+            summary = histogram.summary()
+            write(
+                f"{endpoint:<36}{histogram.count:>7}{stats.errors:>7}{summary['p50_ms']:>9.1f}"
+                f"{summary['p95_ms']:>9.1f}{summary['max_ms']:>9.1f}"
+                f"{stats.connect_ms / histogram.count:>9.1f}{stats.ttfb_ms / histogram.count:>9.1f}"
+            )
+
+        terminalreporter.write_sep("=", f"slowest {self.top} tests (ms)")
+        write(f"{'duration':>9}{'requests':>9}{'server':>9}{'connect':>9}{'transfer':>9}{'other':>9}  test")
+
+        def duration(stats: dict[str, float]) -> float:
+            return stats["setup_ms"] + stats["call_ms"] + stats["teardown_ms"]
+
+        for nodeid, stats in sorted(self.tests.items(), key=lambda item: duration(item[1]), reverse=True)[: self.top]:
+            http = stats["connect_ms"] + stats["server_ms"] + stats["transfer_ms"]
+            write(
+                f"{duration(stats):>9.1f}{int(stats['requests']):>9}{stats['server_ms']:>9.1f}"
+                f"{stats['connect_ms']:>9.1f}{stats['transfer_ms']:>9.1f}{duration(stats) - http:>9.1f}  {nodeid}"
+            )
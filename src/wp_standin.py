@@ -0,0 +1,403 @@
+"""
+Легковесная замена WordPress для маршрутов wp/v2/posts и batch/v1, которыми пользуется APIClient.
+
+Посты хранятся в SQLite со схемой wp_posts, поэтому проверки DBClient (DB_DRIVER=sqlite) работают как с MySQL.
+Запуск отдельным процессом:
+    python -m src.wp_standin --db /tmp/wp.sqlite --port 8000
+"""
+
+import argparse
+import base64
+import json
+import math
+import re
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+from src import sqlite_driver
+from src.db_client import make_post_name
+
+STANDIN_URL = "standin"
+
+VALID_STATUSES = ("publish", "future", "draft", "pending", "private")
+POST_ROUTE = re.compile(r"^/wp/v2/posts/(?P<id>\d+)$")
+POST_COLUMNS = (
+    "ID, post_author, post_date, post_date_gmt, post_content, post_title, post_excerpt, post_status, "
+    "comment_status, ping_status, post_name, post_modified, post_modified_gmt, guid"
+)
+
+
+def _error(status: int, code: str, message: str, **data: Any) -> tuple[int, dict[str, Any], dict[str, str]]:
+    return status, {"code": code, "message": message, "data": {"status": status, **data}}, {}
+
+
+def _invalid_param(
+    name: str, message: str, code: str = "rest_invalid_param", detail: str = "rest_not_in_enum"
+) -> tuple[int, Any, dict[str, str]]:
+    return _error(
+        400,
+        code,
+        f"Invalid parameter(s): {name}",
+        params={name: message},
+        details={name: {"code": detail, "message": message, "data": None}},
+    )
+
+
+def _iso(value: Any) -> str:
+    return str(value).replace(" ", "T")
+
+
+def _raw(value: Any) -> str:
+    """Поле title/content в запросе может быть строкой или объектом {"raw": ...}."""
+    if isinstance(value, dict):
+        return str(value.get("raw", ""))
+    return "" if value is None else str(value)
+
+
+def _as_bool(value: Any) -> bool:
+    return str(value).lower() in ("1", "true")
+
+
+def _project(data: dict[str, Any], fields: str) -> dict[str, Any]:
+    """Оставляет в объекте только поля из _fields (поддерживаются вложенные поля через точку)."""
+    projected: dict[str, Any] = {}
+    for field in filter(None, (name.strip() for name in fields.split(","))):
+        top, _, nested = field.partition(".")
+        if top not in data:
+            continue
+        if nested and isinstance(data[top], dict):
+            if nested in data[top]:
+                projected.setdefault(top, {})[nested] = data[top][nested]
+        else:
+            projected[top] = data[top]
+    return projected
+
+
+class WPStandIn:
+    def __init__(self, database: str, base_url: str = "", user: str | None = None, password: str | None = None) -> None:
+        """
+        Логика маршрутов без HTTP: dispatch принимает метод, маршрут, параметры и тело
+        и возвращает статус, JSON-ответ и заголовки, как это делает WordPress.
+        """
+        self.connection = sqlite_driver.connect(database)
+        self.base_url = base_url
+        self.credentials = None
+        if user is not None and password is not None:
+            self.credentials = "Basic " + base64.b64encode(f"{user}:{password}".encode()).decode()
+        # Один SQLite-коннект на сервер: запросы обрабатываются по одному
+        self._lock = threading.RLock()
+
+    def _query(self, query: str, params: tuple[Any, ...] = ()) -> list[dict[str, Any]]:
+        with self.connection.cursor(dictionary=True) as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall() if cursor.with_rows else []
+
+    def _load(self, post_id: int) -> dict[str, Any] | None:
+        rows = self._query(f"SELECT {POST_COLUMNS} FROM wp_posts WHERE ID = %s AND post_type = 'post'", (post_id,))
+        return rows[0] if rows else None
+
+    def _serialize(self, row: dict[str, Any], context: str) -> dict[str, Any]:
+        content = row["post_content"]
+        data: dict[str, Any] = {
+            "id": row["ID"],
+            "date": _iso(row["post_date"]),
+            "date_gmt": _iso(row["post_date_gmt"]),
+            "guid": {"rendered": row["guid"], "raw": row["guid"]},
+            "modified": _iso(row["post_modified"]),
+            "modified_gmt": _iso(row["post_modified_gmt"]),
+            "slug": row["post_name"],
+            "status": row["post_status"],
+            "type": "post",
+            "link": f"{self.base_url}?p={row['ID']}",
+            "title": {"raw": row["post_title"], "rendered": row["post_title"]},
+            "content": {
+                "raw": content,
+                "rendered": f"<p>{content}</p>\n" if content.strip() else "",
+                "protected": False,
+                "block_version": 0,
+            },
+            "excerpt": {"raw": row["post_excerpt"], "rendered": row["post_excerpt"], "protected": False},
+            "author": row["post_author"],
+            "comment_status": row["comment_status"],
+            "ping_status": row["ping_status"],
+            "sticky": False,
+            "format": "standard",
+            "meta": [],
+            "categories": [],
+            "tags": [],
+        }
+        if context != "edit":
+            for field in ("guid", "title", "content", "excerpt"):
+                data[field].pop("raw", None)
+        return data
+
+    def dispatch(
+        self, method: str, route: str, params: dict[str, Any], body: Any, authorization: str | None = None
+    ) -> tuple[int, Any, dict[str, str]]:
+        """Обрабатывает один запрос к REST API."""
+        with self._lock:
+            return self._dispatch(method.upper(), route, params, body, authorization)
+
+    def _dispatch(
+        self, method: str, route: str, params: dict[str, Any], body: Any, authorization: str | None
+    ) -> tuple[int, Any, dict[str, str]]:
+        context = params.get("context", "view")
+        needs_auth = method != "GET" or context == "edit"
+        if self.credentials is not None and needs_auth and authorization != self.credentials:
+            return _error(401, "rest_not_logged_in", "You are not currently logged in.")
+
+        if route in ("", "/"):
+            return 200, {"name": "WordPress stand-in", "namespaces": ["wp/v2", "batch/v1"]}, {}
+        if route == "/batch/v1" and method == "POST":
+            return self._batch(body or {}, authorization)
+        if route == "/wp/v2/posts":
+            if method == "GET":
+                return self._list(params, context)
+            if method == "POST":
+                return self._create(body or {})
+
+        match = POST_ROUTE.match(route)
+        if match:
+            post_id = int(match.group("id"))
+            if method == "GET":
+                return self._get(post_id, context)
+            if method in ("POST", "PUT", "PATCH"):
+                return self._update(post_id, body or {})
+            if method == "DELETE":
+                return self._delete(post_id, _as_bool(params.get("force", False)))
+
+        return _error(404, "rest_no_route", "No route was found matching the URL and request method.")
+
+    def _validate_status(self, body: dict[str, Any]) -> tuple[int, Any, dict[str, str]] | None:
+        if "status" in body and body["status"] not in VALID_STATUSES:
+            return _invalid_param("status", f"status is not one of {', '.join(VALID_STATUSES)}.")
+        return None
+
+    def _get(self, post_id: int, context: str) -> tuple[int, Any, dict[str, str]]:
+        row = self._load(post_id)
+        if row is None:
+            return _error(404, "rest_post_invalid_id", "Invalid post ID.")
+        return 200, self._serialize(row, context), {}
+
+    def _list(self, params: dict[str, Any], context: str) -> tuple[int, Any, dict[str, str]]:
+        try:
+            per_page = int(params.get("per_page", 10))
+            page = int(params.get("page", 1))
+        except ValueError:
+            return _invalid_param("per_page", "per_page is not of type integer.", detail="rest_invalid_type")
+        if not 1 <= per_page <= 100:
+            return _invalid_param("per_page", "per_page must be between 1 (inclusive) and 100 (inclusive)")
+
+        statuses = str(params.get("status", "publish")).split(",")
+        where = ["post_type = 'post'", f"post_status IN ({', '.join(['%s'] * len(statuses))})"]
+        values: list[Any] = list(statuses)
+        include = params.get("include")
+        if include:
+            ids = []
+            # Как wp_parse_list: пустые элементы между запятыми отбрасываются
+            items = [item.strip() for item in str(include).split(",") if item.strip()]
+            for index, post_id in enumerate(items):
+                if not post_id.isdigit():
+                    message = f"include[{index}] is not of type integer."
+                    return _invalid_param("include", message, detail="rest_invalid_type")
+                ids.append(int(post_id))
+            if ids:
+                where.append(f"ID IN ({', '.join(['%s'] * len(ids))})")
+                values.extend(ids)
+
+        order = "ASC" if str(params.get("order", "desc")).lower() == "asc" else "DESC"
+        order_columns = {"id": "ID", "title": "post_title", "modified": "post_modified"}
+        order_by = order_columns.get(params.get("orderby"), "post_date")
+        condition = " AND ".join(where)
+
+        total = self._query(f"SELECT count(*) AS count FROM wp_posts WHERE {condition}", tuple(values))[0]["count"]
+        total_pages = math.ceil(total / per_page)
+        if total and page > total_pages:
+            return _error(
+                400,
+                "rest_post_invalid_page_number",
+                "The page number requested is larger than the number of pages available.",
+            )
+
+        rows = self._query(
+            f"SELECT {POST_COLUMNS} FROM wp_posts WHERE {condition} "
+            f"ORDER BY {order_by} {order}, ID {order} LIMIT %s OFFSET %s",
+            (*values, per_page, (page - 1) * per_page),
+        )
+        posts = [self._serialize(row, context) for row in rows]
+        fields = params.get("_fields")
+        if fields:
+            posts = [_project(post, fields) for post in posts]
+        return 200, posts, {"X-WP-Total": str(total), "X-WP-TotalPages": str(total_pages)}
+
+    def _create(self, body: dict[str, Any]) -> tuple[int, Any, dict[str, str]]:
+        invalid = self._validate_status(body)
+        if invalid:
+            return invalid
+
+        title = _raw(body.get("title"))
+        status = body.get("status", "draft")
+        now = datetime.now()
+        now_gmt = datetime.now(timezone.utc).replace(tzinfo=None)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO wp_posts (post_author, post_date, post_date_gmt, post_content, post_title, post_excerpt, "
+                "post_status, post_name, post_modified, post_modified_gmt) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                (
+                    int(body.get("author", 1)),
+                    now,
+                    now_gmt,
+                    _raw(body.get("content")),
+                    title,
+                    _raw(body.get("excerpt")),
+                    status,
+                    make_post_name(title) if status == "publish" else "",
+                    now,
+                    now_gmt,
+                ),
+            )
+            post_id = cursor.lastrowid
+            cursor.execute("UPDATE wp_posts SET guid = %s WHERE ID = %s", (f"{self.base_url}?p={post_id}", post_id))
+        return 201, self._serialize(self._load(post_id), "edit"), {}
+
+    def _update(self, post_id: int, body: dict[str, Any]) -> tuple[int, Any, dict[str, str]]:
+        # Как в WordPress, аргументы проверяются до поиска поста: неверный status дает 400 и для несуществующего ID
+        invalid = self._validate_status(body)
+        if invalid:
+            return invalid
+        row = self._load(post_id)
+        if row is None:
+            return _error(404, "rest_post_invalid_id", "Invalid post ID.")
+
+        changes: dict[str, Any] = {}
+        if "title" in body:
+            changes["post_title"] = _raw(body["title"])
+        if "content" in body:
+            changes["post_content"] = _raw(body["content"])
+        if "excerpt" in body:
+            changes["post_excerpt"] = _raw(body["excerpt"])
+        if "status" in body:
+            changes["post_status"] = body["status"]
+        if changes.get("post_status", row["post_status"]) == "publish" and not row["post_name"]:
+            changes["post_name"] = make_post_name(changes.get("post_title", row["post_title"]))
+        changes["post_modified"] = datetime.now()
+        changes["post_modified_gmt"] = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        assignments = ", ".join(f"{column} = %s" for column in changes)
+        self._query(f"UPDATE wp_posts SET {assignments} WHERE ID = %s", (*changes.values(), post_id))
+        return 200, self._serialize(self._load(post_id), "edit"), {}
+
+    def _delete(self, post_id: int, force: bool) -> tuple[int, Any, dict[str, str]]:
+        row = self._load(post_id)
+        if row is None:
+            return _error(404, "rest_post_invalid_id", "Invalid post ID.")
+        previous = self._serialize(row, "edit")
+
+        if not force:
+            if row["post_status"] == "trash":
+                return _error(410, "rest_already_trashed", "The post has already been deleted.")
+            self._query("UPDATE wp_posts SET post_status = 'trash' WHERE ID = %s", (post_id,))
+            return 200, self._serialize(self._load(post_id), "edit"), {}
+
+        self._query("DELETE FROM wp_postmeta WHERE post_id = %s", (post_id,))
+        self._query("DELETE FROM wp_term_relationships WHERE object_id = %s", (post_id,))
+        self._query("DELETE FROM wp_posts WHERE ID = %s", (post_id,))
+        return 200, {"deleted": True, "previous": previous}, {}
+
+    def _batch(self, body: dict[str, Any], authorization: str | None) -> tuple[int, Any, dict[str, str]]:
+        requests = body.get("requests") or []
+        if len(requests) > 25:
+            return _invalid_param("requests", "requests must contain at most 25 items.")
+
+        responses = []
+        for request in requests:
+            path = urlsplit(request.get("path", ""))
+            params = dict(parse_qsl(path.query))
+            status, data, headers = self._dispatch(
+                request.get("method", "POST").upper(), path.path, params, request.get("body"), authorization
+            )
+            responses.append({"body": data, "status": status, "headers": headers})
+        return 207, {"responses": responses}, {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело уходят отдельными send: без TCP_NODELAY keep-alive упирается в delayed ACK (~40 мс)
+    disable_nagle_algorithm = True
+    server: "StandInServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _handle(self) -> None:
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        route = params.pop("rest_route", None)
+        if route is None:
+            route = url.path.removeprefix("/wp-json")
+
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw_body) if raw_body else None
+        except json.JSONDecodeError:
+            status, data, headers = _error(400, "rest_invalid_json", "Invalid JSON body passed.")
+        else:
+            status, data, headers = self.server.app.dispatch(
+                self.command, route, params, body, self.headers.get("Authorization")
+            )
+
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, database: str, host: str, port: int, user: str | None, password: str | None) -> None:
+        super().__init__((host, port), _Handler)
+        self.base_url = f"http://{host}:{self.server_address[1]}/index.php?rest_route=/"
+        self.app = WPStandIn(database, self.base_url, user, password)
+
+
+def start_standin(
+    database: str, host: str = "127.0.0.1", port: int = 0, user: str | None = None, password: str | None = None
+) -> StandInServer:
+    """
+    Запускает заглушку в фоновом потоке текущего процесса.
+    base_url сервера подставляется в Config.BASE_URL вместо адреса WordPress.
+    """
+    server = StandInServer(database, host, port, user, password)
+    threading.Thread(target=server.serve_forever, args=(0.05,), name="wp-standin", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="путь к SQLite-файлу")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    server = StandInServer(args.db, args.host, args.port, args.user, args.password)
+    print(f"WordPress stand-in: {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
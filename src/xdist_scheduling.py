@@ -0,0 +1,194 @@
+import heapq
+import statistics
+from collections.abc import Generator, Sequence
+from typing import Any
+
+import pytest
+from xdist.scheduler import WorkStealingScheduling
+from xdist.scheduler.worksteal import MIN_PENDING, NodePending
+
+CACHE_KEY = "sdet_wordpress/durations"
+# Вес нового замера в скользящем среднем: одиночный медленный прогон не переворачивает план целиком
+SMOOTHING = 0.5
+
+
+def group_units(
+    collection: Sequence[str], history: dict[str, dict[str, Any]], group_fixtures: Sequence[str] = ()
+) -> list[list[int]]:
+    """
+    Делит индексы тестов на единицы планирования: тесты, использующие одни и те же фикстуры из group_fixtures
+    (по истории прошлых прогонов), образуют одну единицу, остальные тесты — по одному.
+    """
+    units: dict[Any, list[int]] = {}
+    for index, nodeid in enumerate(collection):
+        fixtures = history.get(nodeid, {}).get("fixtures", ())
+        shared = tuple(sorted(set(group_fixtures).intersection(fixtures)))
+        units.setdefault(shared or nodeid, []).append(index)
+    return list(units.values())
+
+
+def plan_by_duration(
+    collection: Sequence[str],
+    history: dict[str, dict[str, Any]],
+    workers: int,
+    group_fixtures: Sequence[str] = (),
+) -> tuple[list[list[int]], list[int]]:
+    """
+    Раскладывает тесты по воркерам жадно, от самых долгих к коротким (LPT): очередной тест уходит
+    наименее загруженному воркеру. Единица из group_units попадает на один воркер целиком.
+    Возвращает индексы тестов для каждого воркера и индексы тестов без истории — их раздает work stealing.
+    """
+    known = [history[nodeid]["duration"] for nodeid in collection if nodeid in history]
+    estimate = statistics.median(known) if known else 0.0
+    timed: list[tuple[float, list[int]]] = []
+    unknown: list[int] = []
+    for indices in group_units(collection, history, group_fixtures):
+        if not any(collection[index] in history for index in indices):
+            unknown.extend(indices)
+            continue
+        duration = sum(history.get(collection[index], {}).get("duration", estimate) for index in indices)
+        timed.append((duration, indices))
+
+    plan: list[list[int]] = [[] for _ in range(workers)]
+    loads = [(0.0, worker) for worker in range(workers)]
+    for duration, indices in sorted(timed, key=lambda unit: unit[0], reverse=True):
+        load, worker = heapq.heappop(loads)
+        plan[worker].extend(indices)
+        heapq.heappush(loads, (load + duration, worker))
+    return plan, sorted(unknown)
+
+
+class DurationScheduling(WorkStealingScheduling):
+    def __init__(
+        self, config: pytest.Config, log: Any, history: dict[str, dict[str, Any]], group_fixtures: Sequence[str]
+    ) -> None:
+        """
+        Планировщик xdist: начальное распределение — по длительностям тестов из прошлых прогонов,
+        новые тесты и остаток очередей раздаются work stealing, как в --dist worksteal.
+        Группы тестов с общими фикстурами из group_fixtures не разрываются и при work stealing.
+        """
+        super().__init__(config, log)
+        self.history = history
+        self.group_fixtures = group_fixtures
+        # Индекс теста -> все индексы его группы; тестов вне групп здесь нет
+        self.groups: dict[int, frozenset[int]] = {}
+
+    def schedule(self) -> None:
+        assert self.collection_is_completed
+        if self.collection is not None or not self._check_nodes_have_same_collection():
+            super().schedule()
+            return
+
+        self.collection = next(iter(self.node2collection.values()))
+        if not self.collection:
+            return
+        nodes = self.nodes
+        for unit in group_units(self.collection, self.history, self.group_fixtures):
+            if len(unit) > 1:
+                self.groups.update(dict.fromkeys(unit, frozenset(unit)))
+        plan, unknown = plan_by_duration(self.collection, self.history, len(nodes), self.group_fixtures)
+        for node, indices in zip(nodes, plan):
+            if indices:
+                self.node2pending[node].extend(indices)
+                node.send_runtest_some(indices)
+        self.pending[:] = unknown
+        self.check_schedule()
+
+    def _stealable(self, pending: list[int]) -> list[int]:
+        """
+        Индексы, которые можно забрать из очереди воркера: хвост очереди того же размера, что у WorkStealingScheduling,
+        без групп, часть которых осталась у воркера (в начале очереди или уже выполнена).
+        """
+        num_steal = min(len(pending) // 2, max(0, len(pending) - MIN_PENDING))
+        if num_steal == 0:
+            return []
+        tail = pending[-num_steal:]
+        candidates = set(tail)
+        return [index for index in tail if self.groups.get(index, frozenset()) <= candidates]
+
+    def _send_tests(self, node: Any, num: int) -> None:
+        # Граница порции сдвигается за конец группы, чтобы ее тесты ушли одному воркеру
+        while 0 < num < len(self.pending) and self.pending[num] in self.groups.get(self.pending[num - 1], ()):
+            num += 1
+        super()._send_tests(node, num)
+
+    def check_schedule(self) -> None:
+        """
+        То же, что WorkStealingScheduling.check_schedule, но у воркера забираются только целые группы (_stealable).
+        Воркер отдает запрошенные тесты все сразу или ни одного, поэтому группа не делится и на его стороне.
+        """
+        nodes_up = [
+            NodePending(node, pending) for node, pending in self.node2pending.items() if not node.shutting_down
+        ]
+
+        def get_idle_nodes() -> list[Any]:
+            return [node for node, pending in nodes_up if len(pending) < MIN_PENDING]
+
+        idle_nodes = get_idle_nodes()
+        if not idle_nodes:
+            return
+        if self.pending:
+            for i, node in enumerate(idle_nodes):
+                self._send_tests(node, len(self.pending) // (len(idle_nodes) - i))
+            idle_nodes = get_idle_nodes()
+            if not idle_nodes:
+                return
+        if self.steal_requested_from_node is not None:
+            return
+
+        steal_from = max(nodes_up, key=lambda node_pending: len(node_pending.pending), default=None)
+        indices = self._stealable(steal_from.pending) if steal_from is not None else []
+        if not indices:
+            # Забрать нечего: простаивающие воркеры завершаются, как в WorkStealingScheduling
+            for node in idle_nodes:
+                node.shutdown()
+            return
+        steal_from.node.send_steal(indices)
+        self.steal_requested_from_node = steal_from.node
+
+
+class DurationSchedulingPlugin:
+    def __init__(self, config: pytest.Config, group_fixtures: Sequence[str]) -> None:
+        """
+        Запоминает длительность каждого теста (setup + call + teardown) в кэше pytest между прогонами
+        и под pytest -n подменяет стандартное распределение на DurationScheduling.
+        """
+        self.config = config
+        # С -p no:cacheprovider у конфига нет cache: тогда история просто не сохраняется
+        self.cache: pytest.Cache | None = getattr(config, "cache", None)
+        self.group_fixtures = tuple(group_fixtures)
+        self.history: dict[str, dict[str, Any]] = self.cache.get(CACHE_KEY, {}) if self.cache else {}
+        self.durations: dict[str, float] = {}
+        self.fixtures: dict[str, list[str]] = {}
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_make_scheduler(self, config: pytest.Config, log: Any) -> DurationScheduling | None:
+        if config.getoption("dist") not in ("load", "worksteal"):
+            return None
+        return DurationScheduling(config, log, self.history, self.group_fixtures)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(self, item: pytest.Item, call: pytest.CallInfo[None]) -> Generator[None, Any, Any]:
+        report = yield
+        if call.when == "setup":
+            # Поле отчета доезжает с воркера до контроллера вместе с самим отчетом
+            report.fixture_names = list(item.fixturenames)
+        return report
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if hasattr(self.config, "workeroutput"):
+            return
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0.0) + report.duration
+        if report.when == "setup" and hasattr(report, "fixture_names"):
+            self.fixtures[report.nodeid] = report.fixture_names
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        if hasattr(self.config, "workeroutput") or not self.cache or not self.durations:
+            return
+        for nodeid, duration in self.durations.items():
+            previous = self.history.get(nodeid)
+            if previous is not None:
+                duration = previous["duration"] + SMOOTHING * (duration - previous["duration"])
+            fixtures = self.fixtures.get(nodeid, previous["fixtures"] if previous else [])
+            self.history[nodeid] = {"duration": round(duration, 6), "fixtures": fixtures}
+        self.cache.set(CACHE_KEY, self.history)
@@ -1,44 +1,271 @@
+import asyncio
 import uuid
 from collections.abc import Callable
+from pathlib import Path
 from typing import Any
 
 import allure
 import pytest
+import requests
 
-from src.api_client import APIClient
+from config import Config
+from src.api_client import APIClient, create_session
+from src.async_api_client import AsyncAPIClient, ConcurrentRequestsError
+from src.cassette import Cassette, cassette_path
+from src.cleanup import DeferredCleanup
 from src.db_client import DBClient
+from src.db_profiler import QueryProfiler
+from src.db_profiler_plugin import DBProfilerPlugin
+from src.latency_policy import LatencyPolicy
+from src.post_pool import DEFAULT_CONTENT, DEFAULT_STATUS, PostPool
+from src.sharding import clone_schema, current_shard
+from src.timing_plugin import HTTPTimingPlugin
+from src.wp_standin import STANDIN_URL, StandInServer, start_standin
+
+
+def apply_uuid(value: str, uuid_placeholder: str, unique_id: str) -> str:
+    """Подставляет unique_id вместо плейсхолдера в строку."""
+    if isinstance(value, str) and uuid_placeholder in value:
+        return value.replace(uuid_placeholder, unique_id)
+    return value
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """
+    При WP_API_TIMING подключает отчет о самых медленных эндпоинтах и тестах,
+    при DB_PROFILE — профилировщик запросов DBClient,
+    при ALLURE_BUFFERED, ALLURE_FAILURE_ATTACHMENTS или ALLURE_STEPS=summary — облегченную отчетность Allure,
+    при XDIST_DURATION_SCHEDULING — распределение тестов по воркерам xdist с учетом их длительности,
+    при RESULT_CACHE — пропуск тестов, прошедших с тем же отпечатком кода и окружения.
+    """
+    if Config.API_TIMING:
+        config.pluginmanager.register(HTTPTimingPlugin(Config.API_TIMING_TOP, Config.API_TIMING_ALLURE), "http_timing")
+    if Config.DB_PROFILE:
+        profiler = QueryProfiler(Config.DB_PROFILE_REPEAT_THRESHOLD)
+        config.pluginmanager.register(DBProfilerPlugin(profiler, Path(Config.DB_PROFILE_REPORT)), "db_profiler")
+    reporting_enabled = Config.ALLURE_BUFFERED or Config.ALLURE_FAILURE_ATTACHMENTS or Config.ALLURE_STEPS == "summary"
+    if reporting_enabled:
+        from src.allure_plugin import AllureReportingPlugin
+
+        plugin = AllureReportingPlugin(
+            buffered=Config.ALLURE_BUFFERED,
+            summary_sample=Config.ALLURE_STEP_SAMPLE if Config.ALLURE_STEPS == "summary" else None,
+            exchanges=Config.ALLURE_EXCHANGES if Config.ALLURE_FAILURE_ATTACHMENTS else None,
+        )
+        config.pluginmanager.register(plugin, "allure_reporting")
+    if Config.XDIST_DURATION_SCHEDULING:
+        # Планировщики xdist нужны только здесь: без флага воркеры не платят за их импорт
+        from src.xdist_scheduling import DurationSchedulingPlugin
+
+        plugin = DurationSchedulingPlugin(config, Config.XDIST_GROUP_FIXTURES)
+        config.pluginmanager.register(plugin, "duration_scheduling")
+    if Config.RESULT_CACHE:
+        from src.result_cache import ResultCachePlugin
+
+        config.pluginmanager.register(ResultCachePlugin(config, Config.RESULT_CACHE_FORCE), "result_cache")
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item: pytest.Item) -> Any:
+    """
+    Сверяет отложенные проверки db_client.expect/expect_absent, оставшиеся к концу теста,
+    чтобы расхождения роняли сам тест, а не его teardown.
+    """
+    db_client = item.funcargs.get("db_client")
+    try:
+        result = yield
+    except BaseException:
+        if db_client is not None:
+            db_client.clear_expectations()
+        raise
+    if db_client is not None:
+        db_client.flush_expectations()
+    return result
+
+
+@pytest.fixture(scope="session", autouse=True)
+def wp_standin(tmp_path_factory: pytest.TempPathFactory) -> StandInServer | None:
+    """
+    При WP_BASE_URL=standin поднимает в процессе заглушку WordPress на SQLite
+    и направляет на нее APIClient и DBClient (DB_DRIVER=sqlite).
+    Под xdist у каждого воркера своя заглушка и свой файл БД.
+    """
+    if Config.BASE_URL != STANDIN_URL:
+        yield None
+        return
+
+    if Config.DB_DRIVER != "sqlite" or not Config.DB_NAME:
+        Config.DB_DRIVER = "sqlite"
+        Config.DB_NAME = str(tmp_path_factory.mktemp("wp_standin") / "wp.sqlite")
+    server = start_standin(Config.DB_NAME, user=Config.API_USER, password=Config.API_PASSWORD)
+    Config.BASE_URL = server.base_url
+    yield server
+    server.shutdown()
+    Config.BASE_URL = STANDIN_URL
+
+
+@pytest.fixture(scope="session", autouse=True)
+def worker_shard() -> str | None:
+    """
+    При DB_SHARDING под xdist клонирует шаблонную схему DB_NAME в отдельную схему воркера
+    в начале сессии. DBClient и APIClient дальше работают с ней сами.
+    """
+    shard = current_shard()
+    if shard is not None:
+        template_client = DBClient(database=Config.DB_NAME)
+        try:
+            clone_schema(template_client, Config.DB_NAME, shard)
+        finally:
+            template_client.close()
+    return shard
+
+
+@pytest.fixture(scope="session")
+@allure.title("Готовим HTTP-сессию воркера")
+def http_session() -> requests.Session:
+    """
+    Одна requests.Session на сессию (под xdist — на воркер): keep-alive соединения и TLS-сессии
+    переживают границы тестов, и первый запрос теста не платит за установку соединения.
+    """
+    session = create_session()
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+@allure.title("Готовим политику задержек API")
+def latency_policy() -> LatencyPolicy | None:
+    """
+    При WP_API_LATENCY_POLICY — одна политика задержек на сессию (под xdist — на воркер):
+    статистика задержек и состояние автомата отключения накапливаются между тестами.
+    """
+    if not Config.API_LATENCY_POLICY:
+        yield None
+        return
+    policy = LatencyPolicy.from_config()
+    yield policy
+    policy.close()
+
+
+@pytest.fixture(autouse=True)
+def cassette(request: pytest.FixtureRequest) -> Cassette | None:
+    """
+    При WP_API_CASSETTE_MODE=record/replay — кассета теста, который ходит в api_client или db_client.
+    В ней лежат и HTTP-обмены, и запросы к БД, поэтому тест с проверками через БД воспроизводится целиком.
+    Кассета подключается к db_client на время теста и сохраняется после него.
+    """
+    if Config.API_CASSETTE_MODE == "off" or not {"api_client", "db_client"} & set(request.fixturenames):
+        yield None
+        return
+
+    test_cassette = Cassette(cassette_path(request.node.nodeid), Config.API_CASSETTE_MODE)
+    db_client: DBClient | None = None
+    if "db_client" in request.fixturenames:
+        db_client = request.getfixturevalue("db_client")
+        db_client.cassette = test_cassette
+    yield test_cassette
+    if db_client is not None:
+        db_client.cassette = None
+    test_cassette.save()
 
 
 @pytest.fixture
 @allure.title("Готовим API клиента")
-def api_client() -> APIClient:
+def api_client(
+    request: pytest.FixtureRequest,
+    http_session: requests.Session,
+    latency_policy: LatencyPolicy | None,
+    cassette: Cassette | None,
+) -> APIClient:
     """
     Фикстура для работы с API.
-    Создает экземпляр клиента для каждого теста.
+    Создает экземпляр клиента для каждого теста поверх общей HTTP-сессии воркера.
+    Заголовки, авторизация, параметры и cookies сессии восстанавливаются после теста;
+    тесту с маркером isolated_http достается собственная сессия.
+    При WP_API_CASSETTE_MODE=record/replay подключает к клиенту кассету теста.
+    При WP_API_LATENCY_POLICY подключает общую политику задержек.
     """
-    return APIClient()
+    isolated = request.node.get_closest_marker("isolated_http") is not None
+    client = APIClient() if isolated else APIClient(session=http_session)
+    client.latency_policy = latency_policy
+    client.cassette = cassette
+    state = (http_session.headers.copy(), http_session.auth, dict(http_session.params))
 
+    yield client
 
-@pytest.fixture
+    if isolated:
+        client.session.close()
+    else:
+        http_session.headers, http_session.auth, http_session.params = state
+        http_session.cookies.clear()
+
+
+@pytest.fixture(scope="session")
 @allure.title("Готовим DB клиента")
-def db_client() -> DBClient:
+def db_client(request: pytest.FixtureRequest) -> DBClient:
     """
     Фикстура для работы с БД.
-    Создает клиента и передает его в тест.
-    После теста закрывает соединение.
+    Создает одного клиента с пулом соединений на всю сессию (под xdist — на воркер).
+    При DB_PROFILE запросы клиента идут через профилировщик.
+    В конце сессии закрывает соединения пула.
+    При WP_API_CASSETTE_MODE=record/replay запросы теста пишутся в его кассету или отдаются из нее (см. cassette).
     """
     client = DBClient()
+    profiler_plugin = request.config.pluginmanager.get_plugin("db_profiler")
+    if profiler_plugin is not None:
+        client.profiler = profiler_plugin.profiler
     yield client
     client.close()
 
 
+@pytest.fixture
+@allure.title("Открываем транзакцию с откатом")
+def db_rollback(request: pytest.FixtureRequest, db_client: DBClient) -> bool:
+    """
+    Изолирует SQL-подготовку и проверки теста транзакцией, которая откатывается после теста.
+    Если тест ходит в API, WordPress должен видеть данные, поэтому режим не включается:
+    данные коммитятся и удаляются cleanup_posts как обычно.
+    Возвращает True, если тест выполняется внутри транзакции.
+    """
+    if "api_client" in request.fixturenames:
+        yield False
+        return
+
+    with db_client.rollback_scope():
+        yield True
+
+
+@pytest.fixture(autouse=True)
+def _db_rollback_marker(request: pytest.FixtureRequest) -> None:
+    """Включает db_rollback для тестов с маркером @pytest.mark.db_rollback."""
+    if request.node.get_closest_marker("db_rollback"):
+        request.getfixturevalue("db_rollback")
+
+
+@pytest.fixture(scope="session")
+@allure.title("Готовим отложенную очистку постов")
+def deferred_cleanup(db_client: DBClient) -> DeferredCleanup | None:
+    """
+    Фоновая очередь удаления постов на всю сессию.
+    Включается через DB_DEFERRED_CLEANUP, иначе посты удаляются сразу в teardown теста.
+    """
+    if not Config.DB_DEFERRED_CLEANUP:
+        yield None
+        return
+
+    cleanup = DeferredCleanup(db_client, Config.DB_CLEANUP_INTERVAL)
+    yield cleanup
+    cleanup.close()
+
+
 @pytest.fixture
 @allure.title("Настраиваем пост-очистку")
-def cleanup_posts(db_client: DBClient) -> Callable[[int], None]:
+def cleanup_posts(request: pytest.FixtureRequest) -> Callable[[int], None]:
     """
     Фикстура для безопасной очистки постов после теста.
-    Собирает ID постов для удаления и безопасно удаляет их через БД,
-    проверяя существование перед удалением.
+    Собирает ID постов и удаляет их через БД одной транзакцией вместе с ревизиями,
+    метаданными и связями с терминами. Уже удаленные посты просто пропускаются.
+    При WP_API_CASSETTE_MODE=replay посты существуют только в кассете, поэтому БД не трогается вовсе.
     """
     posts_to_cleanup: list[int] = []
 
@@ -46,25 +273,67 @@ def cleanup_posts(db_client: DBClient) -> Callable[[int], None]:
         """Регистрирует пост для очистки после теста."""
         posts_to_cleanup.append(post_id)
 
+    if Config.API_CASSETTE_MODE == "replay":
+        yield _register_post
+        return
+
+    db_client: DBClient = request.getfixturevalue("db_client")
+    deferred_cleanup: DeferredCleanup | None = request.getfixturevalue("deferred_cleanup")
     yield _register_post
 
-    for post_id in posts_to_cleanup:
-        if db_client.post_exists(post_id):
-            db_client.delete_post(post_id)
+    if db_client.in_rollback_scope:
+        # Посты создавались внутри транзакции db_rollback и исчезнут при ее откате
+        return
+    if deferred_cleanup is not None:
+        deferred_cleanup.submit(posts_to_cleanup)
+    else:
+        db_client.delete_posts(posts_to_cleanup)
+
+
+@pytest.fixture(scope="session", autouse=True)
+@allure.title("Готовим запас постов")
+def post_pool(wp_standin: StandInServer | None, worker_shard: str | None) -> PostPool | None:
+    """
+    Запас постов по умолчанию, который фоновый поток создает заранее (WP_API_POST_POOL_SIZE > 0).
+    Зависит от wp_standin и worker_shard, чтобы посты создавались там же, куда ходят тесты.
+    При записи и воспроизведении кассет не используется: посты запаса не попадают в кассету теста.
+    Невыданные посты удаляются в конце сессии. DBClient для этого создается, только если они остались,
+    поэтому без запаса прогону только с API не нужны настройки БД.
+    """
+    if Config.API_POST_POOL_SIZE <= 0 or Config.API_CASSETTE_MODE != "off":
+        yield None
+        return
+
+    pool = PostPool(Config.API_POST_POOL_SIZE, Config.API_POST_POOL_LOW_WATER)
+    yield pool
+    leftover = pool.close()
+    if leftover:
+        client = DBClient()
+        try:
+            client.delete_posts(leftover)
+        finally:
+            client.close()
 
 
 @pytest.fixture
 @allure.title("Готовим фабрику постов")
 def make_post(
-    api_client: APIClient, cleanup_posts: Callable[[int], None]
+    api_client: APIClient, cleanup_posts: Callable[[int], None], post_pool: PostPool | None
 ) -> Callable[..., dict[str, Any]]:
     """
     Создает пост и автоматически удаляет его после теста.
+    Пост по умолчанию (без своих title, content и status) берется из запаса post_pool, если он включен.
     """
 
     def _make_post(
-        title: str | None = None, content: str = "Default Content", status: str = "publish"
+        title: str | None = None, content: str = DEFAULT_CONTENT, status: str = DEFAULT_STATUS
     ) -> dict[str, Any]:
+        if title is None and content == DEFAULT_CONTENT and status == DEFAULT_STATUS and post_pool is not None:
+            data = post_pool.take()
+            if data is not None:
+                cleanup_posts(data["id"])
+                return data
+
         if title is None:
             title = f"Auto Test Title {uuid.uuid4()}"
 
@@ -80,6 +349,65 @@ def make_post(
     return _make_post
 
 
+@pytest.fixture
+@allure.title("Готовим фабрику пачки постов")
+def make_posts(
+    api_client: APIClient, cleanup_posts: Callable[[int], None]
+) -> Callable[..., list[dict[str, Any]]]:
+    """
+    Создает несколько постов за раз и автоматически удаляет их после теста.
+    По умолчанию посты создаются конкурентно через AsyncAPIClient,
+    с via_batch=True — пачками через /batch/v1, при записи и воспроизведении кассет — по одному через api_client.
+    """
+
+    async def _create(payloads: list[dict[str, Any]], concurrency: int | None) -> list[Any]:
+        async with AsyncAPIClient() as client:
+            return await client.create_posts(payloads, concurrency=concurrency)
+
+    def _make_posts(
+        count: int,
+        content: str = "Default Content",
+        status: str = "publish",
+        concurrency: int | None = None,
+        via_batch: bool = False,
+    ) -> list[dict[str, Any]]:
+        payloads = [
+            {"title": f"Auto Test Title {uuid.uuid4()}", "content": content, "status": status} for _ in range(count)
+        ]
+        if via_batch:
+            with api_client.batch() as batch:
+                items = [batch.create_post(payload) for payload in payloads]
+            responses = [item.response for item in items]
+        elif api_client.cassette is not None:
+            # AsyncAPIClient не пишет кассету: при записи и воспроизведении посты создаются через api_client
+            responses = [api_client.create_post(payload) for payload in payloads]
+        else:
+            try:
+                responses = asyncio.run(_create(payloads, concurrency))
+            except ConcurrentRequestsError as error:
+                # Транспортная ошибка одного запроса: посты, созданные остальными, все равно уходят на очистку
+                for response in error.responses:
+                    if response.status_code == 201:
+                        cleanup_posts(response.json()["id"])
+                raise error.errors[0] from error
+
+        # Сначала регистрируем на очистку все созданные посты, иначе упавший запрос оставил бы остальные в WordPress
+        posts: list[dict[str, Any]] = []
+        failures: list[str] = []
+        for payload, response in zip(payloads, responses):
+            if response.status_code != 201:
+                failures.append(f"'{payload['title']}': {response.status_code} - {response.text}")
+                continue
+            data = response.json()
+            cleanup_posts(data["id"])
+            posts.append(data)
+        if failures:
+            pytest.fail(f"Не удалось создать {len(failures)} из {count} постов:\n" + "\n".join(failures))
+        return posts
+
+    return _make_posts
+
+
 @pytest.fixture
 @allure.title("Готовим фабрику постов через SQL")
 def make_post_via_sql(
@@ -98,14 +426,8 @@ def make_post_via_sql(
         uuid_placeholder: str = "{uuid}",
     ) -> dict[str, Any]:
         unique_id = str(uuid.uuid4())
-
-        def apply_uuid(value: str) -> str:
-            if isinstance(value, str) and uuid_placeholder in value:
-                return value.replace(uuid_placeholder, unique_id)
-            return value
-
-        resolved_title = apply_uuid(post_title)
-        resolved_content = apply_uuid(post_content)
+        resolved_title = apply_uuid(post_title, uuid_placeholder, unique_id)
+        resolved_content = apply_uuid(post_content, uuid_placeholder, unique_id)
 
         post_id = db_client.create_post_via_sql(
             post_title=resolved_title,
@@ -124,3 +446,51 @@ def make_post_via_sql(
         }
 
     return _make_post_via_sql
+
+
+@pytest.fixture
+@allure.title("Готовим фабрику пачки постов через SQL")
+def make_posts_via_sql(
+    db_client: DBClient, cleanup_posts: Callable[[int], None]
+) -> Callable[..., list[dict[str, Any]]]:
+    """
+    Создает count постов многострочными SQL INSERT и автоматически удаляет их после теста.
+    Каждому посту подставляется свой UUID в строки с плейсхолдером {uuid}.
+    """
+
+    def _make_posts_via_sql(
+        count: int,
+        post_title: str = "DB Auto Title [{uuid}]",
+        post_content: str = "DB Auto Content Body",
+        post_status: str = "publish",
+        post_author: int = 1,
+        uuid_placeholder: str = "{uuid}",
+        chunk_size: int = 500,
+    ) -> list[dict[str, Any]]:
+        unique_ids = [str(uuid.uuid4()) for _ in range(count)]
+        rows = [
+            {
+                "post_title": apply_uuid(post_title, uuid_placeholder, unique_id),
+                "post_content": apply_uuid(post_content, uuid_placeholder, unique_id),
+                "post_status": post_status,
+                "post_author": post_author,
+            }
+            for unique_id in unique_ids
+        ]
+
+        post_ids = db_client.create_posts_via_sql(rows, chunk_size=chunk_size)
+        for post_id in post_ids:
+            cleanup_posts(post_id)
+
+        return [
+            {
+                "id": post_id,
+                "title": {"raw": row["post_title"]},
+                "content": {"raw": row["post_content"]},
+                "status": post_status,
+                "uuid": unique_id,
+            }
+            for post_id, row, unique_id in zip(post_ids, rows, unique_ids)
+        ]
+
+    return _make_posts_via_sql
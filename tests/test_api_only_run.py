@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import allure
+import pytest
+
+from src.wp_standin import start_standin
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIG_PREFIXES = ("WP_", "DB_", "ALLURE_", "XDIST_", "RESULT_CACHE")
+API_ONLY_TEST = """
+def test_get_non_existent_post(api_client):
+    assert api_client.get_post(0).status_code == 404
+"""
+
+
+@allure.epic("Инфраструктура")
+@allure.feature("Прогон только с API")
+class TestApiOnlyRun:
+    """Следит, чтобы тестам, которые ходят только в API, не нужны были настройки БД."""
+
+    @allure.title("Тест только с api_client проходит без переменных DB_*")
+    def test_api_only_run_without_db_settings(self, tmp_path: Path):
+        server = start_standin(str(tmp_path / "wp.sqlite"), user="api-only", password="api-only")
+        test_file = tmp_path / "test_api_only.py"
+        test_file.write_text(API_ONLY_TEST, encoding="utf-8")
+        # Внешний прогон может включать плагины из conftest (RESULT_CACHE, ALLURE_*, XDIST_*); вложенному они не нужны
+        env = {name: value for name, value in os.environ.items() if not name.startswith(CONFIG_PREFIXES)}
+        env.update({"WP_BASE_URL": server.base_url, "WP_API_USER": "api-only", "WP_API_PASSWORD": "api-only"})
+        # tests/conftest.py подключается плагином: так фикстуры те же, а тест из tmp_path не тянет остальные тесты
+        command = [sys.executable, "-m", "pytest", "-q", "-p", "tests.conftest", "-p", "no:cacheprovider"]
+        try:
+            result = subprocess.run(
+                [*command, "--rootdir", str(tmp_path), str(test_file)],
+                cwd=ROOT,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=60,
+            )
+        finally:
+            server.shutdown()
+
+        with allure.step("Проверить, что прогон прошел без обращения к БД"):
+            output = f"{result.stdout}\n{result.stderr}"
+            assert result.returncode == pytest.ExitCode.OK, f"Прогон только с API упал:\n{output}"
@@ -0,0 +1,112 @@
+from typing import Any
+
+import allure
+import pytest
+
+from src.api_client import APIClient, build_response
+from src.wp_standin import StandInServer, _error
+
+
+@allure.epic("Инфраструктура")
+@allure.feature("Батч-запросы")
+class TestBatch:
+    """Отправка очереди PostBatch через /batch/v1 и разбор ответов: APIClient.batch против заглушки WordPress."""
+
+    @pytest.fixture
+    def routes(self, wp_standin: StandInServer | None, api_client: APIClient, monkeypatch: pytest.MonkeyPatch):
+        """
+        Перехватывает запросы к заглушке: возвращает список (метод, маршрут) дошедших до нее запросов
+        и словарь, в который тест кладет подмененный ответ на POST /batch/v1.
+        """
+        if wp_standin is None or api_client.cassette is not None:
+            pytest.skip("Ответы /batch/v1 подменяются только на заглушке без кассеты")
+        seen: list[tuple[str, str]] = []
+        override: dict[str, tuple[int, Any, dict[str, str]]] = {}
+        dispatch = wp_standin.app.dispatch
+
+        def _dispatch(method: str, route: str, *args: Any) -> tuple[int, Any, dict[str, str]]:
+            seen.append((method.upper(), route))
+            if route == "/batch/v1" and "batch" in override:
+                return override["batch"]
+            return dispatch(method, route, *args)
+
+        monkeypatch.setattr(wp_standin.app, "dispatch", _dispatch)
+        return seen, override
+
+    @allure.title("Очередь уходит пачками через /batch/v1, каждый подзапрос получает свой ответ")
+    def test_batch_success(self, api_client: APIClient, routes, cleanup_posts):
+        seen, _ = routes
+
+        with allure.step("Создать три поста в батче размером 2"):
+            with api_client.batch(size=2) as batch:
+                items = [batch.create_post({"title": f"Batch {index}", "status": "draft"}) for index in range(3)]
+            for item in items:
+                if item.response.status_code == 201:
+                    cleanup_posts(item.response.json()["id"])
+
+        with allure.step("Проверить, что ушло два батча и ни одного отдельного запроса"):
+            assert seen == [("POST", "/batch/v1"), ("POST", "/batch/v1")]
+            assert [item.response.status_code for item in items] == [201, 201, 201]
+            assert [item.response.json()["title"]["raw"] for item in items] == ["Batch 0", "Batch 1", "Batch 2"]
+
+    @allure.title("Без маршрута /batch/v1 запросы уходят по одному, и батч больше не пробуется")
+    def test_batch_route_missing(self, api_client: APIClient, routes, cleanup_posts):
+        seen, override = routes
+        override["batch"] = _error(404, "rest_no_route", "No route was found matching the URL and request method.")
+
+        with allure.step("Дважды отправить батч из двух постов"):
+            for _ in range(2):
+                with api_client.batch() as batch:
+                    items = [batch.create_post({"title": "Single", "status": "draft"}) for _ in range(2)]
+                for item in items:
+                    cleanup_posts(item.response.json()["id"])
+
+        with allure.step("Проверить, что /batch/v1 запрошен один раз, а посты созданы отдельными запросами"):
+            assert seen == [("POST", "/batch/v1")] + [("POST", "/wp/v2/posts")] * 4
+            assert [item.response.status_code for item in items] == [201, 201]
+
+    @pytest.mark.parametrize("status", [400, 500])
+    @allure.title("Ошибка всего батча не повторяется по одному: каждый подзапрос получает ответ батча")
+    def test_batch_error_is_not_retried(self, api_client: APIClient, routes, status: int):
+        seen, override = routes
+        override["batch"] = _error(status, "rest_batch_failed", "Batch failed.")
+
+        with allure.step(f"Отправить батч, на который сервер отвечает {status}"):
+            with api_client.batch() as batch:
+                items = [batch.create_post({"title": "Failed", "status": "draft"}) for _ in range(2)]
+
+        with allure.step("Проверить, что отдельных запросов не было"):
+            assert seen == [("POST", "/batch/v1")]
+            assert [item.response.status_code for item in items] == [status, status]
+            assert items[0].response is items[1].response
+
+    @allure.title("Число ответов батча не совпадает с числом подзапросов: подзапросы получают ответ батча")
+    def test_batch_length_mismatch(self, api_client: APIClient, routes):
+        seen, override = routes
+        override["batch"] = (207, {"responses": [{"status": 201, "body": {"id": 1}, "headers": {}}]}, {})
+
+        with allure.step("Отправить батч из двух подзапросов, на который сервер вернул один ответ"):
+            with api_client.batch() as batch:
+                items = [batch.create_post({"title": "Mismatch", "status": "draft"}) for _ in range(2)]
+
+        with allure.step("Проверить, что отдельных запросов не было и ответы не перепутаны"):
+            assert seen == [("POST", "/batch/v1")]
+            assert [item.response.status_code for item in items] == [207, 207]
+
+    @allure.title("build_response собирает Response из ответа на подзапрос")
+    def test_build_response(self):
+        url = "http://wp.test/index.php?rest_route=/batch/v1"
+
+        with allure.step("Собрать ответ с известным статусом и заголовками"):
+            sub_response = {"status": 201, "body": {"id": 7}, "headers": {"Allow": "GET", "X-Total": 3}}
+            response = build_response(sub_response, url)
+            assert (response.status_code, response.reason, response.url) == (201, "Created", url)
+            assert response.headers["allow"] == "GET" and response.headers["X-Total"] == "3"
+            assert response.json() == {"id": 7}
+            assert response.ok
+
+        with allure.step("Собрать ответ без статуса и с нестандартным статусом"):
+            assert build_response({"body": []}, url).status_code == 200
+            unknown = build_response({"status": 599, "body": None}, url)
+            assert (unknown.status_code, unknown.reason, unknown.json()) == (599, "", None)
+            assert not unknown.ok
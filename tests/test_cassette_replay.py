@@ -0,0 +1,66 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import allure
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIG_PREFIXES = ("WP_", "DB_", "ALLURE_", "XDIST_", "RESULT_CACHE")
+# Порт, на котором никто не слушает: при воспроизведении тест не должен ходить ни в сеть, ни в БД
+UNREACHABLE_URL = "http://127.0.0.1:9/index.php?rest_route=/"
+RECORDED_TEST = """
+import uuid
+
+
+def test_api_and_db(api_client, db_client, make_post, make_post_via_sql, make_posts):
+    post = make_post(title=f"Cassette {uuid.uuid4()}")
+    assert db_client.get_post_by_id(post["id"])["post_title"] == post["title"]["raw"]
+
+    sql_post = make_post_via_sql(post_title="SQL [{uuid}]", post_content="Body")
+    response = api_client.get_post(sql_post["id"], params={"context": "edit"})
+    assert response.json()["title"]["raw"] == sql_post["title"]["raw"]
+
+    posts = make_posts(2)
+    assert db_client.count_posts_by_ids([item["id"] for item in posts]) == 2
+    db_client.expect(posts[0]["id"]).title(posts[0]["title"]["raw"])
+
+    assert api_client.delete_post(post["id"]).status_code == 200
+    assert db_client.post_exists(post["id"]) is False
+"""
+
+
+@allure.epic("Инфраструктура")
+@allure.feature("Кассеты")
+class TestCassetteReplay:
+    """Запись теста с проверками через API и БД и его воспроизведение без стенда."""
+
+    @allure.title("Тест, записанный на заглушке, проходит при воспроизведении без сети и без БД")
+    def test_recorded_test_passes_in_replay(self, tmp_path: Path):
+        test_file = tmp_path / "test_recorded.py"
+        test_file.write_text(RECORDED_TEST, encoding="utf-8")
+        env = {name: value for name, value in os.environ.items() if not name.startswith(CONFIG_PREFIXES)}
+        env.update({"WP_API_USER": "cassette", "WP_API_PASSWORD": "cassette", "WP_API_CASSETTE_DIR": str(tmp_path)})
+
+        def run(mode: str, base_url: str) -> set[str]:
+            command = [sys.executable, "-m", "pytest", "-q", "-rA", "-p", "tests.conftest", "-p", "no:cacheprovider"]
+            result = subprocess.run(
+                [*command, "--rootdir", str(tmp_path), str(test_file)],
+                cwd=ROOT,
+                env={**env, "WP_API_CASSETTE_MODE": mode, "WP_BASE_URL": base_url},
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=60,
+            )
+            assert result.returncode == pytest.ExitCode.OK, f"Прогон {mode} упал:\n{result.stdout}\n{result.stderr}"
+            return set(re.findall(r"^PASSED \S+::(\w+)", result.stdout, re.MULTILINE))
+
+        with allure.step("Записать тест на заглушке WordPress"):
+            assert run("record", "standin") == {"test_api_and_db"}
+            assert list(tmp_path.glob("test_recorded/*.json")), "Кассета не сохранена"
+
+        with allure.step("Воспроизвести тест с недоступным WordPress и без настроек БД"):
+            assert run("replay", UNREACHABLE_URL) == {"test_api_and_db"}
@@ -0,0 +1,69 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import allure
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIG_PREFIXES = ("WP_", "DB_", "ALLURE_", "XDIST_", "RESULT_CACHE")
+EXPECTATION_TESTS = """
+def test_unmet_expectation(db_client, make_post_via_sql):
+    post = make_post_via_sql(post_title="Expected", post_content="Body")
+    db_client.expect(post["id"]).title("Other title")
+
+
+def test_after_unmet_expectation(db_client, make_post_via_sql):
+    post = make_post_via_sql(post_title="Expected", post_content="Body")
+    db_client.expect(post["id"]).title("Expected")
+
+
+def test_own_error_first(db_client):
+    db_client.expect(0).title("Never checked")
+    raise RuntimeError("own error")
+
+
+def test_after_own_error(db_client):
+    db_client.flush_expectations()
+"""
+
+
+@allure.epic("Инфраструктура")
+@allure.feature("Отложенные проверки БД")
+class TestDBExpectations:
+    """Сверка db_client.expect в обертке pytest_runtest_call из tests/conftest.py."""
+
+    @allure.title("Несбывшаяся проверка роняет свой тест на фазе call и не переходит в следующий")
+    def test_unmet_expectation_fails_its_own_test(self, tmp_path: Path):
+        test_file = tmp_path / "test_expectations.py"
+        test_file.write_text(EXPECTATION_TESTS, encoding="utf-8")
+        env = {name: value for name, value in os.environ.items() if not name.startswith(CONFIG_PREFIXES)}
+        env.update({"WP_BASE_URL": "standin", "WP_API_USER": "expect", "WP_API_PASSWORD": "expect"})
+        command = [sys.executable, "-m", "pytest", "-q", "-rA", "-p", "tests.conftest", "-p", "no:cacheprovider"]
+        result = subprocess.run(
+            [*command, "--rootdir", str(tmp_path), str(test_file)],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=False,
+            timeout=60,
+        )
+        output = f"{result.stdout}\n{result.stderr}"
+        outcomes = {name: outcome for outcome, name in re.findall(r"^(\w+) \S+::(\w+)", result.stdout, re.MULTILINE)}
+
+        with allure.step("Проверить, что упали только тесты с несбывшейся проверкой и со своей ошибкой"):
+            assert outcomes == {
+                "test_unmet_expectation": "FAILED",
+                "test_after_unmet_expectation": "PASSED",
+                "test_own_error_first": "FAILED",
+                "test_after_own_error": "PASSED",
+            }, output
+            assert result.returncode == pytest.ExitCode.TESTS_FAILED, output
+
+        with allure.step("Проверить, что расхождение уронило фазу call, а тест со своей ошибкой упал с ней"):
+            assert "Проверки постов в БД не прошли" in output and "Other title" in output, output
+            assert "ERROR" not in outcomes.values() and " error" not in result.stdout.splitlines()[-1], output
+            assert "пост 0:" not in output, output
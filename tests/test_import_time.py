@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import allure
+
+ROOT = Path(__file__).resolve().parents[1]
+CLIENT_MODULES = ("config", "src.api_client", "src.async_api_client", "src.db_client")
+# Драйвер БД, отчетность и .env грузятся при первом подключении клиента, а не при импорте
+DEFERRED_MODULES = ("mysql.connector", "httpx", "allure", "dotenv")
+# Собственный импорт клиентов (без requests) относительно импорта requests в том же процессе.
+# Отношение не зависит от загрузки машины, в отличие от миллисекунд; сейчас оно около 0.45
+IMPORT_RATIO_BUDGET = 1.0
+
+
+def import_times(modules: tuple[str, ...]) -> tuple[dict[str, int], int]:
+    """
+    Импортирует modules в чистом интерпретаторе с -X importtime и без переменных WP_*/DB_*.
+    Возвращает накопленное время импорта (мкс) каждого загруженного модуля и общее время импорта modules
+    без requests: он импортируется первым как точка отсчета.
+    """
+    env = {name: value for name, value in os.environ.items() if not name.startswith(("WP_", "DB_"))}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import requests, {', '.join(modules)}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0, f"Импорт упал без переменных окружения:\n{result.stderr}"
+
+    packages = {module.split(".")[0] for module in modules}
+    times, total = {}, 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+        # Вложенные импорты сдвинуты вправо и уже входят во время своего родителя; site и прочее — старт интерпретатора
+        if not name.startswith("  ") and name.strip().split(".")[0] in packages:
+            total += int(cumulative)
+    return times, total
+
+
+@allure.epic("Инфраструктура")
+@allure.feature("Время старта")
+class TestImportTime:
+    """Следит, чтобы импорт клиентов оставался дешевым для сбора тестов и старта воркеров xdist."""
+
+    @allure.title("Импорт клиентов не тянет драйвер БД и отчетность и не дороже импорта requests")
+    def test_client_import_budget(self):
+        times, total_us = import_times(CLIENT_MODULES)
+
+        with allure.step("Проверить, что тяжелые зависимости отложены до подключения"):
+            loaded = [module for module in DEFERRED_MODULES if module in times]
+            assert not loaded, f"При импорте клиентов загружены отложенные модули: {', '.join(loaded)}"
+
+        with allure.step(f"Проверить, что импорт клиентов не дороже {IMPORT_RATIO_BUDGET} импорта requests"):
+            ratio = total_us / times["requests"]
+            assert ratio <= IMPORT_RATIO_BUDGET, (
+                f"Импорт клиентов занял {total_us / 1000:.0f} мс — {ratio:.2f} от импорта requests "
+                f"({times['requests'] / 1000:.0f} мс), бюджет {IMPORT_RATIO_BUDGET}"
+            )
@@ -0,0 +1,154 @@
+import threading
+import time
+from collections.abc import Callable
+
+import allure
+import pytest
+import requests
+from requests import Response
+
+from src.latency_policy import CircuitOpenError, LatencyPolicy, RetryBudget
+
+
+class FakeResponse(Response):
+    def __init__(self, status_code: int = 200, name: str = "") -> None:
+        """Ответ без сети, который запоминает, что его закрыли."""
+        super().__init__()
+        self.status_code = status_code
+        self.name = name
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeSend:
+    def __init__(self, *results: Callable[[], Response]) -> None:
+        """Считает вызовы и отдает results по очереди; последний повторяется."""
+        self.results = results
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> Response:
+        with self._lock:
+            result = self.results[min(self.calls, len(self.results) - 1)]
+            self.calls += 1
+        return result()
+
+
+def answer(status_code: int, name: str = "", delay: float = 0.0, responses: list[Response] | None = None):
+    def result() -> Response:
+        time.sleep(delay)
+        response = FakeResponse(status_code, name)
+        if responses is not None:
+            responses.append(response)
+        return response
+
+    return result
+
+
+def refuse() -> Response:
+    raise requests.ConnectionError("connection refused")
+
+
+@pytest.fixture
+def policy():
+    """Политика без задержек между повторами; закрывается после теста."""
+    created: list[LatencyPolicy] = []
+
+    def make(**kwargs) -> LatencyPolicy:
+        created.append(LatencyPolicy(**{"backoff": 0.0, "initial_hedge_delay": 5.0, **kwargs}))
+        return created[-1]
+
+    yield make
+    for item in created:
+        item.close()
+
+
+@allure.epic("Инфраструктура")
+@allure.feature("Политика задержек")
+class TestLatencyPolicy:
+    """src.latency_policy.LatencyPolicy на поддельной отправке запроса без сети."""
+
+    @allure.title("Автомат размыкается после серии отказов и пропускает пробный запрос после паузы")
+    def test_breaker_opens_and_half_opens(self, policy):
+        policy = policy(breaker_threshold=2, breaker_reset=0.05)
+        failing = FakeSend(answer(500))
+
+        with allure.step("Получить два отказа подряд: автомат размыкается, запрос не отправляется"):
+            for _ in range(2):
+                assert policy.execute("POST", "/wp/v2/posts", failing).status_code == 500
+            with pytest.raises(CircuitOpenError):
+                policy.execute("POST", "/wp/v2/posts", failing)
+            assert failing.calls == 2
+
+        with allure.step("После паузы пробный запрос проходит, его отказ снова размыкает автомат"):
+            time.sleep(0.06)
+            assert policy.execute("POST", "/wp/v2/posts", failing).status_code == 500
+            with pytest.raises(CircuitOpenError):
+                policy.execute("POST", "/wp/v2/posts", failing)
+            assert failing.calls == 3
+
+        with allure.step("После паузы успешный пробный запрос замыкает автомат"):
+            time.sleep(0.06)
+            succeeding = FakeSend(answer(200))
+            assert policy.execute("POST", "/wp/v2/posts", succeeding).status_code == 200
+            assert policy.execute("POST", "/wp/v2/posts", succeeding).status_code == 200
+            assert succeeding.calls == 2 and policy.breaker.opened_at is None
+
+    @allure.title("Повторы прекращаются, когда кончается бюджет")
+    def test_retry_budget_exhaustion(self, policy):
+        policy = policy(max_retries=5, breaker_threshold=100)
+        policy.budget = RetryBudget(ratio=0.0, capacity=2)
+
+        with allure.step("Отказы идемпотентного запроса повторяются, пока есть жетоны"):
+            failing = FakeSend(answer(503))
+            assert policy.execute("GET", "/wp/v2/posts/1", failing, idempotent=True).status_code == 503
+            assert (failing.calls, policy.retries) == (3, 2)
+
+        with allure.step("Без жетонов отказ возвращается после первой попытки"):
+            failing = FakeSend(answer(503))
+            assert policy.execute("GET", "/wp/v2/posts/1", failing, idempotent=True).status_code == 503
+            assert (failing.calls, policy.retries) == (1, 2)
+
+        with allure.step("Сетевая ошибка без жетонов пробрасывается без повтора"):
+            refusing = FakeSend(refuse)
+            with pytest.raises(requests.ConnectionError):
+                policy.execute("GET", "/wp/v2/posts/1", refusing, idempotent=True)
+            assert refusing.calls == 1
+
+    @pytest.mark.parametrize(
+        "method, idempotent", [("POST", True), ("GET", False)], ids=["unsafe-method", "not-marked"]
+    )
+    @allure.title("Неидемпотентный запрос не дублируется и не повторяется")
+    def test_non_idempotent_is_never_duplicated(self, policy, method: str, idempotent: bool):
+        policy = policy(initial_hedge_delay=0.01)
+
+        with allure.step("Медленный ответ с ошибкой отправляется один раз"):
+            slow = FakeSend(answer(500, delay=0.1))
+            assert policy.execute(method, "/wp/v2/posts", slow, idempotent=idempotent).status_code == 500
+            assert slow.calls == 1
+
+        with allure.step("Сетевая ошибка пробрасывается после одной попытки"):
+            refusing = FakeSend(refuse)
+            with pytest.raises(requests.ConnectionError):
+                policy.execute(method, "/wp/v2/posts", refusing, idempotent=idempotent)
+            assert refusing.calls == 1
+            assert (policy.hedged, policy.retries) == (0, 0)
+
+    @allure.title("Берется ответ дубля, пришедший первым, а ответ проигравшего закрывается")
+    def test_hedge_winner_used_and_loser_closed(self, policy):
+        policy = policy(initial_hedge_delay=0.05)
+        responses: list[Response] = []
+        send = FakeSend(answer(200, "slow", delay=0.3, responses=responses), answer(200, "fast", responses=responses))
+
+        with allure.step("Первый запрос не отвечает дольше задержки дубля"):
+            response = policy.execute("GET", "/wp/v2/posts/1", send, idempotent=True)
+            assert response.name == "fast" and not response.closed
+            assert (send.calls, policy.hedged, policy.hedge_wins) == (2, 1, 1)
+
+        with allure.step("Проверить, что ответ первого запроса закрыт, когда он пришел"):
+            policy._executor.shutdown(wait=True)
+            slow = next(item for item in responses if item.name == "slow")
+            assert slow.closed and not response.closed
+            assert sum(histogram.count for histogram in policy.histograms.values()) == 1
@@ -0,0 +1,144 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import allure
+import pytest
+
+from src.wp_standin import start_standin
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIG_PREFIXES = ("WP_", "DB_", "ALLURE_", "XDIST_", "RESULT_CACHE")
+
+PROJECT = {
+    "conftest.py": '''
+import pytest
+
+from src.result_cache import ResultCachePlugin
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(ResultCachePlugin(config, force=False), "result_cache")
+
+
+@pytest.fixture
+def base():
+    return 1
+
+
+@pytest.fixture
+def derived(base):
+    return base + 1
+
+
+@pytest.fixture
+def lazy():
+    return 3
+
+
+@pytest.fixture
+def dynamic(request):
+    return request.getfixturevalue("lazy")
+''',
+    "helpers.py": '''
+def value():
+    return 1
+''',
+    "test_fixtures.py": '''
+def test_derived(derived):
+    assert derived == 2
+
+
+def test_dynamic(dynamic):
+    assert dynamic == 3
+
+
+def test_plain():
+    assert True
+''',
+    "test_helpers.py": '''
+import helpers
+
+
+def test_helper():
+    assert helpers.value() == 1
+''',
+}
+ALL_TESTS = {
+    "test_fixtures.py::test_derived",
+    "test_fixtures.py::test_dynamic",
+    "test_fixtures.py::test_plain",
+    "test_helpers.py::test_helper",
+}
+
+
+@allure.epic("Инфраструктура")
+@allure.feature("Кэш результатов")
+class TestResultCache:
+    """Отбор тестов по отпечатку: src.result_cache на маленьком проекте против заглушки WordPress."""
+
+    @pytest.fixture
+    def project(self, tmp_path: Path):
+        """Проект из PROJECT в tmp_path и функция запуска pytest в нем; возвращает код выхода и прошедшие тесты."""
+        server = start_standin(str(tmp_path / "wp.sqlite"), user="cache", password="cache")
+        project_dir = tmp_path / "project"
+        project_dir.mkdir()
+        for name, source in PROJECT.items():
+            (project_dir / name).write_text(source.lstrip(), encoding="utf-8")
+        env = {name: value for name, value in os.environ.items() if not name.startswith(CONFIG_PREFIXES)}
+        # Отпечаток окружения берется из индекса REST API живой заглушки
+        env.update({"WP_BASE_URL": server.base_url, "WP_API_USER": "cache", "WP_API_PASSWORD": "cache"})
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+
+        def run(*args: str, settings: dict[str, str] | None = None) -> tuple[int, set[str]]:
+            result = subprocess.run(
+                [sys.executable, "-m", "pytest", "-q", "-rA", "--rootdir", str(project_dir), *args],
+                cwd=project_dir,
+                env={**env, **(settings or {})},
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=60,
+            )
+            passed = set(re.findall(r"^PASSED (\S+)", result.stdout, re.MULTILINE))
+            assert result.returncode in (pytest.ExitCode.OK, pytest.ExitCode.NO_TESTS_COLLECTED), result.stdout
+            return result.returncode, passed
+
+        yield project_dir, run
+        server.shutdown()
+
+    @allure.title("Прошедшие тесты пропускаются, а правка теста, фикстуры или модуля перезапускает только зависимые")
+    def test_edit_reselects_only_affected_tests(self, project):
+        project_dir, run = project
+
+        def edit(name: str, old: str, new: str) -> None:
+            path = project_dir / name
+            path.write_text(path.read_text(encoding="utf-8").replace(old, new), encoding="utf-8")
+
+        with allure.step("Первый прогон выполняет все тесты, повторный — ни одного и завершается успешно"):
+            assert run() == (pytest.ExitCode.OK, ALL_TESTS)
+            assert run() == (pytest.ExitCode.OK, set())
+
+        with allure.step("Правка фикстуры из getfixturevalue перезапускает только тест, который ее запрашивает"):
+            edit("conftest.py", "return 3", "return 1 + 2")
+            assert run()[1] == {"test_fixtures.py::test_dynamic"}
+
+        with allure.step("Правка фикстуры на дне цепочки перезапускает тест с зависящей от нее фикстурой"):
+            edit("conftest.py", "return 1\n", "return 0 + 1\n")
+            assert run()[1] == {"test_fixtures.py::test_derived"}
+
+        with allure.step("Правка импортируемого модуля перезапускает тесты файла, который его импортирует"):
+            edit("helpers.py", "return 1", "return 2 - 1")
+            assert run()[1] == {"test_helpers.py::test_helper"}
+
+        with allure.step("Смена настройки из config.py перезапускает все тесты, смена пароля — ни одного"):
+            assert run(settings={"DB_PREPARED_STATEMENTS": "true"}) == (pytest.ExitCode.OK, ALL_TESTS)
+            assert run(settings={"DB_PREPARED_STATEMENTS": "true", "WP_API_PASSWORD": "other"})[1] == set()
+            assert run()[1] == ALL_TESTS
+
+        with allure.step("Под xdist контроллер запоминает результат по отпечатку из отчета воркера"):
+            edit("test_fixtures.py", "assert True", "assert not False")
+            assert run("-n", "2")[1] == {"test_fixtures.py::test_plain"}
+            assert run("-n", "2") == (pytest.ExitCode.OK, set())
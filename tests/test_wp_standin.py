@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import allure
+import pytest
+
+from src.wp_standin import WPStandIn
+
+
+@allure.epic("Инфраструктура")
+@allure.feature("Заглушка WordPress")
+class TestWPStandIn:
+    """Ответы src.wp_standin на неверные аргументы совпадают с ответами WordPress."""
+
+    @pytest.fixture
+    def app(self, tmp_path: Path) -> WPStandIn:
+        """Маршруты заглушки без HTTP поверх пустой SQLite-базы."""
+        app = WPStandIn(str(tmp_path / "wp.sqlite"))
+        yield app
+        app.connection.close()
+
+    @allure.title("Нечисловой include дает 400 rest_invalid_param в формате WordPress")
+    def test_non_integer_include(self, app: WPStandIn):
+        status, data, _ = app.dispatch("GET", "/wp/v2/posts", {"include": "1,abc"}, None)
+
+        with allure.step("Проверить статус и тело ошибки"):
+            assert status == 400
+            assert data["code"] == "rest_invalid_param"
+            assert data["message"] == "Invalid parameter(s): include"
+            assert data["data"]["status"] == 400
+            assert data["data"]["params"] == {"include": "include[1] is not of type integer."}
+            assert data["data"]["details"]["include"]["code"] == "rest_invalid_type"
+
+        with allure.step("Проверить, что пустые элементы include отбрасываются, как в WordPress"):
+            status, data, headers = app.dispatch("GET", "/wp/v2/posts", {"include": "1,,2,"}, None)
+            assert (status, data, headers["X-WP-Total"]) == (200, [], "0")
+
+    @allure.title("Неверный status при обновлении несуществующего поста дает 400, а не 404")
+    def test_update_validates_status_before_lookup(self, app: WPStandIn):
+        with allure.step("Обновить несуществующий пост с неверным и с верным статусом"):
+            invalid_status, invalid, _ = app.dispatch("POST", "/wp/v2/posts/999", {}, {"status": "bogus"})
+            missing_status, missing, _ = app.dispatch("POST", "/wp/v2/posts/999", {}, {"status": "draft"})
+
+        with allure.step("Проверить, что аргументы проверены до поиска поста"):
+            assert (invalid_status, invalid["code"]) == (400, "rest_invalid_param")
+            assert (missing_status, missing["code"]) == (404, "rest_post_invalid_id")
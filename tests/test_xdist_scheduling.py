@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+from typing import Any
+
+import allure
+
+from src.xdist_scheduling import DurationScheduling
+
+COLLECTION = [f"test_module.py::test_{index}" for index in range(8)]
+# Тесты 0-3 делят фикстуру shared_posts и образуют одну группу; остальные независимы
+DURATIONS = [1.0, 1.0, 1.0, 1.0, 3.0, 0.5, 0.5, 0.1]
+HISTORY = {
+    nodeid: {"duration": duration, "fixtures": ["shared_posts"] if index < 4 else []}
+    for index, (nodeid, duration) in enumerate(zip(COLLECTION, DURATIONS))
+}
+GROUP = {0, 1, 2, 3}
+
+
+class FakeConfig:
+    def getvalue(self, name: str) -> Any:
+        return ["2*popen"] if name == "tx" else None
+
+
+class FakeNode:
+    def __init__(self, name: str) -> None:
+        """Воркер xdist, который только запоминает команды планировщика."""
+        self.gateway = SimpleNamespace(id=name)
+        self.shutting_down = False
+        self.sent: list[int] = []
+        self.steal_requests: list[list[int]] = []
+
+    def send_runtest_some(self, indices: list[int]) -> None:
+        self.sent.extend(indices)
+
+    def send_steal(self, indices: list[int]) -> None:
+        self.steal_requests.append(list(indices))
+
+    def shutdown(self) -> None:
+        self.shutting_down = True
+
+
+@allure.epic("Инфраструктура")
+@allure.feature("Распределение тестов по воркерам")
+class TestDurationScheduling:
+    """Планировщик src.xdist_scheduling.DurationScheduling на воркерах-заглушках."""
+
+    @allure.title("Work stealing не разрывает группу тестов с общей фикстурой")
+    def test_steal_keeps_groups_whole(self):
+        scheduler = DurationScheduling(FakeConfig(), None, HISTORY, ["shared_posts"])
+        first, second = FakeNode("gw0"), FakeNode("gw1")
+        for node in (first, second):
+            scheduler.add_node(node)
+            scheduler.add_node_collection(node, COLLECTION)
+
+        with allure.step("Распределить тесты по длительностям: группа целиком уходит одному воркеру"):
+            scheduler.schedule()
+            assert first.sent == [0, 1, 2, 3, 7]
+            assert second.sent == [4, 5, 6]
+
+        with allure.step("Второй воркер выполняет свои тесты и просит работу у первого"):
+            scheduler.mark_test_complete(second, 4)
+            scheduler.mark_test_complete(second, 5)
+            # Обычный work stealing забрал бы хвост [3, 7] и оторвал тест 3 от группы
+            assert first.steal_requests == [[7]]
+
+        with allure.step("Первый воркер отдает тест, и он уходит второму"):
+            scheduler.remove_pending_tests_from_node(first, [7])
+            assert second.sent == [4, 5, 6, 7]
+            assert scheduler.node2pending[first] == [0, 1, 2, 3]
+
+        with allure.step("Проверить, что вся группа выполняется на первом воркере"):
+            assert GROUP <= set(first.sent) and not GROUP & set(second.sent)
+
+    @allure.title("Общая очередь раздается порциями, которые не режут группу")
+    def test_pending_portions_keep_groups_whole(self):
+        scheduler = DurationScheduling(FakeConfig(), None, HISTORY, ["shared_posts"])
+        first, second = FakeNode("gw0"), FakeNode("gw1")
+        for node in (first, second):
+            scheduler.add_node(node)
+            scheduler.add_node_collection(node, COLLECTION)
+        scheduler.collection = COLLECTION
+        scheduler.groups = {index: frozenset(GROUP) for index in GROUP}
+
+        with allure.step("Раздать очередь из группы и двух тестов двум простаивающим воркерам"):
+            scheduler.pending[:] = [0, 1, 2, 3, 4, 5]
+            scheduler.check_schedule()
+
+        with allure.step("Проверить, что группа ушла одному воркеру целиком"):
+            assert first.sent == [0, 1, 2, 3]
+            assert second.sent == [4, 5]